@@ -0,0 +1,200 @@
+"""Benchmark the dictionary build on synthetic datasets of several sizes.
+
+For every scale the datasets are generated once (see data.synthetic) and
+kept under data/datasets/synthetic/, then data.main is run on them in a
+fresh process with a throwaway output folder. The stage timings and memory
+from its build report are appended to data/benchmark-results.jsonl together
+with the current commit, and compared with the last result for the same
+scale and build options:
+
+    python -m data.benchmark --scales 0.1,1 -- --workers 2
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from data import jsonio
+from data.instrumentation import load_report
+from data.synthetic import generate
+
+DATA_DIR = Path(__file__).resolve().parent
+SYNTHETIC_DIR = DATA_DIR / "datasets" / "synthetic"
+RESULTS_PATH = DATA_DIR / "benchmark-results.jsonl"
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=DATA_DIR, capture_output=True, text=True
+        ).stdout.strip()
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def synthetic_datasets(scale: float, seed: int) -> Path:
+    """Generate the datasets for `scale` unless an earlier run already did."""
+    dataset_dir = SYNTHETIC_DIR / f"{scale:g}x-seed{seed}"
+    marker = dataset_dir / ".complete"
+    if not marker.exists():
+        print(f"Generating {scale:g}x synthetic datasets in {dataset_dir}...")
+        start_time = time.time()
+        generate(dataset_dir, scale, seed)
+        marker.touch()
+        print(f"Generated them in {time.time() - start_time:.1f} seconds")
+    return dataset_dir
+
+
+def run_build(dataset_dir: Path, build_args: List[str]) -> Dict[str, Any]:
+    """Run one full build in a child process and return its report."""
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = Path(tmp) / "report.json"
+        command = [
+            sys.executable,
+            "-m",
+            "data.main",
+            "--datasets",
+            str(dataset_dir),
+            "--output",
+            str(Path(tmp) / "dictionary"),
+            "--report",
+            str(report_path),
+            "--full-rebuild",
+            *build_args,
+        ]
+        log_path = Path(tmp) / "build.log"
+        with open(log_path, "w", encoding="utf-8") as log:
+            completed = subprocess.run(
+                command, cwd=DATA_DIR.parent, stdout=log, stderr=subprocess.STDOUT
+            )
+        if completed.returncode:
+            sys.stdout.write(log_path.read_text(encoding="utf-8")[-4000:])
+            raise RuntimeError(f"Build failed with exit code {completed.returncode}")
+        return load_report(report_path)
+
+
+def summarize(report: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a build report worth keeping across commits."""
+    stages = {}
+    # In a sharded build the worker stages run side by side, so a stage takes
+    # as long as its slowest shard and as much CPU as all of them together.
+    for stage in report["stages"] + [
+        s for shard in report.get("shards", []) for s in shard["stages"]
+    ]:
+        summary = stages.setdefault(
+            stage["name"],
+            {"entries": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "peak_rss_mb": 0.0},
+        )
+        summary["entries"] = max(summary["entries"], stage["entries"])
+        summary["wall_seconds"] = max(summary["wall_seconds"], stage["wall_seconds"])
+        summary["cpu_seconds"] = round(summary["cpu_seconds"] + stage["cpu_seconds"], 3)
+        summary["peak_rss_mb"] = max(
+            summary["peak_rss_mb"], stage["peak_rss_mb"] or 0.0
+        )
+    return {
+        "wall_seconds": report["wall_seconds"],
+        "cpu_seconds": report["cpu_seconds"],
+        "peak_rss_mb": max(s["peak_rss_mb"] for s in stages.values()),
+        "stages": stages,
+        "output": report["output"],
+    }
+
+
+def load_results(path: Path = RESULTS_PATH) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [jsonio.loads(line) for line in f if line.strip()]
+
+
+def previous_result(
+    results: List[Dict[str, Any]], result: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    for earlier in reversed(results):
+        if (
+            earlier["scale"] == result["scale"]
+            and earlier["seed"] == result["seed"]
+            and earlier["build_args"] == result["build_args"]
+        ):
+            return earlier
+    return None
+
+
+def _change(new: float, old: Optional[float]) -> str:
+    if not old:
+        return ""
+    return f"{(new - old) / old:+.0%}"
+
+
+def print_comparison(result: Dict[str, Any], earlier: Optional[Dict[str, Any]]):
+    print(f"\n{result['scale']:g}x at {result['commit']}", end="")
+    if earlier:
+        print(f" vs {earlier['commit']} ({earlier['date']})", end="")
+    print()
+    old_stages = earlier["stages"] if earlier else {}
+    print(
+        f"{'stage':<24}{'entries':>10}{'wall s':>10}{'change':>8}"
+        f"{'peak MB':>10}{'change':>8}"
+    )
+    rows = list(result["stages"].items()) + [("total", result)]
+    for name, stage in rows:
+        old = old_stages.get(name, {}) if name != "total" else (earlier or {})
+        wall, peak = stage["wall_seconds"], stage["peak_rss_mb"]
+        print(
+            f"{name:<24}{stage.get('entries', ''):>10}"
+            f"{wall:>10.2f}{_change(wall, old.get('wall_seconds')):>8}"
+            f"{peak:>10.0f}{_change(peak, old.get('peak_rss_mb')):>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scales",
+        default="0.1,1",
+        help="Comma-separated dataset scales relative to the real datasets "
+        "(e.g. 0.1,1,5,10)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Builds per scale")
+    parser.add_argument(
+        "--no-save", action="store_true", help="Don't append to the results file"
+    )
+    parser.add_argument(
+        "build_args",
+        nargs=argparse.REMAINDER,
+        help="Extra data.main options, after --",
+    )
+    args = parser.parse_args()
+    build_args = [a for a in args.build_args if a != "--"]
+
+    results = load_results()
+    revision = git_revision()
+    for scale in (float(s) for s in args.scales.split(",")):
+        dataset_dir = synthetic_datasets(scale, args.seed)
+        for run in range(args.repeat):
+            print(f"Building {scale:g}x ({run + 1}/{args.repeat})...")
+            result = {
+                **revision,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "scale": scale,
+                "seed": args.seed,
+                "build_args": build_args,
+                **summarize(run_build(dataset_dir, build_args)),
+            }
+            print_comparison(result, previous_result(results, result))
+            results.append(result)
+            if not args.no_save:
+                with open(RESULTS_PATH, "a", encoding="utf-8") as f:
+                    f.write(jsonio.dumps(result).decode("utf-8") + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import gc
+import marshal
+import sqlite3
+import tempfile
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+Entries = Dict[str, List[Any]]
+
+
+class EntryLists:
+    """The entries listed under every key, by field, as the processors add them.
+
+    Keys come back from `items()` in the order they were first added.
+    """
+
+    def __init__(self):
+        self._keys: Dict[str, Entries] = {}
+
+    def __repr__(self):
+        return f"EntryLists(keys_count={len(self._keys)})"
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def append(self, key: str, field: str, entry: Any):
+        self._keys.setdefault(key, {}).setdefault(field, []).append(entry)
+
+    def get(self, key: str, field: str) -> List[Any]:
+        return self._keys.get(key, {}).get(field, [])
+
+    def items(self) -> Iterator[Tuple[str, Entries]]:
+        return iter(self._keys.items())
+
+    def close(self):
+        self._keys = {}
+
+
+class SpilledEntryLists(EntryLists):
+    """EntryLists kept in an SQLite file instead of in memory.
+
+    Every append becomes a row of (key, field, marshalled entry) in a
+    temporary database in `directory`, inserted a batch at a time, so memory
+    use stays flat however many entries the sources add. `items()` streams
+    the keys back in sorted order, each with its fields and entries in the
+    order they were appended, through an index built on the first read.
+    """
+
+    def __init__(self, directory=None, batch_size: int = 10000):
+        self.directory = Path(directory or tempfile.gettempdir())
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        handle = tempfile.NamedTemporaryFile(
+            prefix="entries-", suffix=".sqlite", dir=self.directory, delete=False
+        )
+        handle.close()
+        self.path = Path(handle.name)
+        # Losing the file in a crash loses nothing worth keeping, so skip the
+        # journal and fsyncs, and let big sorts spill to disk as well.
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            PRAGMA temp_store = FILE;
+            CREATE TABLE entries (key TEXT NOT NULL, field TEXT NOT NULL, entry BLOB);
+            """
+        )
+        self._pending: List[Tuple[str, str, bytes]] = []
+        self._indexed = False
+        # A JMdict entry is appended under each of its keys in turn, so it is
+        # only marshalled once.
+        self._last: Optional[Tuple[Any, bytes]] = None
+
+    def __repr__(self):
+        return f"SpilledEntryLists(path={self.path})"
+
+    def _flush(self):
+        if self._pending:
+            self._db.executemany("INSERT INTO entries VALUES (?, ?, ?)", self._pending)
+            self._pending = []
+
+    def _ready(self):
+        self._flush()
+        if not self._indexed:
+            # rowid is the append order, and every index entry ends with it.
+            self._db.execute("CREATE INDEX entries_key ON entries (key)")
+            self._indexed = True
+
+    def __len__(self):
+        self._ready()
+        return self._db.execute("SELECT COUNT(DISTINCT key) FROM entries").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        self._ready()
+        query = "SELECT 1 FROM entries WHERE key = ? LIMIT 1"
+        return self._db.execute(query, (key,)).fetchone() is not None
+
+    def append(self, key: str, field: str, entry: Any):
+        if self._last is None or self._last[0] is not entry:
+            self._last = (entry, marshal.dumps(entry))
+        self._pending.append((key, field, self._last[1]))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def get(self, key: str, field: str) -> List[Any]:
+        self._ready()
+        rows = self._db.execute(
+            "SELECT entry FROM entries WHERE key = ? AND field = ? ORDER BY rowid",
+            (key, field),
+        )
+        return [marshal.loads(entry) for (entry,) in rows]
+
+    def items(self) -> Iterator[Tuple[str, Entries]]:
+        self._ready()
+        # A cursor of its own, so lookups while the keys are read don't reset it.
+        rows = self._db.cursor().execute(
+            "SELECT key, field, entry FROM entries ORDER BY key, rowid"
+        )
+        # Everything alive by now (the sources, mostly) outlives the decoded
+        # entries, which the writer keeps around a batch at a time. Freezing
+        # it keeps the collections their allocations set off from rescanning
+        # all of it, which otherwise doubles the time taken to write.
+        gc.freeze()
+        try:
+            for key, fragments in groupby(rows, key=lambda row: row[0]):
+                entries: Entries = {}
+                for _, field, entry in fragments:
+                    entries.setdefault(field, []).append(marshal.loads(entry))
+                yield key, entries
+        finally:
+            gc.unfreeze()
+
+    def size(self) -> int:
+        """Bytes of the database file so far."""
+        self._flush()
+        return self.path.stat().st_size
+
+    def close(self):
+        self._last = None
+        self._pending = []
+        self._db.close()
+        self.path.unlink(missing_ok=True)
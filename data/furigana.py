@@ -0,0 +1,228 @@
+import struct
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Container, Dict, Iterable, List, Optional, Tuple
+
+from data.loaders import JSONArrayStream, file_digest
+
+# Bump when the layout of the cache files changes.
+CACHE_VERSION = 1
+_MAGIC = b"FURI"
+# Segment count marking a record whose segments aren't plain ruby/rt pairs;
+# those are kept as-is in `_raw`.
+_RAW = 0xFFFFFFFF
+
+Segments = List[Dict[str, str]]
+
+
+class FuriganaIndex:
+    """JmdictFurigana records packed into one array of interned string ids.
+
+    Answers both "which readings does this text have" and "what are the
+    segments of this text with this reading". Every string (readings, rubies
+    and rts) is stored once in a string table. Each text maps to an offset
+    into `_data`, where its record is laid out as
+
+        reading count, then per reading:
+            reading id, segment count, then per segment: ruby id, rt id + 1
+
+    with an rt id of 0 meaning the segment has no rt (kana between kanji).
+    Segment dicts are only rebuilt when a text is looked up.
+
+    The index is built from the source file on first use, or read from a
+    binary cache keyed by the source's hash when `cache_dir` is given.
+    `on_load(from_cache, seconds)` is called once it has been built or read.
+    """
+
+    def __init__(
+        self,
+        source=None,
+        cache_dir=None,
+        on_load: Optional[Callable[[bool, float], None]] = None,
+    ):
+        self.source = Path(source) if source is not None else None
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.on_load = on_load
+        self.from_cache = False
+        self._loaded = False
+        self._strings: List[str] = []
+        self._offsets: Dict[str, int] = {}
+        self._data = array("I")
+        self._raw: Dict[Tuple[str, str], Segments] = {}
+
+    def __repr__(self):
+        return f"FuriganaIndex(source={self.source}, loaded={self._loaded})"
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "FuriganaIndex":
+        index = cls()
+        index._build(records)
+        return index
+
+    def load(self) -> "FuriganaIndex":
+        """Build or read the index now rather than on the first lookup."""
+        if self._loaded:
+            return self
+        start = time.perf_counter()
+        cache_path = self._cache_path()
+        if cache_path is not None and cache_path.exists():
+            try:
+                self._read_cache(cache_path)
+                self.from_cache = True
+            except (OSError, ValueError) as e:
+                print(f"Ignoring furigana cache {cache_path.name}: {e}")
+        if not self.from_cache:
+            self._build(JSONArrayStream(self.source, None))
+            if cache_path is not None:
+                self._write_cache(cache_path)
+        if self.on_load is not None:
+            self.on_load(self.from_cache, time.perf_counter() - start)
+        return self
+
+    def __len__(self):
+        self.load()
+        return len(self._offsets)
+
+    def __contains__(self, text: str) -> bool:
+        self.load()
+        return text in self._offsets
+
+    def get(
+        self, text: str, wanted: Optional[Container[str]] = None
+    ) -> Optional[Dict[str, Segments]]:
+        """All readings of `text` with their segments, or None if it has none.
+
+        With `wanted`, only the readings in it are decoded and returned: a
+        name can have hundreds of readings, of which an entry needs one or two.
+        """
+        self.load()
+        offset = self._offsets.get(text)
+        if offset is None:
+            return None
+        strings, data = self._strings, self._data
+        readings = {}
+        position = offset + 1
+        for _ in range(data[offset]):
+            reading = strings[data[position]]
+            count = data[position + 1]
+            position += 2
+            if wanted is not None and reading not in wanted:
+                if count != _RAW:
+                    position += 2 * count
+                continue
+            if count == _RAW:
+                readings[reading] = self._raw[(text, reading)]
+                continue
+            segments = []
+            for i in range(position, position + 2 * count, 2):
+                rt = data[i + 1]
+                if rt:
+                    segments.append({"ruby": strings[data[i]], "rt": strings[rt - 1]})
+                else:
+                    segments.append({"ruby": strings[data[i]]})
+            readings[reading] = segments
+            position += 2 * count
+        return readings
+
+    def readings(self, text: str) -> List[str]:
+        return list(self.get(text) or ())
+
+    def segments(self, text: str, reading: str) -> Optional[Segments]:
+        return (self.get(text) or {}).get(reading)
+
+    def _build(self, records: Iterable[Dict]):
+        self._strings, self._offsets, self._raw = [], {}, {}
+        self._data = array("I")
+        string_ids: Dict[str, int] = {}
+
+        def intern(string: str) -> int:
+            string_id = string_ids.get(string)
+            if string_id is None:
+                string_id = string_ids[string] = len(self._strings)
+                self._strings.append(string)
+            return string_id
+
+        # Records of one text aren't always adjacent, so collect the encoded
+        # readings per text first and lay them out once all are known.
+        pending: Dict[str, Dict[int, Tuple[int, ...]]] = {}
+        for record in records:
+            text = record["text"]
+            segments = record["furigana"]
+            if all(list(segment) in (["ruby", "rt"], ["ruby"]) for segment in segments):
+                encoded = [len(segments)]
+                for segment in segments:
+                    encoded.append(intern(segment["ruby"]))
+                    encoded.append(intern(segment["rt"]) + 1 if "rt" in segment else 0)
+            else:
+                encoded = [_RAW]
+            readings = pending.setdefault(text, {})
+            for reading in record["reading"].split(","):
+                readings[intern(reading)] = tuple(encoded)
+                if encoded[0] == _RAW:
+                    self._raw[(text, reading)] = segments
+
+        data = self._data
+        for text, readings in pending.items():
+            self._offsets[text] = len(data)
+            data.append(len(readings))
+            for reading_id, encoded in readings.items():
+                data.append(reading_id)
+                data.extend(encoded)
+        self._loaded = True
+
+    def _cache_path(self) -> Optional[Path]:
+        if self.cache_dir is None or self.source is None:
+            return None
+        digest = file_digest(self.source)[:16]
+        return self.cache_dir / f"{self.source.name.split('.')[0]}-{digest}.furigana"
+
+    def _write_cache(self, path: Path):
+        """Strings and texts as NUL-separated UTF-8, then the offsets and data."""
+        if self._raw:
+            return  # rare enough not to be worth a format of its own
+        strings = "\0".join(self._strings).encode("utf-8")
+        texts = "\0".join(self._offsets).encode("utf-8")
+        offsets = array("I", self._offsets.values())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(
+                struct.pack(
+                    "<IIIIII",
+                    CACHE_VERSION,
+                    len(self._strings),
+                    len(strings),
+                    len(texts),
+                    len(offsets),
+                    len(self._data),
+                )
+            )
+            f.write(strings)
+            f.write(texts)
+            offsets.tofile(f)
+            self._data.tofile(f)
+        tmp_path.replace(path)
+
+    def _read_cache(self, path: Path):
+        with open(path, "rb") as f:
+            if f.read(4) != _MAGIC:
+                raise ValueError(f"{path} is not a furigana cache")
+            version, string_count, strings_size, texts_size, offset_count, data_size = (
+                struct.unpack("<IIIIII", f.read(24))
+            )
+            if version != CACHE_VERSION:
+                raise ValueError(f"{path} has cache version {version}")
+            self._strings = f.read(strings_size).decode("utf-8").split("\0")
+            texts = f.read(texts_size).decode("utf-8").split("\0")
+            offsets = array("I")
+            offsets.fromfile(f, offset_count)
+            self._data = array("I")
+            self._data.fromfile(f, data_size)
+        if not string_count:
+            self._strings = []
+        if not offset_count:
+            texts = []
+        self._offsets = dict(zip(texts, offsets))
+        self._loaded = True
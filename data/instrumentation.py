@@ -0,0 +1,322 @@
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from data import jsonio
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Seconds between two progress lines of the same stage.
+PROGRESS_INTERVAL = 5.0
+# Items between two clock reads in Progress.advance, so the hot loops pay
+# for a counter increment and little else.
+CHECK_EVERY = 256
+
+REPORT_FORMAT = 1
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes, if the OS tells us."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    """High-water mark of the resident set size in bytes.
+
+    On Linux this is VmHWM, which `reset_peak_rss` can reset between stages;
+    elsewhere it is the peak over the whole life of the process.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss() -> bool:
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _mb(size: Optional[int]) -> Optional[float]:
+    return None if size is None else round(size / 1e6, 2)
+
+
+def format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return (
+        f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+    )
+
+
+class Progress:
+    """Counts the items of a stage and prints a progress line now and then."""
+
+    def __init__(
+        self,
+        name: str,
+        total: Optional[int] = None,
+        interval: float = PROGRESS_INTERVAL,
+        label: str = "",
+    ):
+        self.name = name
+        self.total = total
+        self.interval = interval
+        self.label = label
+        self.count = 0
+        self.start_time = time.perf_counter()
+        self._last_report = self.start_time
+        self._next_check = CHECK_EVERY
+
+    def advance(self, n: int = 1):
+        self.count += n
+        if self.count >= self._next_check:
+            self._next_check = self.count + CHECK_EVERY
+            now = time.perf_counter()
+            if now - self._last_report >= self.interval:
+                self._last_report = now
+                print(self.line(now))
+
+    def track(self, items: Iterable) -> Iterator:
+        """Yield from `items`, advancing once per item."""
+        for item in items:
+            yield item
+            self.advance()
+
+    def line(self, now: float) -> str:
+        elapsed = now - self.start_time
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        line = f"{self.label}{self.name}: {self.count}"
+        if self.total:
+            line += f"/{self.total} ({self.count / self.total:.0%})"
+        line += f" at {rate:,.0f}/s"
+        if self.total and rate and self.count < self.total:
+            line += f", ETA {format_seconds((self.total - self.count) / rate)}"
+        return line
+
+
+class StageRecord:
+    def __init__(self, name: str):
+        self.name = name
+        self.entries = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rss: Optional[int] = None
+        self.peak_rss: Optional[int] = None
+        self.traced_peak: Optional[int] = None
+        self.top_allocations: List[Dict[str, Any]] = []
+
+    @property
+    def entries_per_second(self) -> float:
+        return self.entries / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def summary(self) -> str:
+        summary = (
+            f"{self.entries} entries in {self.wall_seconds:.2f} s "
+            f"({self.entries_per_second:,.0f}/s, {self.cpu_seconds:.2f} s CPU)"
+        )
+        if self.peak_rss is not None:
+            summary += f", peak RSS {self.peak_rss / 1e6:.0f} MB"
+        if self.traced_peak is not None:
+            summary += f", peak traced {self.traced_peak / 1e6:.0f} MB"
+        return summary
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "entries": self.entries,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "entries_per_second": round(self.entries_per_second, 1),
+            "rss_mb": _mb(self.rss),
+            "peak_rss_mb": _mb(self.peak_rss),
+            "traced_peak_mb": _mb(self.traced_peak),
+            "top_allocations": self.top_allocations,
+        }
+
+
+class Instrumentation:
+    """Named build stages with their time, memory and throughput.
+
+    With `trace_memory`, tracemalloc runs for the whole build and every stage
+    records the source lines that allocated the most memory during it. This
+    slows the build down a few times over, so it is opt-in.
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        top_allocations: int = 10,
+        progress_interval: float = PROGRESS_INTERVAL,
+        previous_report: Optional[Dict[str, Any]] = None,
+        shard: Optional[int] = None,
+    ):
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        self.progress_interval = progress_interval
+        self.previous_report = previous_report or {}
+        # Entry counts from the last run, for the ETA of streamed stages
+        self.expected = expected_counts(self.previous_report, shard)
+        self.label = "" if shard is None else f"[shard {shard}] "
+        self.stages: List[StageRecord] = []
+        # Named statistics that aren't tied to a stage, like cache hit rates
+        self.counters: Dict[str, Dict[str, Any]] = {}
+        self.start_time = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self._allocation_totals: Dict[Any, Any] = {}
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._top_allocations()
+
+    def for_shard(self, shard: int) -> "Instrumentation":
+        """A fresh Instrumentation with the same settings for one shard worker."""
+        return Instrumentation(
+            self.trace_memory,
+            self.top_allocations,
+            self.progress_interval,
+            self.previous_report,
+            shard,
+        )
+
+    @contextmanager
+    def stage(self, name: str, total: Optional[int] = None) -> Iterator[Progress]:
+        if total is None:
+            total = self.expected.get(name)
+        record = StageRecord(name)
+        reset_peak_rss()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        progress = Progress(name, total, self.progress_interval, self.label)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield progress
+        finally:
+            record.wall_seconds = time.perf_counter() - start_wall
+            record.cpu_seconds = time.process_time() - start_cpu
+            record.entries = progress.count
+            record.rss = current_rss()
+            record.peak_rss = peak_rss()
+            if self.trace_memory:
+                record.traced_peak = tracemalloc.get_traced_memory()[1]
+                record.top_allocations = self._top_allocations()
+            self.stages.append(record)
+            print(f"{self.label}{name}: {record.summary()}")
+
+    def _top_allocations(self) -> List[Dict[str, Any]]:
+        """The lines whose live allocations grew the most since the last stage.
+
+        Only per-line totals are kept between stages; holding on to a whole
+        snapshot would double the cost of tracing a large heap.
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ]
+        )
+        totals = {
+            (stat.traceback[0].filename, stat.traceback[0].lineno): (
+                stat.size,
+                stat.count,
+            )
+            for stat in snapshot.statistics("lineno")
+        }
+        del snapshot
+        previous = self._allocation_totals
+        self._allocation_totals = totals
+        growth = sorted(
+            (
+                (
+                    size - previous.get(line, (0, 0))[0],
+                    count - previous.get(line, (0, 0))[1],
+                    line,
+                )
+                for line, (size, count) in totals.items()
+            ),
+            reverse=True,
+        )
+        return [
+            {"location": f"{filename}:{lineno}", "size_mb": _mb(size), "count": count}
+            for size, count, (filename, lineno) in growth[: self.top_allocations]
+            if size > 0
+        ]
+
+    def to_dict(self):
+        return {
+            "wall_seconds": round(time.perf_counter() - self.start_time, 3),
+            "cpu_seconds": round(time.process_time() - self.start_cpu, 3),
+            "peak_rss_mb": _mb(
+                max(
+                    (s.peak_rss for s in self.stages if s.peak_rss is not None),
+                    default=None,
+                )
+            ),
+            "stages": [stage.to_dict() for stage in self.stages],
+            "counters": self.counters,
+        }
+
+
+def report_path_for(output_dir: Path) -> Path:
+    return output_dir.parent / f".{output_dir.name}.report.json"
+
+
+def load_report(path: Path) -> Dict[str, Any]:
+    """Load a previous build report, or an empty one if it is missing."""
+    try:
+        with open(path, "rb") as f:
+            report = jsonio.load(f)
+    except (OSError, ValueError):
+        return {}
+    return report if report.get("format") == REPORT_FORMAT else {}
+
+
+def expected_counts(
+    report: Dict[str, Any], shard: Optional[int] = None
+) -> Dict[str, int]:
+    """Entry counts per stage of a previous report (of one shard, if given)."""
+    if shard is None:
+        stages = report.get("stages", [])
+    else:
+        shards = report.get("shards", [])
+        stages = shards[shard]["stages"] if shard < len(shards) else []
+    return {stage["name"]: stage["entries"] for stage in stages if stage["entries"]}
+
+
+def write_report(path: Path, report: Dict[str, Any]):
+    report = {
+        "format": REPORT_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        **report,
+    }
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        jsonio.dump(report, f, indent=True, default=str)
+    os.replace(tmp_path, path)
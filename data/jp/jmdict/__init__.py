@@ -5,5 +5,6 @@ from .type import (
     ReadingElement,
     Sense,
     Gloss,
+    iter_jmdict,
     load_jmdict,
 )
@@ -1,124 +1,99 @@
-import json
 import os
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator
 
+from data import jsonio
+from data.loaders import JSONArrayStream, find_dataset
+from data.views import Field, View
 
-class KanjiElement:
-    def __init__(self, data: Dict[str, Any]):
-        self.common: Optional[bool] = (
-            data.get("common") if data.get("common") is not None else None
-        )
-        self.text: Optional[str] = data.get("text") if data.get("text") else None
-        self.tags: Optional[List[str]] = data.get("tags") if data.get("tags") else None
+
+class KanjiElement(View):
+    __slots__ = ("_common", "_text", "_tags")
+
+    common: Optional[bool] = Field("common")
+    text: Optional[str] = Field("text", empty_is_none=True)
+    tags: Optional[List[str]] = Field("tags", empty_is_none=True)
 
     def __repr__(self):
         return f"KanjiElement(text={self.text}, common={self.common}, tags={self.tags})"
 
-    def to_dict(self):
-        return {k: v for k, v in self.__dict__.items() if v is not None}
 
+class ReadingElement(View):
+    __slots__ = ("_common", "_text", "_tags", "_applies_to_kanji")
 
-class ReadingElement:
-    def __init__(self, data: Dict[str, Any]):
-        self.common: Optional[bool] = (
-            data.get("common") if data.get("common") is not None else None
-        )
-        self.text: Optional[str] = data.get("text") if data.get("text") else None
-        self.tags: Optional[List[str]] = data.get("tags") if data.get("tags") else None
-        self.applies_to_kanji: Optional[List[str]] = (
-            data.get("appliesToKanji") if data.get("appliesToKanji") else None
-        )
+    common: Optional[bool] = Field("common")
+    text: Optional[str] = Field("text", empty_is_none=True)
+    tags: Optional[List[str]] = Field("tags", empty_is_none=True)
+    applies_to_kanji: Optional[List[str]] = Field("appliesToKanji", empty_is_none=True)
 
     def __repr__(self):
         return f"ReadingElement(text={self.text}, common={self.common}, tags={self.tags}, applies_to_kanji={self.applies_to_kanji})"
 
-    def to_dict(self):
-        return {k: v for k, v in self.__dict__.items() if v is not None}
 
+class Gloss(View):
+    __slots__ = ("_lang", "_gender", "_type", "_text")
 
-class Gloss:
-    def __init__(self, data: Dict[str, Any]):
-        self.lang: Optional[str] = data.get("lang") if data.get("lang") else None
-        self.gender: Optional[str] = data.get("gender") if data.get("gender") else None
-        self.type: Optional[str] = data.get("type") if data.get("type") else None
-        self.text: Optional[str] = data.get("text") if data.get("text") else None
+    lang: Optional[str] = Field("lang", empty_is_none=True)
+    gender: Optional[str] = Field("gender", empty_is_none=True)
+    type: Optional[str] = Field("type", empty_is_none=True)
+    text: Optional[str] = Field("text", empty_is_none=True)
 
     def __repr__(self):
         return f"Gloss(text={self.text}, lang={self.lang}, gender={self.gender}, type={self.type})"
 
-    def to_dict(self):
-        return {k: v for k, v in self.__dict__.items() if v is not None}
-
 
-class Sense:
-    def __init__(self, data: Dict[str, Any]):
-        self.part_of_speech: Optional[List[str]] = (
-            data.get("partOfSpeech") if data.get("partOfSpeech") else None
-        )
-        self.applies_to_kanji: Optional[List[str]] = (
-            data.get("appliesToKanji") if data.get("appliesToKanji") else None
-        )
-        self.applies_to_kana: Optional[List[str]] = (
-            data.get("appliesToKana") if data.get("appliesToKana") else None
-        )
-        self.related: Optional[List[str]] = (
-            data.get("related") if data.get("related") else None
-        )
-        self.antonym: Optional[List[str]] = (
-            data.get("antonym") if data.get("antonym") else None
-        )
-        self.field: Optional[List[str]] = (
-            data.get("field") if data.get("field") else None
-        )
-        self.dialect: Optional[List[str]] = (
-            data.get("dialect") if data.get("dialect") else None
-        )
-        self.misc: Optional[List[str]] = data.get("misc") if data.get("misc") else None
-        self.info: Optional[List[str]] = data.get("info") if data.get("info") else None
-        self.language_source: Optional[List[Dict[str, Any]]] = (
-            data.get("languageSource") if data.get("languageSource") else None
-        )
-        self.gloss: Optional[List[Gloss]] = (
-            [Gloss(g) for g in data.get("gloss")] if data.get("gloss") else None
-        )
+class Sense(View):
+    __slots__ = (
+        "_part_of_speech",
+        "_applies_to_kanji",
+        "_applies_to_kana",
+        "_related",
+        "_antonym",
+        "_field",
+        "_dialect",
+        "_misc",
+        "_info",
+        "_language_source",
+        "_gloss",
+    )
+
+    part_of_speech: Optional[List[str]] = Field("partOfSpeech", empty_is_none=True)
+    applies_to_kanji: Optional[List[str]] = Field("appliesToKanji", empty_is_none=True)
+    applies_to_kana: Optional[List[str]] = Field("appliesToKana", empty_is_none=True)
+    related: Optional[List[str]] = Field("related", empty_is_none=True)
+    antonym: Optional[List[str]] = Field("antonym", empty_is_none=True)
+    field: Optional[List[str]] = Field("field", empty_is_none=True)
+    dialect: Optional[List[str]] = Field("dialect", empty_is_none=True)
+    misc: Optional[List[str]] = Field("misc", empty_is_none=True)
+    info: Optional[List[str]] = Field("info", empty_is_none=True)
+    language_source: Optional[List[Dict[str, Any]]] = Field(
+        "languageSource", empty_is_none=True
+    )
+    gloss: Optional[List[Gloss]] = Field(
+        "gloss", Gloss, many=True, empty_is_none=True
+    )
 
     def __repr__(self):
         return f"Sense(part_of_speech={self.part_of_speech}, gloss={self.gloss})"
 
-    def to_dict(self):
-        d = {k: v for k, v in self.__dict__.items() if v is not None}
-        if self.gloss:
-            d["gloss"] = [g.to_dict() for g in self.gloss]
-        return d
 
+class JMdictEntry(View):
+    """One JMdict word. Its kanji, kana and senses are decoded when first read."""
 
-class JMdictEntry:
-    def __init__(self, data: Dict[str, Any]):
-        self.id: str = data["id"]
-        self.kanji: Optional[List[KanjiElement]] = (
-            [KanjiElement(k) for k in data.get("kanji")] if data.get("kanji") else None
-        )
-        self.kana: Optional[List[ReadingElement]] = (
-            [ReadingElement(k) for k in data.get("kana")] if data.get("kana") else None
-        )
-        self.sense: Optional[List[Sense]] = (
-            [Sense(s) for s in data.get("sense")] if data.get("sense") else None
-        )
+    __slots__ = ("_id", "_kanji", "_kana", "_sense")
+
+    id: str = Field("id", required=True)
+    kanji: Optional[List[KanjiElement]] = Field(
+        "kanji", KanjiElement, many=True, empty_is_none=True
+    )
+    kana: Optional[List[ReadingElement]] = Field(
+        "kana", ReadingElement, many=True, empty_is_none=True
+    )
+    sense: Optional[List[Sense]] = Field("sense", Sense, many=True, empty_is_none=True)
 
     def __repr__(self):
         return f"JMdictEntry(id={self.id}, kanji={self.kanji}, kana={self.kana}, sense={self.sense})"
 
-    def to_dict(self):
-        d = {"id": self.id}
-        if self.kanji:
-            d["kanji"] = [k.to_dict() for k in self.kanji]
-        if self.kana:
-            d["kana"] = [k.to_dict() for k in self.kana]
-        if self.sense:
-            d["sense"] = [s.to_dict() for s in self.sense]
-        return d
-
     def get_all_kana(self) -> List[str]:
         """Return a list of all kana readings."""
         return [k.text for k in self.kana] if self.kana else []
@@ -140,18 +115,25 @@ class JMdict:
         return f"JMdict(words_count={len(self.words)})"
 
 
+def _find_jmdict_file() -> Path:
+    return find_dataset("jmdict-*.json", Path(__file__).parent)
+
+
+def iter_jmdict() -> Iterator[JMdictEntry]:
+    """Yield JMdict entries one at a time without parsing the whole file up front."""
+    for entry in JSONArrayStream(_find_jmdict_file(), "words"):
+        yield JMdictEntry(entry)
+
+
 def load_jmdict() -> JMdict:
-    current_dir = Path(__file__).parent
-    json_files = list(current_dir.glob("jmdict-*.json"))
-    if not json_files:
-        raise FileNotFoundError(f"No jmdict-*.json file found in {current_dir}")
-    json_file = json_files[0]  # Use the first matching file
-    with open(json_file, "r", encoding="utf-8") as f:
-        return JMdict(json.load(f))
+    # Every word is kept, so leave the empty arrays out of the records: the
+    # views read a missing list the same as an empty one.
+    stream = JSONArrayStream(_find_jmdict_file(), "words", drop_empty_lists=True)
+    return JMdict({"words": stream})
 
 
 def write_entry_to_json(entry: JMdictEntry, output_dir: str):
     os.makedirs(output_dir, exist_ok=True)
     file_path = os.path.join(output_dir, f"{entry.id}.json")
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(entry.to_dict(), f, ensure_ascii=False, indent=2)
+    with open(file_path, "wb") as f:
+        jsonio.dump(entry.to_dict(), f, indent=True)
@@ -1 +1,7 @@
-from .type import JMnedict, JMnedictWord, load_jmnedict, write_entry_to_json
+from .type import (
+    JMnedict,
+    JMnedictWord,
+    iter_jmnedict,
+    load_jmnedict,
+    write_entry_to_json,
+)
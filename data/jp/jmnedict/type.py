@@ -1,45 +1,42 @@
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Union
-import json
+from typing import List, Optional, Dict, Any, Union, Iterator
 
+from data import jsonio
+from data.loaders import JSONArrayStream, find_dataset
+from data.views import Field, View
 
-class JMnedictKanji:
-    def __init__(self, data: Dict[str, Any]):
-        self.text: str = data["text"]
-        self.tags: List[str] = data.get("tags", [])
 
-    def to_dict(self):
-        return json.loads(json.dumps(self.__dict__))
+class JMnedictKanji(View):
+    __slots__ = ("_text", "_tags")
 
+    text: str = Field("text", required=True)
+    tags: List[str] = Field("tags", default=list)
 
-class JMnedictKana:
-    def __init__(self, data: Dict[str, Any]):
-        self.text: str = data["text"]
-        self.tags: List[str] = data.get("tags", [])
-        self.applies_to_kanji: List[str] = data.get("appliesToKanji", [])
 
-    def to_dict(self):
-        return json.loads(json.dumps(self.__dict__))
+class JMnedictKana(View):
+    __slots__ = ("_text", "_tags", "_applies_to_kanji")
 
+    text: str = Field("text", required=True)
+    tags: List[str] = Field("tags", default=list)
+    applies_to_kanji: List[str] = Field("appliesToKanji", default=list)
 
-class JMnedictTranslationTranslation:
-    def __init__(self, data: Dict[str, Any]):
-        self.lang: str = data["lang"]
-        self.text: str = data["text"]
 
-    def to_dict(self):
-        return json.loads(json.dumps(self.__dict__))
+class JMnedictTranslationTranslation(View):
+    __slots__ = ("_lang", "_text")
 
+    lang: str = Field("lang", required=True)
+    text: str = Field("text", required=True)
 
-class JMnedictTranslation:
-    def __init__(self, data: Dict[str, Any]):
-        self.type: List[str] = data.get("type", [])
-        self.related: List[Union[List[str], List[str, str], List[str, str, int]]] = (
-            data.get("related", [])
-        )
-        self.translation: List[JMnedictTranslationTranslation] = [
-            JMnedictTranslationTranslation(t) for t in data.get("translation", [])
-        ]
+
+class JMnedictTranslation(View):
+    __slots__ = ("_type", "_related", "_translation")
+
+    type: List[str] = Field("type", default=list)
+    # [text], [text, reading] or [text, reading, sense number]
+    related: List[List[Union[str, int]]] = Field("related", default=list)
+    translation: List[JMnedictTranslationTranslation] = Field(
+        "translation", JMnedictTranslationTranslation, many=True, default=list
+    )
 
     def to_dict(self):
         return {
@@ -49,16 +46,17 @@ class JMnedictTranslation:
         }
 
 
-class JMnedictWord:
-    def __init__(self, data: Dict[str, Any]):
-        self.id: str = data["id"]
-        self.kanji: List[JMnedictKanji] = [
-            JMnedictKanji(k) for k in data.get("kanji", [])
-        ]
-        self.kana: List[JMnedictKana] = [JMnedictKana(k) for k in data.get("kana", [])]
-        self.translation: List[JMnedictTranslation] = [
-            JMnedictTranslation(t) for t in data.get("translation", [])
-        ]
+class JMnedictWord(View):
+    """One JMnedict word. Its kanji, kana and translations are decoded when first read."""
+
+    __slots__ = ("_id", "_kanji", "_kana", "_translation")
+
+    id: str = Field("id", required=True)
+    kanji: List[JMnedictKanji] = Field("kanji", JMnedictKanji, many=True, default=list)
+    kana: List[JMnedictKana] = Field("kana", JMnedictKana, many=True, default=list)
+    translation: List[JMnedictTranslation] = Field(
+        "translation", JMnedictTranslation, many=True, default=list
+    )
 
     def __repr__(self):
         return f"JMnedictWord(id={self.id}, kanji={[k.text for k in self.kanji]}, kana={[k.text for k in self.kana]})"
@@ -82,6 +80,16 @@ class JMnedict:
         self.tags: Dict[str, str] = data["tags"]
         self.words: List[JMnedictWord] = [JMnedictWord(w) for w in data["words"]]
 
+    @classmethod
+    def from_stream(cls, stream: JSONArrayStream) -> "JMnedict":
+        # Build the word objects while streaming so the raw "words" array is
+        # never held in memory next to them; the header is complete once the
+        # stream has been consumed.
+        words = [JMnedictWord(w) for w in stream]
+        jmnedict = cls({**stream.header, "words": []})
+        jmnedict.words = words
+        return jmnedict
+
     def __repr__(self):
         return f"JMnedict(words_count={len(self.words)})"
 
@@ -97,14 +105,21 @@ class JMnedict:
         }
 
 
+def _find_jmnedict_file() -> Path:
+    return find_dataset("jmnedict-*.json", Path(__file__).parent)
+
+
+def iter_jmnedict() -> Iterator[JMnedictWord]:
+    """Yield JMnedict words one at a time without parsing the whole file up front."""
+    for word in JSONArrayStream(_find_jmnedict_file(), "words"):
+        yield JMnedictWord(word)
+
+
 def load_jmnedict() -> JMnedict:
-    current_dir = Path(__file__).parent
-    json_files = list(current_dir.glob("jmnedict-*.json"))
-    if not json_files:
-        raise FileNotFoundError(f"No jmnedict-*.json file found in {current_dir}")
-    json_file = json_files[0]  # Use the first matching file
-    with open(json_file, "r", encoding="utf-8") as f:
-        return JMnedict(json.load(f))
+    # Every word is kept, so leave the empty arrays out of the records: the
+    # views read a missing list the same as an empty one.
+    stream = JSONArrayStream(_find_jmnedict_file(), "words", drop_empty_lists=True)
+    return JMnedict.from_stream(stream)
 
 
 def write_entry_to_json(entry: JMnedictWord, output_dir: str):
@@ -112,5 +127,5 @@ def write_entry_to_json(entry: JMnedictWord, output_dir: str):
 
     os.makedirs(output_dir, exist_ok=True)
     file_path = os.path.join(output_dir, f"{entry.id}.json")
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(entry.to_dict(), f, ensure_ascii=False, indent=2)
+    with open(file_path, "wb") as f:
+        jsonio.dump(entry.to_dict(), f, indent=True)
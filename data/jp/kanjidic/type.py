@@ -1,114 +1,110 @@
 # File: data/jp/kanjidic/types.py
 
-import json
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from data import jsonio
+from data.loaders import find_dataset, open_dataset
+from data.views import Field, View
 
-class Kanjidic2Codepoint:
-    def __init__(self, data: Dict[str, Any]):
-        self.type: str = data["type"]
-        self.value: str = data["value"]
 
-    def to_dict(self):
-        return json.loads(json.dumps(self.__dict__))
+class Kanjidic2Codepoint(View):
+    __slots__ = ("_type", "_value")
 
+    type: str = Field("type", required=True)
+    value: str = Field("value", required=True)
 
-class Kanjidic2Radical:
-    def __init__(self, data: Dict[str, Any]):
-        self.type: str = data["type"]
-        self.value: int = data["value"]
 
-    def to_dict(self):
-        return json.loads(json.dumps(self.__dict__))
+class Kanjidic2Radical(View):
+    __slots__ = ("_type", "_value")
 
+    type: str = Field("type", required=True)
+    value: int = Field("value", required=True)
 
-class Kanjidic2Variant:
-    def __init__(self, data: Dict[str, Any]):
-        self.type: str = data["type"]
-        self.value: str = data["value"]
 
-    def to_dict(self):
-        return json.loads(json.dumps(self.__dict__))
+class Kanjidic2Variant(View):
+    __slots__ = ("_type", "_value")
 
+    type: str = Field("type", required=True)
+    value: str = Field("value", required=True)
 
-class Kanjidic2Misc:
-    def __init__(self, data: Dict[str, Any]):
-        self.grade: Optional[int] = data.get("grade")
-        self.stroke_counts: List[int] = data["strokeCounts"]
-        self.variants: List[Kanjidic2Variant] = [
-            Kanjidic2Variant(v) for v in data.get("variants", [])
-        ]
-        self.frequency: Optional[int] = data.get("frequency")
-        self.radical_names: List[str] = data.get("radicalNames", [])
-        self.jlpt_level: Optional[int] = data.get("jlptLevel")
 
-    def to_dict(self):
-        d = {k: v for k, v in self.__dict__.items() if v is not None}
-        d["variants"] = [v.to_dict() for v in self.variants]
-        return json.loads(json.dumps(d))
+class Kanjidic2Misc(View):
+    __slots__ = (
+        "_grade",
+        "_stroke_counts",
+        "_variants",
+        "_frequency",
+        "_radical_names",
+        "_jlpt_level",
+    )
 
+    grade: Optional[int] = Field("grade")
+    stroke_counts: List[int] = Field("strokeCounts", required=True)
+    variants: List[Kanjidic2Variant] = Field(
+        "variants", Kanjidic2Variant, many=True, default=list
+    )
+    frequency: Optional[int] = Field("frequency")
+    radical_names: List[str] = Field("radicalNames", default=list)
+    jlpt_level: Optional[int] = Field("jlptLevel")
 
-class Kanjidic2DictionaryReference:
-    def __init__(self, data: Dict[str, Any]):
-        self.type: str = data["type"]
-        self.morohashi: Optional[Dict[str, int]] = data.get("morohashi")
-        self.value: str = data["value"]
 
-    def to_dict(self):
-        return json.loads(
-            json.dumps({k: v for k, v in self.__dict__.items() if v is not None})
-        )
+class Kanjidic2DictionaryReference(View):
+    __slots__ = ("_type", "_morohashi", "_value")
 
+    type: str = Field("type", required=True)
+    morohashi: Optional[Dict[str, int]] = Field("morohashi")
+    value: str = Field("value", required=True)
 
-class Kanjidic2QueryCode:
-    def __init__(self, data: Dict[str, Any]):
-        self.type: str = data["type"]
-        self.skip_misclassification: Optional[str] = data.get("skipMisclassification")
-        self.value: str = data["value"]
 
-    def to_dict(self):
-        return json.loads(
-            json.dumps({k: v for k, v in self.__dict__.items() if v is not None})
-        )
+class Kanjidic2QueryCode(View):
+    __slots__ = ("_type", "_skip_misclassification", "_value")
 
+    type: str = Field("type", required=True)
+    skip_misclassification: Optional[str] = Field("skipMisclassification")
+    value: str = Field("value", required=True)
 
-class Kanjidic2Reading:
-    def __init__(self, data: Dict[str, Any]):
-        self.type: str = data["type"]
-        self.on_type: Optional[str] = data.get("onType")
-        self.status: Optional[str] = data.get("status")
-        self.value: str = data["value"]
 
-    def to_dict(self):
-        return json.loads(
-            json.dumps({k: v for k, v in self.__dict__.items() if v is not None})
-        )
+class Kanjidic2Reading(View):
+    __slots__ = ("_type", "_on_type", "_status", "_value")
 
+    type: str = Field("type", required=True)
+    on_type: Optional[str] = Field("onType")
+    status: Optional[str] = Field("status")
+    value: str = Field("value", required=True)
 
-class Kanjidic2Meaning:
-    def __init__(self, data: Dict[str, Any]):
-        self.lang: str = data["lang"]
-        self.value: str = data["value"]
 
-    def to_dict(self):
-        return json.loads(json.dumps(self.__dict__))
+class Kanjidic2Meaning(View):
+    __slots__ = ("_lang", "_value")
 
+    lang: str = Field("lang", required=True)
+    value: str = Field("value", required=True)
 
-class Kanjidic2ReadingMeaning:
-    def __init__(self, data: Dict[str, Any]):
-        group = data["groups"][0]  # We're assuming there's always exactly one group
-        self.readings: List[Kanjidic2Reading] = [
-            Kanjidic2Reading(r) for r in group["readings"]
-        ]
-        self.meanings: List[Kanjidic2Meaning] = [
-            Kanjidic2Meaning(m) for m in group["meanings"]
-        ]
-        self.nanori: List[str] = data.get("nanori", [])
-
-        # Add separate lists for onyomi and kunyomi
-        self.onyomi: List[str] = [r.value for r in self.readings if r.type == "ja_on"]
-        self.kunyomi: List[str] = [r.value for r in self.readings if r.type == "ja_kun"]
+
+def _first_group(field: str, view):
+    # We're assuming there's always exactly one group
+    return lambda groups: [view(item) for item in groups[0][field]]
+
+
+class Kanjidic2ReadingMeaning(View):
+    __slots__ = ("_readings", "_meanings", "_nanori")
+
+    readings: List[Kanjidic2Reading] = Field(
+        "groups", _first_group("readings", Kanjidic2Reading), required=True
+    )
+    meanings: List[Kanjidic2Meaning] = Field(
+        "groups", _first_group("meanings", Kanjidic2Meaning), required=True
+    )
+    nanori: List[str] = Field("nanori", default=list)
+
+    # Separate lists for onyomi and kunyomi
+    @property
+    def onyomi(self) -> List[str]:
+        return [r.value for r in self.readings if r.type == "ja_on"]
+
+    @property
+    def kunyomi(self) -> List[str]:
+        return [r.value for r in self.readings if r.type == "ja_kun"]
 
     def to_dict(self):
         return {
@@ -120,27 +116,36 @@ class Kanjidic2ReadingMeaning:
         }
 
 
-class Kanjidic2Character:
-    def __init__(self, data: Dict[str, Any]):
-        self.literal: str = data["literal"]
-        self.codepoints: List[Kanjidic2Codepoint] = [
-            Kanjidic2Codepoint(c) for c in data["codepoints"]
-        ]
-        self.radicals: List[Kanjidic2Radical] = [
-            Kanjidic2Radical(r) for r in data["radicals"]
-        ]
-        self.misc: Kanjidic2Misc = Kanjidic2Misc(data["misc"])
-        self.dictionary_references: List[Kanjidic2DictionaryReference] = [
-            Kanjidic2DictionaryReference(d) for d in data["dictionaryReferences"]
-        ]
-        self.query_codes: List[Kanjidic2QueryCode] = [
-            Kanjidic2QueryCode(q) for q in data["queryCodes"]
-        ]
-        self.reading_meaning: Optional[Kanjidic2ReadingMeaning] = (
-            Kanjidic2ReadingMeaning(data["readingMeaning"])
-            if data.get("readingMeaning")
-            else None
-        )
+class Kanjidic2Character(View):
+    """One Kanjidic2 character. Its nested records are decoded when first read."""
+
+    __slots__ = (
+        "_literal",
+        "_codepoints",
+        "_radicals",
+        "_misc",
+        "_dictionary_references",
+        "_query_codes",
+        "_reading_meaning",
+    )
+
+    literal: str = Field("literal", required=True)
+    codepoints: List[Kanjidic2Codepoint] = Field(
+        "codepoints", Kanjidic2Codepoint, many=True, required=True
+    )
+    radicals: List[Kanjidic2Radical] = Field(
+        "radicals", Kanjidic2Radical, many=True, required=True
+    )
+    misc: Kanjidic2Misc = Field("misc", Kanjidic2Misc, required=True)
+    dictionary_references: List[Kanjidic2DictionaryReference] = Field(
+        "dictionaryReferences", Kanjidic2DictionaryReference, many=True, required=True
+    )
+    query_codes: List[Kanjidic2QueryCode] = Field(
+        "queryCodes", Kanjidic2QueryCode, many=True, required=True
+    )
+    reading_meaning: Optional[Kanjidic2ReadingMeaning] = Field(
+        "readingMeaning", Kanjidic2ReadingMeaning, empty_is_none=True
+    )
 
     def __repr__(self):
         return f"Kanjidic2Character(literal={self.literal})"
@@ -156,7 +161,7 @@ class Kanjidic2Character:
         }
         if self.reading_meaning:
             d["reading_meaning"] = self.reading_meaning.to_dict()
-        return json.loads(json.dumps(d))
+        return d
 
 
 class Kanjidic2:
@@ -182,10 +187,7 @@ class Kanjidic2:
 
 
 def load_kanjidic() -> Kanjidic2:
-    current_dir = Path(__file__).parent
-    json_files = list(current_dir.glob("kanjidic2-*.json"))
-    if not json_files:
-        raise FileNotFoundError(f"No kanjidic2-*.json file found in {current_dir}")
-    json_file = json_files[0]  # Use the first matching file
-    with open(json_file, "r", encoding="utf-8") as f:
-        return Kanjidic2(json.load(f))
+    # Also picks up the .xz archive kept next to this file
+    json_file = find_dataset("kanjidic2-*.json", Path(__file__).parent)
+    with open_dataset(json_file) as f:
+        return Kanjidic2(jsonio.load(f))
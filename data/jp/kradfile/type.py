@@ -1,6 +1,8 @@
 from pathlib import Path
 from typing import List, Dict, Any
-import json
+
+from data import jsonio
+from data.loaders import find_dataset, open_dataset
 
 
 class Kradfile:
@@ -16,15 +18,12 @@ class Kradfile:
 
 
 def load_kradfile() -> Kradfile:
-    current_dir = Path(__file__).parent
-    json_files = list(current_dir.glob("kradfile-*.json"))
-    if not json_files:
-        raise FileNotFoundError(f"No kradfile-*.json file found in {current_dir}")
-    json_file = json_files[0]  # Use the first matching file
-    with open(json_file, "r", encoding="utf-8") as f:
-        return Kradfile(json.load(f))
+    # Also picks up the .xz archive kept next to this file
+    json_file = find_dataset("kradfile-*.json", Path(__file__).parent)
+    with open_dataset(json_file) as f:
+        return Kradfile(jsonio.load(f))
 
 
 def write_kradfile_to_json(kradfile: Kradfile, output_file: str):
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(kradfile.to_dict(), f, ensure_ascii=False, indent=2)
+    with open(output_file, "wb") as f:
+        jsonio.dump(kradfile.to_dict(), f, indent=True)
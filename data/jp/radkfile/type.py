@@ -1,6 +1,8 @@
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-import json
+
+from data import jsonio
+from data.loaders import find_dataset, open_dataset
 
 
 class RadkfileRadicalInfo:
@@ -38,15 +40,12 @@ class Radkfile:
 
 
 def load_radkfile() -> Radkfile:
-    current_dir = Path(__file__).parent
-    json_files = list(current_dir.glob("radkfile-*.json"))
-    if not json_files:
-        raise FileNotFoundError(f"No radkfile-*.json file found in {current_dir}")
-    json_file = json_files[0]  # Use the first matching file
-    with open(json_file, "r", encoding="utf-8") as f:
-        return Radkfile(json.load(f))
+    # Also picks up the .xz archive kept next to this file
+    json_file = find_dataset("radkfile-*.json", Path(__file__).parent)
+    with open_dataset(json_file) as f:
+        return Radkfile(jsonio.load(f))
 
 
 def write_radkfile_to_json(radkfile: Radkfile, output_file: str):
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(radkfile.to_dict(), f, ensure_ascii=False, indent=2)
+    with open(output_file, "wb") as f:
+        jsonio.dump(radkfile.to_dict(), f, indent=True)
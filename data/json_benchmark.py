@@ -0,0 +1,193 @@
+"""Measure JSON parse and serialize throughput per dataset and backend.
+
+Every dataset is read into memory once, then for each installed backend of
+data.jsonio it is timed being parsed the way the build loads it (the whole
+document, or line by line for .jsonl), serialized back as one document, and
+serialized entry by entry like the writer does for every output key. Two
+more rows are added where they apply: the standard library JSONArrayStream
+the build streams JMdict, JMnedict and the furigana with, and msgspec
+decoding straight into structs generated from the View classes in the
+type.py files (see `struct_type`), which skips the members those classes
+never read.
+
+    python -m data.json_benchmark --scale 0.1 --only jmdict,char_dict
+"""
+
+import argparse
+import functools
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from data import jsonio
+from data.benchmark import synthetic_datasets
+from data.jp.jmdict.type import JMdictEntry
+from data.jp.jmnedict.type import JMnedictWord
+from data.jp.kanjidic.type import Kanjidic2Character
+from data.loaders import JSONArrayStream, find_dataset, open_dataset
+from data.main import DATASET_PATTERNS, DATASETS_DIR
+from data.views import View
+from data.zh.char_dict.type import ChineseCharEntry
+from data.zh.word_dict.type import ChineseWordEntry
+
+# The member holding the entries of each JSON document (None for a bare
+# array) and the View class that reads one entry, if there is one.
+ENTRIES: Dict[str, Tuple[Optional[str], Optional[Type[View]]]] = {
+    "jmdict": ("words", JMdictEntry),
+    "jmnedict": ("words", JMnedictWord),
+    "kanjidic": ("characters", Kanjidic2Character),
+    "char_dict": (None, ChineseCharEntry),
+    "word_dict": (None, ChineseWordEntry),
+    "jmdict_furigana": (None, None),
+    "jmnedict_furigana": (None, None),
+}
+
+
+def best_time(repeat: int, fn: Callable[[], Any]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@functools.lru_cache(maxsize=None)
+def struct_type(view: Type[View]):
+    """A msgspec Struct type for the record members `view` reads.
+
+    Fields that decode into another View become nested structs; everything
+    else is left to msgspec as Any. Members no Field reads are skipped by
+    the decoder instead of becoming dicts.
+    """
+    import msgspec
+
+    fields, rename = [], {}
+    for name in view._fields:
+        field = getattr(view, name)
+        if field.key in rename.values():
+            continue
+        kind: Any = Any
+        if isinstance(field.view, type) and issubclass(field.view, View):
+            kind = struct_type(field.view)
+            if field.many:
+                kind = List[kind]
+        fields.append((name, Optional[kind], None))
+        rename[name] = field.key
+    return msgspec.defstruct(view.__name__, fields, rename=rename)
+
+
+def typed_parser(name: str, lines: Optional[List[str]], text: str):
+    """A msgspec parse of the dataset into structs, or None without msgspec."""
+    array_key, view = ENTRIES[name]
+    if view is None:
+        return None
+    try:
+        import msgspec
+    except ImportError:
+        return None
+    if lines is not None:
+        decode = msgspec.json.Decoder(struct_type(view)).decode
+        return lambda: [decode(line) for line in lines]
+    document = msgspec.defstruct(
+        f"{view.__name__}Document", [(array_key, List[struct_type(view)])]
+    )
+    decode = msgspec.json.Decoder(document).decode
+    return lambda: decode(text)
+
+
+def _parse_lines(lines: List[str]) -> List[Any]:
+    return [jsonio.loads(line) for line in lines]
+
+
+def _row(label: str, parse_mbs: float, dump_mbs=None, entries_per_s=None):
+    def cell(value, width, spec):
+        return f"{'-':>{width}}" if value is None else f"{value:>{width}{spec}}"
+
+    print(
+        f"  {label:<18}{cell(parse_mbs, 12, ',.1f')}{cell(dump_mbs, 12, ',.1f')}"
+        f"{cell(entries_per_s, 14, ',.0f')}"
+    )
+
+
+def benchmark_dataset(name: str, path: Path, backends: List[str], repeat: int):
+    default_backend = jsonio.BACKEND
+    with open_dataset(path) as f:
+        text = f.read()
+    size_mb = len(text.encode("utf-8")) / 1e6
+    lines = text.splitlines() if ".jsonl" in path.name else None
+    array_key, _ = ENTRIES[name]
+
+    rows = []
+    for backend in backends:
+        jsonio.select(backend)
+        if lines is None:
+            parse = functools.partial(jsonio.loads, text)
+        else:
+            parse = functools.partial(_parse_lines, lines)
+        parse_time = best_time(repeat, parse)
+        value = parse()
+        entries = value if array_key is None else value[array_key]
+        if lines is None:
+            dumped_mb = len(jsonio.dumps(value)) / 1e6
+            dump_mbs = dumped_mb / best_time(repeat, lambda: jsonio.dumps(value))
+        else:
+            dump_mbs = None
+        entries_time = best_time(
+            repeat, lambda: [jsonio.dumps(entry) for entry in entries]
+        )
+        rows.append(
+            (backend, size_mb / parse_time, dump_mbs, len(entries) / entries_time)
+        )
+    jsonio.select(default_backend)
+
+    print(f"{name}: {path.name}, {size_mb:,.1f} MB, {len(entries):,} entries")
+    print(f"  {'backend':<18}{'parse MB/s':>12}{'dump MB/s':>12}{'entries/s':>14}")
+    for row in rows:
+        _row(*row)
+    if lines is None:
+        stream = JSONArrayStream(path, array_key)
+        stream_time = best_time(repeat, lambda: sum(1 for _ in stream))
+        _row("JSONArrayStream", size_mb / stream_time)
+    typed = typed_parser(name, lines, text)
+    if typed is not None:
+        _row("msgspec structs", size_mb / best_time(repeat, typed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", type=Path, help="Folder with the datasets")
+    parser.add_argument(
+        "--scale",
+        type=float,
+        help="Use synthetic datasets of this scale instead (see data.benchmark)",
+    )
+    parser.add_argument("--only", help="Comma-separated dataset names")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing")
+    args = parser.parse_args()
+
+    if args.scale is not None:
+        dataset_dirs = [synthetic_datasets(args.scale, seed=0)]
+    elif args.datasets:
+        dataset_dirs = [args.datasets]
+    else:
+        dataset_dirs = [DATASETS_DIR, DATASETS_DIR / "extracted"]
+    names = args.only.split(",") if args.only else list(DATASET_PATTERNS)
+
+    default_backend, backends = jsonio.BACKEND, []
+    for backend in jsonio.BACKENDS:
+        try:
+            jsonio.select(backend)
+        except ImportError:
+            print(f"{backend} isn't installed, skipping it")
+            continue
+        backends.append(backend)
+    jsonio.select(default_backend)
+
+    for name in names:
+        path = find_dataset(DATASET_PATTERNS[name], *dataset_dirs)
+        benchmark_dataset(name, path, backends, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
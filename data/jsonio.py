@@ -0,0 +1,114 @@
+"""JSON encoding and decoding for the build, on the fastest backend installed.
+
+msgspec is used when it can be imported, then orjson, then the standard
+library's json module. Set DICTIONARY_JSON_BACKEND to one of BACKENDS to pick
+one explicitly. All three write the same bytes for the data the build
+handles: compact separators (or a two-space indent), UTF-8 without \\u
+escapes, and keys in insertion order. Decoding errors are ValueErrors on
+every backend.
+
+`JSONArrayStream` in data/loaders.py still decodes with the standard
+library, because neither fast backend can decode one value from the middle
+of a buffer and report where it ended.
+"""
+
+import json
+import os
+from typing import Any, Callable, Optional, Union
+
+BACKENDS = ("msgspec", "orjson", "json")
+ENV_VAR = "DICTIONARY_JSON_BACKEND"
+
+
+def _json_dumps(obj, indent=False, default=None) -> bytes:
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=(",", ": ") if indent else (",", ":"),
+        default=default,
+    ).encode("utf-8")
+
+
+def _msgspec():
+    import msgspec
+
+    encoder = msgspec.json.Encoder()
+
+    def dumps(obj, indent=False, default=None):
+        if default is None:
+            data = encoder.encode(obj)
+        else:
+            data = msgspec.json.encode(obj, enc_hook=default)
+        return msgspec.json.format(data, indent=2) if indent else data
+
+    return msgspec.json.decode, dumps
+
+
+def _orjson():
+    import orjson
+
+    def dumps(obj, indent=False, default=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    return orjson.loads, dumps
+
+
+def _json():
+    return json.loads, _json_dumps
+
+
+_LOADERS = {"msgspec": _msgspec, "orjson": _orjson, "json": _json}
+
+
+def select(name: Optional[str] = None) -> str:
+    """Switch to backend `name`, or to the first installed one of BACKENDS."""
+    global BACKEND, _loads, _dumps
+    if name is None:
+        for candidate in BACKENDS:
+            try:
+                return select(candidate)
+            except ImportError:
+                continue
+    if name not in _LOADERS:
+        raise ValueError(f"Unknown JSON backend {name!r}, expected one of {BACKENDS}")
+    _loads, _dumps = _LOADERS[name]()
+    BACKEND = name
+    return BACKEND
+
+
+BACKEND = "json"
+_loads, _dumps = _json()
+select(os.environ.get(ENV_VAR) or None)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return _loads(data)
+
+
+def dumps(obj: Any, indent: bool = False, default: Optional[Callable] = None) -> bytes:
+    """`obj` as UTF-8 JSON, compact or indented by two spaces.
+
+    Values the fast backends refuse (integers wider than 64 bits, say) are
+    encoded by the standard library instead, which raises TypeError for
+    anything it can't encode either.
+    """
+    try:
+        return _dumps(obj, indent, default)
+    except (TypeError, ValueError, OverflowError):
+        if _dumps is _json_dumps:
+            raise
+        return _json_dumps(obj, indent, default)
+
+
+def load(f) -> Any:
+    """Decode the rest of a text or binary file."""
+    return _loads(f.read())
+
+
+def dump(obj: Any, f, indent: bool = False, default: Optional[Callable] = None):
+    """Write `obj` to a file opened in binary mode."""
+    f.write(dumps(obj, indent, default))
@@ -0,0 +1,304 @@
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from data import jsonio
+
+CHUNK_SIZE = 1 << 20  # characters read from disk per refill
+
+# Compressed variants of a dataset that can be read in place, in order of
+# preference when several are present.
+COMPRESSED_SUFFIXES = (".xz", ".zst", ".gz")
+
+# The fast backends in data.jsonio can't decode a value in the middle of a
+# buffer, so the streaming reader below uses the standard library's decoder.
+_decoder = json.JSONDecoder()
+# Leaves out members whose value is an empty array, and interns the keys: the
+# decoder only shares a key string within one value, and the stream decodes
+# every element on its own. The dataset views read a missing list the same as
+# an empty one, and the records they keep stay smaller.
+_compact_decoder = json.JSONDecoder(
+    object_pairs_hook=lambda pairs: {
+        sys.intern(key): value for key, value in pairs if value != []
+    }
+)
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class _TextWindow:
+    """A sliding window over a text file that is refilled on demand.
+
+    Only the unconsumed tail of the previous chunk is kept around, so memory
+    stays bounded by the chunk size plus the largest single JSON value.
+    """
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE, decoder=_decoder):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = decoder
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character ("" at EOF) without consuming it."""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Expected one of {chars!r} but found {char or 'EOF'!r} "
+                f"in {getattr(self.f, 'name', '<stream>')}"
+            )
+        self.pos += 1
+        return char
+
+    def decode(self) -> Any:
+        """Decode one complete JSON value starting at the current position."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.text, self.pos)
+                # A number cut by the window edge still decodes ("12" of
+                # "123", "-0" of "-0.5"), so only trust it once a character
+                # that cannot continue it follows (or EOF is reached).
+                if self.eof or (
+                    end < len(self.text) and self.text[end] not in _NUMBER_CHARS
+                ):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+class JSONArrayStream:
+    """Iterate over the items of one array in a JSON document without loading it whole.
+
+    `array_key` names the top-level member holding the array (e.g. "words" in
+    JMdict/JMnedict). Every other top-level member is collected into `header`
+    as it is passed, so for jmdict-simplified files (where "words" comes last)
+    the header is complete as soon as the first entry has been yielded. Pass
+    `array_key=None` for documents that are a bare top-level array, such as
+    the JmdictFurigana files.
+
+    Each iteration re-reads the file from the start; `count` holds the number
+    of items yielded by the most recent pass. With `drop_empty_lists`, object
+    members whose value is `[]` are left out of the decoded items.
+    """
+
+    def __init__(
+        self,
+        file_path,
+        array_key: Optional[str] = "words",
+        drop_empty_lists: bool = False,
+    ):
+        self.file_path = Path(file_path)
+        self.array_key = array_key
+        self.decoder = _compact_decoder if drop_empty_lists else _decoder
+        self.header: Dict[str, Any] = {}
+        self.count = 0
+
+    def __repr__(self):
+        return (
+            f"JSONArrayStream(file_path={self.file_path}, array_key={self.array_key})"
+        )
+
+    def read_header(self) -> Dict[str, Any]:
+        """Fill `header` by reading just up to the first item of the array."""
+        for _ in self:
+            break
+        return self.header
+
+    def _iter_array(self, window: _TextWindow) -> Iterator[Any]:
+        window.expect("[")
+        if window.peek() == "]":
+            window.pos += 1
+            return
+        while True:
+            yield window.decode()
+            self.count += 1
+            if window.expect(",]") == "]":
+                return
+
+    def __iter__(self) -> Iterator[Any]:
+        self.count = 0
+        with open_dataset(self.file_path) as f:
+            window = _TextWindow(f, decoder=self.decoder)
+            if self.array_key is None:
+                yield from self._iter_array(window)
+                return
+
+            found = False
+            window.expect("{")
+            if window.peek() == "}":
+                window.pos += 1
+            else:
+                while True:
+                    key = window.decode()
+                    window.expect(":")
+                    if key == self.array_key:
+                        found = True
+                        yield from self._iter_array(window)
+                    else:
+                        self.header[key] = window.decode()
+                    if window.expect(",}") == "}":
+                        break
+            if not found:
+                raise KeyError(
+                    f"No top-level {self.array_key!r} array in {self.file_path}"
+                )
+
+
+def _open_binary(file_path: Path):
+    suffix = file_path.suffix
+    if suffix == ".xz":
+        return lzma.open(file_path, "rb")
+    if suffix == ".gz":
+        return gzip.open(file_path, "rb")
+    if suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                f"Reading {file_path.name} requires the zstandard package"
+            ) from e
+        # Archives made by pzstd or by concatenating files hold several frames.
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(file_path, "rb"), read_across_frames=True
+        )
+    return open(file_path, "rb")
+
+
+def open_dataset(file_path):
+    """Open a dataset for reading as text, decompressing .xz/.gz/.zst on the fly."""
+    return io.TextIOWrapper(_open_binary(Path(file_path)), encoding="utf-8-sig")
+
+
+def find_dataset(pattern, *dataset_dirs) -> Path:
+    """Find the file for `pattern`, either as-is or as a compressed archive.
+
+    Directories are searched in order. Within one directory an uncompressed
+    file wins over an archive of the same dataset.
+    """
+    for dataset_dir in dataset_dirs:
+        for suffix in ("",) + COMPRESSED_SUFFIXES:
+            files = sorted(Path(dataset_dir).glob(pattern + suffix))
+            if files:
+                return files[0]  # Use the first matching file
+    raise FileNotFoundError(
+        f"No {pattern} file found in {', '.join(str(d) for d in dataset_dirs)}"
+    )
+
+
+def file_digest(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_dataset(file_path, cache_dir) -> Path:
+    """Decompress an archive into `cache_dir`, keyed by the archive's hash.
+
+    Returns the path of the decompressed copy, reusing it when the same
+    archive has been decompressed before. Uncompressed files are returned
+    unchanged.
+    """
+    file_path = Path(file_path)
+    if file_path.suffix not in COMPRESSED_SUFFIXES:
+        return file_path
+    cached = Path(cache_dir) / file_digest(file_path)[:16] / file_path.stem
+    if not cached.exists():
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cached.with_name(cached.name + ".tmp")
+        with _open_binary(file_path) as src, open(tmp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(tmp_path, cached)
+    return cached
+
+
+def prepare_datasets(
+    patterns: Dict[str, str],
+    dataset_dirs: List[Path],
+    cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Path]:
+    """Resolve each named dataset pattern to a readable file.
+
+    With a `cache_dir`, archives are decompressed into it concurrently (lzma
+    and zstd release the GIL) and the cached copies are returned; otherwise
+    the archives themselves are returned and decompressed while they are
+    read. That still overlaps for the datasets read whole (see
+    `load_files`), but the streamed ones are decompressed as they are
+    processed, one after the other.
+    """
+    files = {name: find_dataset(p, *dataset_dirs) for name, p in patterns.items()}
+    if cache_dir is None:
+        return files
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        cached = pool.map(lambda f: cache_dataset(f, cache_dir), files.values())
+        return dict(zip(files.keys(), cached))
+
+
+def load_json(file_path):
+    with open_dataset(file_path) as f:
+        return jsonio.load(f)
+
+
+def load_jsonl(file_path):
+    with open_dataset(file_path) as f:
+        return [jsonio.loads(line) for line in f]
+
+
+def load_file(file_path):
+    if "jsonl" in Path(file_path).name:
+        return load_jsonl(file_path)
+    else:
+        return load_json(file_path)
+
+
+def load_files(file_paths, max_workers: Optional[int] = None) -> List[Any]:
+    """Load several datasets at once, overlapping their decompression."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(load_file, file_paths))
+
+
+def load_dataset(pattern, *dataset_dirs):
+    return load_file(find_dataset(pattern, *dataset_dirs))
+
+
+def stream_dataset(pattern, *dataset_dirs, array_key="words") -> JSONArrayStream:
+    """Like `load_dataset`, but yields the entries of `array_key` one by one."""
+    return JSONArrayStream(find_dataset(pattern, *dataset_dirs), array_key)
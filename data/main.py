@@ -1,142 +1,111 @@
 import argparse
-import gzip
-import json
+import multiprocessing
+import os
+import queue
+import tempfile
+import time
+import traceback
 from collections import defaultdict
+from functools import partial
+from itertools import islice
 from pathlib import Path
 import lzma
-import re
-import time
-
-import jaconv
-
-
-def load_json(file_path):
-    with open(file_path, "r", encoding="utf-8-sig") as f:
-        return json.load(f)
-
-
-def load_jsonl(file_path):
-    with open(file_path, "r", encoding="utf-8-sig") as f:
-        return [json.loads(line) for line in f]
-
-
-def load_dataset(pattern, extracted_dir):
-    files = list(extracted_dir.glob(pattern))
-    if not files:
-        raise FileNotFoundError(f"No {pattern} file found in {extracted_dir}")
-    file_path = files[0]  # Use the first matching file
-    if "jsonl" in file_path.name:
-        return load_jsonl(file_path)
-    else:
-        return load_json(file_path)
-
-
-def build_japanese_chinese_mapping(char_dict_data):
-    japanese_chinese_map = {}
-    total_entries = len(char_dict_data)
-    matches_found = 0
-
-    for index, char_entry in enumerate(char_dict_data):
-        if index % 10000 == 0:
-            print(
-                f"Processed {index}/{total_entries} entries in build_japanese_chinese_mapping"
-            )
-
-        if "statistics" in char_entry and "top_words" in char_entry["statistics"]:
-            top_words = char_entry["statistics"]["top_words"]
-            if len(top_words) == 1:
-                gloss = top_words[0].get("gloss", "")
-                if gloss.startswith("Japanese variant of"):
-                    match = re.search(r"of\s+([^\[]+)(?:\[|$)", gloss)
-                    if match:
-                        chars = match.group(1).split("|")
-                        if len(chars) == 2:
-                            japanese_chinese_map[char_entry["char"]] = {
-                                "t": chars[0],
-                                "s": chars[1],
-                            }
-                        elif len(chars) == 1:
-                            japanese_chinese_map[char_entry["char"]] = {
-                                "t": chars[0],
-                                "s": chars[0],
-                            }
-                        matches_found += 1
-
-    print(
-        f"Found {matches_found} Japanese-Chinese mappings out of {total_entries} entries"
-    )
-    return japanese_chinese_map
-
 
-parser = argparse.ArgumentParser(
-    description="Process dictionary data with extracted files."
+from data import jsonio
+from data.entries import EntryLists, SpilledEntryLists
+from data.furigana import FuriganaIndex
+from data.instrumentation import (
+    Instrumentation,
+    load_report,
+    report_path_for,
+    write_report,
 )
-parser.add_argument(
-    "--build", action="store_true", help="Use SvelteKit build output directory"
-)
-parser.add_argument(
-    "--vercel", action="store_true", help="Use Vercel build output directory"
-)
-args = parser.parse_args()
-
-extracted_dir = Path(__file__).resolve().parent / "datasets" / "extracted"
-
-# Set the output directory based on the arguments
-if args.vercel:
-    output_dir = (
-        Path(__file__).resolve().parent.parent
-        / ".vercel"
-        / "output"
-        / "static"
-        / "dictionary"
-    )
-elif args.build:
-    output_dir = (
-        Path(__file__).resolve().parent.parent
-        / ".svelte-kit"
-        / "output"
-        / "client"
-        / "dictionary"
-    )
-else:
-    output_dir = Path(__file__).resolve().parent.parent / "dictionary"
+from data.loaders import prepare_datasets
+from data.romaji import Transliterator
+from data.search import SEARCH_DIR, SearchIndexes, summary as search_summary
+from data.sharding import shard_of
+from data.snapshot import SnapshotCache
+from data.store import EntryStore, summary as store_summary
+from data.tags import LEGEND_FILE, TagTable
+from data.variants import VariantIndex
+from data.writer import CODECS, DictionaryWriter, Ledger, PackedWriter, WriteStats
+
+DATASETS_DIR = Path(__file__).resolve().parent / "datasets"
+# Files derived from the datasets, all safe to delete: decompressed archives,
+# the furigana and variant indexes, the romaji table and the dataset snapshots.
+CACHE_DIR = DATASETS_DIR / "extracted" / ".cache"
+ROMAJI_TABLE = CACHE_DIR / "romaji.json"
+# JMdict/JMnedict entries whose kana are converted to romaji together.
+ROMAJI_BATCH = 1024
+SNAPSHOT_DIR = CACHE_DIR / "snapshots"
+# JMnedict's proper names are written to their own folder of the output, with
+# its own ledger, so the client only fetches them when it wants names.
+NAMES_DIR = "names"
+DATASET_PATTERNS = {
+    "jmdict": "jmdict-*.json",
+    "jmnedict": "jmnedict-*.json",
+    "kanjidic": "kanjidic2-*.json",
+    "char_dict": "dictionary_char_*.jsonl",
+    "word_dict": "dictionary_word_*.jsonl",
+    "jmdict_furigana": "JmdictFurigana*.json",
+    "jmnedict_furigana": "JmnedictFurigana*.json",
+}
+
 
-print(f"Output directory: {output_dir}")
+# Every key's entry lists by field; SpilledEntryLists with --spill-entries.
+all_entries = EntryLists()
+# The JMnedict entries ("n_j") of every key, written to NAMES_DIR.
+name_entries = EntryLists()
+word_index = defaultdict(lambda: defaultdict(list))
 
-# Load all datasets
-jmdict_data = load_dataset("jmdict-*.json", extracted_dir)
-jmnedict_data = load_dataset("jmnedict-*.json", extracted_dir)
-kanjidic_data = load_dataset("kanjidic2-*.json", extracted_dir)
-char_dict_data = load_dataset("dictionary_char_*.jsonl", extracted_dir)
-word_dict_data = load_dataset("dictionary_word_*.jsonl", extracted_dir)
-jmdict_furigana_data = load_dataset("JmdictFurigana*.json", extracted_dir)
-jmnedict_furigana_data = load_dataset("JmnedictFurigana*.json", extracted_dir)
+# The shard of the output keys this process builds. With the default single
+# shard every key belongs to this process.
+shard_index = 0
+shard_count = 1
 
-# Add this function call after loading all datasets
-japanese_chinese_map = build_japanese_chinese_mapping(char_dict_data)
+jmdict_furigana = FuriganaIndex.from_records([])
+jmnedict_furigana = FuriganaIndex.from_records([])
+romaji = Transliterator()
+tag_table = TagTable({})
+# With --store, the entries listed under more than one key are written to the
+# entry store once and listed as refs instead.
+entry_store = None
+# The search indexes fed every key's entries, unless built with --no-search.
+search_indexes = None
 
-print("All datasets loaded successfully.")
 
-all_entries = defaultdict(lambda: defaultdict(list))
-word_index = defaultdict(lambda: defaultdict(list))
+def owns_key(key):
+    return shard_count == 1 or shard_of(key, shard_count) == shard_index
 
 
 def process_chinese_char_entry(entry, index):
     key = entry["char"]
-    all_entries[key]["c_c"].append(entry)
+    if not owns_key(key):
+        return
+    all_entries.append(key, "c_c", entry)
+    if search_indexes is not None:
+        search_indexes.add_chinese_entry(key, entry)
 
 
 def process_chinese_word_entry(entry, index):
     trad_character = entry["trad"]
     simp_character = entry["simp"]
 
-    all_entries[trad_character]["c_tw"].append(entry)
-    if trad_character != simp_character:
-        all_entries[simp_character]["c_sw"].append(entry)
+    shared = trad_character != simp_character
+    if owns_key(trad_character):
+        all_entries.append(trad_character, "c_tw", listing("c_tw", entry, shared))
+        if search_indexes is not None:
+            search_indexes.add_chinese_entry(trad_character, entry)
+    if shared and owns_key(simp_character):
+        all_entries.append(simp_character, "c_sw", listing("c_sw", entry, shared))
+        if search_indexes is not None:
+            search_indexes.add_chinese_entry(simp_character, entry)
 
 
 def process_kanjidic_entry(entry, index):
     key = entry["literal"]
+    if not owns_key(key):
+        return
 
     minified_entry = {
         "char": entry["literal"],
@@ -197,62 +166,89 @@ def process_kanjidic_entry(entry, index):
         },
     }
 
-    all_entries[key]["c_j"].append(minified_entry)
-
-
-# Replace the pre-processing step with this:
-print("Pre-processing furigana data...")
-jmdict_furigana_dict = {}
-for item in jmdict_furigana_data:
-    jmdict_furigana_dict[item["text"]] = {
-        reading: item["furigana"] for reading in item["reading"].split(",")
-    }
-
-jmdict_furigana_set = {k: set(v.keys()) for k, v in jmdict_furigana_dict.items()}
+    all_entries.append(key, "c_j", minified_entry)
+    if search_indexes is not None:
+        search_indexes.add_kanjidic_entry(key, minified_entry)
+
+
+def listing(field, entry, shared, keys=1):
+    """What to list under each of `keys` keys for `entry` (a ref if it is
+    shared and there is an entry store)."""
+    if entry_store is None:
+        return entry
+    return entry_store.listing(field, entry, shared, keys)
+
+
+def has_several_keys(entry):
+    """Whether a JMdict/JMnedict entry is listed under more than one key,
+    counting the keys of every shard."""
+    texts = {item["text"] for item in entry.get("kanji", []) + entry.get("kana", [])}
+    return len(texts) > 1
+
+
+def with_romaji(entries, batch_size=ROMAJI_BATCH):
+    """Pair JMdict/JMnedict entries with the romaji of their kana.
+
+    The kana of `batch_size` entries at a time (the ones with a key in this
+    shard) go through one romaji.batch(), so the ones not in its table yet
+    are converted in a single call.
+    """
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return
+        kana_romaji = romaji.batch(
+            kana["text"]
+            for entry in batch
+            if any(
+                owns_key(item["text"])
+                for item in entry.get("kanji", []) + entry.get("kana", [])
+            )
+            for kana in entry.get("kana", [])
+        )
+        for entry in batch:
+            yield entry, kana_romaji
 
 
 # Update the process_jmdict_entry function:
-def process_jmdict_entry(entry, index):
-    if index % 1000 == 0:
-        print(f"Processing JMdict entry {index}")
-
+def process_jmdict_entry(entry, index, kana_romaji):
     keys = []
-    kana_dict = {kana["text"]: kana["tags"] for kana in entry.get("kana", [])}
-    kana_set = set(kana_dict.keys())
+    kana_dict = {
+        kana["text"]: tag_table.encode(kana["tags"]) for kana in entry.get("kana", [])
+    }
 
     # Add all kanji and kana representations
     for item in entry.get("kanji", []) + entry.get("kana", []):
-        keys.append(item["text"])
-        word_index[item["text"]]["j"].append(index)
+        if owns_key(item["text"]):
+            keys.append(item["text"])
+            word_index[item["text"]]["j"].append(index)
 
-    # If no keys were found, skip this entry
+    # If no keys were found (or none belong to this shard), skip this entry
     if not keys:
         return
 
     for kanji in entry.get("kanji", []):
         kanji_text = kanji["text"]
-        if kanji_text not in jmdict_furigana_set:
-            if index % 1000 == 0:
-                print(f"  Kanji {kanji_text} not in furigana data")
+        furigana = jmdict_furigana.get(kanji_text, kana_dict)
+        if furigana is None:
             kanji["reading"] = [
                 {
                     "furigana": [{"ruby": kanji_text, "text": kana}],
                     "tags": kana_dict.get(kana, []),
-                    "romaji": jaconv.kata2alphabet(kana),
+                    "romaji": kana_romaji[kana],
                 }
-                for kana in kana_set
+                for kana in kana_dict
             ]
         else:
-            if index % 1000 == 0:
-                print(f"  Processing furigana for kanji {kanji_text}")
-            common_kana = kana_set & jmdict_furigana_set[kanji_text]
             kanji["reading"] = [
                 {
-                    "furigana": jmdict_furigana_dict[kanji_text][kana],
+                    "furigana": furigana[kana],
                     "tags": kana_dict.get(kana, []),
-                    "romaji": jaconv.kata2alphabet(kana),
+                    "romaji": kana_romaji[kana],
                 }
-                for kana in common_kana
+                for kana in kana_dict
+                if kana in furigana
             ]
 
     minified_entry = {
@@ -260,7 +256,7 @@ def process_jmdict_entry(entry, index):
             {
                 "common": kanji.get("common", False),
                 "text": kanji["text"],
-                "tags": kanji.get("tags", []),
+                "tags": tag_table.encode(kanji.get("tags", [])),
                 "reading": kanji.get("reading", []),
             }
             for kanji in entry.get("kanji", [])
@@ -269,11 +265,11 @@ def process_jmdict_entry(entry, index):
             {
                 "common": kana.get("common", False),
                 "text": kana["text"],
-                "tags": kana.get("tags", []),
+                "tags": tag_table.encode(kana.get("tags", [])),
                 "applies_to_kanji": (
                     kana["appliesToKanji"] if kana["appliesToKanji"] != ["*"] else []
                 ),
-                "romaji": jaconv.kata2alphabet(kana["text"]),
+                "romaji": kana_romaji[kana["text"]],
             }
             for kana in entry.get("kana", [])
         ],
@@ -286,8 +282,8 @@ def process_jmdict_entry(entry, index):
                 "applies_to_kanji": (
                     sense["appliesToKanji"] if sense["appliesToKanji"] != ["*"] else []
                 ),
-                "dialect": sense.get("dialect", []),
-                "field": sense.get("field", []),
+                "dialect": tag_table.encode(sense.get("dialect", [])),
+                "field": tag_table.encode(sense.get("field", [])),
                 "gloss": [
                     {
                         "gender": gloss.get("gender", ""),
@@ -298,8 +294,8 @@ def process_jmdict_entry(entry, index):
                 ],
                 "info": sense.get("info", []),
                 "language_source": sense.get("languageSource", []),
-                "misc": sense.get("misc", []),
-                "part_of_speech": sense.get("partOfSpeech", []),
+                "misc": tag_table.encode(sense.get("misc", [])),
+                "part_of_speech": tag_table.encode(sense.get("partOfSpeech", [])),
                 "related": sense.get("related", []),
             }
             for sense in entry.get("sense", [])
@@ -307,63 +303,51 @@ def process_jmdict_entry(entry, index):
     }
 
     # Add the entry to each key
+    listed = listing("w_j", minified_entry, has_several_keys(entry), len(keys))
     for key in keys:
-        all_entries[key]["w_j"].append(minified_entry)
-
-
-# Add this to the pre-processing section, after the JMdict furigana processing
-print("Pre-processing JMnedict furigana data...")
-jmnedict_furigana_dict = {}
-for item in jmnedict_furigana_data:
-    jmnedict_furigana_dict[item["text"]] = {
-        reading: item["furigana"] for reading in item["reading"].split(",")
-    }
-
-jmnedict_furigana_set = {k: set(v.keys()) for k, v in jmnedict_furigana_dict.items()}
+        all_entries.append(key, "w_j", listed)
+    if search_indexes is not None:
+        search_indexes.add_jmdict_entry(keys, minified_entry)
 
 
 # Update the process_jmnedict_entry function:
-def process_jmnedict_entry(entry, index):
-    if index % 1000 == 0:
-        print(f"Processing JMnedict entry {index}")
-
+def process_jmnedict_entry(entry, index, kana_romaji):
     keys = []
-    kana_dict = {kana["text"]: kana["tags"] for kana in entry.get("kana", [])}
-    kana_set = set(kana_dict.keys())
+    kana_dict = {
+        kana["text"]: tag_table.encode(kana["tags"]) for kana in entry.get("kana", [])
+    }
 
     # Add all kanji and kana representations
     for item in entry.get("kanji", []) + entry.get("kana", []):
-        keys.append(item["text"])
-        word_index[item["text"]]["n"].append(index)
+        if owns_key(item["text"]):
+            keys.append(item["text"])
+            word_index[item["text"]]["n"].append(index)
 
-    # If no keys were found, skip this entry
+    # If no keys were found (or none belong to this shard), skip this entry
     if not keys:
         return
 
     for kanji in entry.get("kanji", []):
         kanji_text = kanji["text"]
-        if kanji_text not in jmnedict_furigana_set:
-            if index % 1000 == 0:
-                print(f"  Kanji {kanji_text} not in JMnedict furigana data")
+        furigana = jmnedict_furigana.get(kanji_text, kana_dict)
+        if furigana is None:
             kanji["reading"] = [
                 {
                     "furigana": [{"ruby": kanji_text, "text": kana}],
                     "tags": kana_dict.get(kana, []),
-                    "romaji": jaconv.kata2alphabet(kana),
+                    "romaji": kana_romaji[kana],
                 }
-                for kana in kana_set
+                for kana in kana_dict
             ]
         else:
-            if index % 1000 == 0:
-                print(f"  Processing furigana for kanji {kanji_text}")
-            common_kana = kana_set & jmnedict_furigana_set[kanji_text]
             kanji["reading"] = [
                 {
-                    "furigana": jmnedict_furigana_dict[kanji_text][kana],
+                    "furigana": furigana[kana],
                     "tags": kana_dict.get(kana, []),
-                    "romaji": jaconv.kata2alphabet(kana),
+                    "romaji": kana_romaji[kana],
                 }
-                for kana in common_kana
+                for kana in kana_dict
+                if kana in furigana
             ]
 
     minified_entry = {
@@ -375,9 +359,9 @@ def process_jmnedict_entry(entry, index):
                         if kana["appliesToKanji"] != ["*"]
                         else []
                     ),
-                    "tags": kana["tags"],
+                    "tags": tag_table.encode(kana["tags"]),
                     "text": kana["text"],
-                    "romaji": jaconv.kata2alphabet(kana["text"]),
+                    "romaji": kana_romaji[kana["text"]],
                 }
                 for kana in entry["kana"]
             ]
@@ -386,7 +370,7 @@ def process_jmnedict_entry(entry, index):
         ),
         "kanji": [
             {
-                "tags": kanji.get("tags", []),
+                "tags": tag_table.encode(kanji.get("tags", [])),
                 "text": kanji["text"],
                 "reading": kanji.get("reading", []),
             }
@@ -406,121 +390,885 @@ def process_jmnedict_entry(entry, index):
                     if translation.get("translation")
                     else []
                 ),
-                "type": translation.get("type", ""),
+                "type": tag_table.encode(translation.get("type", [])),
             }
             for translation in entry.get("translation", [])
         ],
     }
 
     # Add the entry to each key
+    listed = listing("n_j", minified_entry, has_several_keys(entry), len(keys))
     for key in keys:
-        all_entries[key]["n_j"].append(minified_entry)
+        name_entries.append(key, "n_j", listed)
+    if search_indexes is not None:
+        search_indexes.add_jmnedict_entry(keys, minified_entry)
+
+
+def collect_mapping_exports(japanese_chinese_map):
+    """Gather what the Japanese-Chinese mapping step needs from this shard's keys.
+
+    The mapping links characters that usually live in different shards, so
+    each shard exports the existing keys, and copies of the `c_j` lists and
+    `c_c` lists of the mapped characters it owns before any of them are
+    updated.
+    """
+    exports = {"keys": set(), "c_j": {}, "c_c": {}}
+    for jp_char, ch_chars in japanese_chinese_map.items():
+        for char in (jp_char, ch_chars["t"], ch_chars["s"]):
+            if char in all_entries:
+                exports["keys"].add(char)
+        if jp_char in all_entries:
+            exports["c_j"][jp_char] = list(all_entries.get(jp_char, "c_j"))
+        if ch_chars["t"] in all_entries:
+            exports["c_c"][ch_chars["t"]] = list(all_entries.get(ch_chars["t"], "c_c"))
+    return exports
+
+
+def merge_mapping_exports(exports_list):
+    merged = {"keys": set(), "c_j": {}, "c_c": {}}
+    for exports in exports_list:
+        merged["keys"] |= exports["keys"]
+        merged["c_j"].update(exports["c_j"])
+        merged["c_c"].update(exports["c_c"])
+    return merged
+
+
+def apply_japanese_chinese_mapping(japanese_chinese_map, exports):
+    for jp_char, ch_chars in japanese_chinese_map.items():
+        jp_c_j = exports["c_j"].get(jp_char, [])
+        t_c_c = exports["c_c"].get(ch_chars["t"], [])
+        # With an entry store the copied lists are stored once, under the
+        # character they belong to.
+        if entry_store is not None:
+            if jp_c_j:
+                jp_c_j = entry_store.list_reference("c_j", jp_char, jp_c_j)
+            if t_c_c:
+                t_c_c = entry_store.list_reference("c_c", ch_chars["t"], t_c_c)
+        # Add c_j to traditional and simplified entries
+        if ch_chars["t"] in all_entries:
+            all_entries.append(ch_chars["t"], "c_j", jp_c_j)
+        if ch_chars["s"] in all_entries and ch_chars["s"] != ch_chars["t"]:
+            all_entries.append(ch_chars["s"], "c_j", jp_c_j)
+
+        # Add c_c to Japanese entry
+        if jp_char in all_entries and ch_chars["t"] in exports["keys"]:
+            all_entries.append(jp_char, "c_c", t_c_c)
+
+
+def is_hot_key(key, entries):
+    """Whether a key is looked up often enough to be worth the slowest compression.
+
+    Common JMdict words, Kanjidic characters with a frequency rank and
+    Chinese characters/words up to HSK 6 count as hot.
+    """
+    for entry in entries.get("w_j", []):
+        # Entries moved to the entry store leave a summary with the flag.
+        if "ref" in entry:
+            if entry.get("common"):
+                return True
+            continue
+        if any(kanji["common"] for kanji in entry["kanji"]) or any(
+            kana["common"] for kana in entry["reading"]
+        ):
+            return True
+    # The Japanese-Chinese mapping nests whole c_j/c_c lists (or refs to
+    # them), so skip those.
+    for entry in entries.get("c_j", []):
+        if (
+            isinstance(entry, dict)
+            and "info" in entry
+            and entry["info"].get("frequency")
+        ):
+            return True
+    for field in ("c_c", "c_tw", "c_sw"):
+        for entry in entries.get(field, []):
+            if isinstance(entry, dict) and "ref" in entry:
+                if entry.get("hsk", 99) <= 6:
+                    return True
+                continue
+            statistics = entry.get("statistics") if isinstance(entry, dict) else None
+            if statistics and statistics.get("hskLevel", 99) <= 6:
+                return True
+    return False
+
+
+def write_entries(entries, writer, ledger, progress):
+    stats = writer.write(
+        progress.track(entries.items()), ledger, shard_index, shard_count
+    )
+    print(f"Wrote {stats.summary()}")
+    return stats
+
+
+def build_names(jmnedict_data, writer, ledger, instruments, spill_dir=None):
+    """Process JMnedict for this shard's keys and write their name files.
+
+    Runs once the headword files are written and their entry lists freed, so
+    the names never have to fit in memory alongside them.
+    """
+    global name_entries
+    name_entries = SpilledEntryLists(spill_dir) if spill_dir else EntryLists()
+    print("Processing JMnedict entries...")
+    with instruments.stage("process_jmnedict") as progress:
+        entries = with_romaji(progress.track(jmnedict_data))
+        for index, (entry, kana_romaji) in enumerate(entries):
+            process_jmnedict_entry(entry, index, kana_romaji)
+    print(f"Processed JMnedict {jmnedict_data.header.get('version')}")
+
+    print("Writing the name files...")
+    with instruments.stage("write_names", len(name_entries)) as progress:
+        stats = write_entries(name_entries, writer, ledger, progress)
+    name_entries.close()
+    return stats
+
+
+def build_shard(
+    sources,
+    writer,
+    ledger=None,
+    index=0,
+    count=1,
+    exchange=None,
+    instruments=None,
+    store=None,
+    spill_dir=None,
+    names_writer=None,
+    names_ledger=None,
+    search=None,
+):
+    """Run every processing step for the keys of one shard and write their files.
+
+    `exchange(kind, payload)` trades this shard's mapping exports ("exports")
+    and dictionary training samples ("samples") for the merged result from
+    all shards; it is only needed when `count` > 1. Every step is timed as
+    a stage of `instruments`. With an EntryStore as `store`, the entries
+    shared between keys are written to it and referenced from the key files.
+    With a `spill_dir`, the entry lists are kept in a database file there
+    instead of in memory. With a `names_writer`, JMnedict is processed too
+    and its names are written with it (see `build_names`). With a
+    SearchIndexes as `search`, every key this shard lists is fed to it.
+    Returns the WriteStats of this shard's key files and of its name files
+    (None without a `names_writer`).
+    """
+    if instruments is None:
+        instruments = Instrumentation()
+    global shard_index, shard_count, entry_store, all_entries, search_indexes
+    global jmdict_furigana, jmnedict_furigana, romaji, tag_table
+    shard_index, shard_count = index, count
+    entry_store = store
+    search_indexes = search
+    all_entries = SpilledEntryLists(spill_dir) if spill_dir else EntryLists()
+    if store is not None:
+        store.for_shard(index, count)
+        if spill_dir:
+            store.spill(spill_dir)
+    jmdict_furigana = sources["jmdict_furigana"]
+    jmnedict_furigana = sources["jmnedict_furigana"]
+    romaji = sources["romaji"]
+    tag_table = sources["tags"]
+
+    char_dict_data = sources["char_dict"]
+    word_dict_data = sources["word_dict"]
+    kanjidic_data = sources["kanjidic"]
+    jmdict_data = sources["jmdict"]
+    jmnedict_data = sources["jmnedict"]
+    japanese_chinese_map = sources["japanese_chinese_map"]
+
+    print("Processing Chinese character entries...")
+    with instruments.stage("process_chinese_char", len(char_dict_data)) as progress:
+        for index, entry in enumerate(progress.track(char_dict_data)):
+            process_chinese_char_entry(entry, index)
+
+    print("Processing Chinese word entries...")
+    with instruments.stage("process_chinese_word", len(word_dict_data)) as progress:
+        for index, entry in enumerate(progress.track(word_dict_data)):
+            process_chinese_word_entry(entry, index)
+
+    # Process Kanjidic entries
+    print("Processing Kanjidic entries...")
+    kanjidic_characters = kanjidic_data["characters"]
+    with instruments.stage("process_kanjidic", len(kanjidic_characters)) as progress:
+        for index, entry in enumerate(progress.track(kanjidic_characters)):
+            process_kanjidic_entry(entry, index)
+
+    # Process JMdict entries
+    print("Processing JMdict entries...")
+    with instruments.stage("process_jmdict") as progress:
+        entries = with_romaji(progress.track(jmdict_data))
+        for index, (entry, kana_romaji) in enumerate(entries):
+            process_jmdict_entry(entry, index, kana_romaji)
+    print(f"Processed JMdict {jmdict_data.header.get('version')}")
+
+    print("Updating entries with Japanese-Chinese mapping...")
+    with instruments.stage("mapping", len(japanese_chinese_map)) as progress:
+        exports = collect_mapping_exports(japanese_chinese_map)
+        if exchange is not None:
+            exports = exchange("exports", exports)
+        apply_japanese_chinese_mapping(japanese_chinese_map, exports)
+        progress.advance(len(japanese_chinese_map))
+    print(f"Updated {len(japanese_chinese_map)} entries with Japanese-Chinese mapping.")
+
+    if getattr(writer, "wants_samples", False):
+        with instruments.stage("dictionary_training") as progress:
+            samples = writer.sample_payloads(all_entries.items())
+            progress.advance(len(samples))
+            if exchange is not None:
+                writer.use_dictionary(exchange("samples", samples))
+            else:
+                writer.train_dictionary(samples)
+
+    instruments.counters["romaji"] = romaji.stats()
+
+    if isinstance(all_entries, SpilledEntryLists):
+        instruments.counters["spilled_entries_bytes"] = all_entries.size()
+        print(f"Spilled the entry lists to {all_entries.size() / 1e6:.1f} MB on disk")
+    print("Writing compressed JSON files...")
+    with instruments.stage("write", len(all_entries)) as progress:
+        stats = write_entries(all_entries, writer, ledger, progress)
+    all_entries.close()
+
+    names_stats = None
+    if names_writer is not None:
+        names_stats = build_names(
+            jmnedict_data, names_writer, names_ledger, instruments, spill_dir
+        )
+
+    if store is not None:
+        with instruments.stage("store") as progress:
+            store_stats = store.write()
+            progress.advance(store_stats.keys)
+        instruments.counters["store"] = store.stats(store_stats)
+        print(f"Entry store: {store_summary(instruments.counters['store'])}")
+    return stats, names_stats
+
+
+def _shard_worker(
+    sources,
+    writer,
+    ledger,
+    index,
+    count,
+    results,
+    inbox,
+    instruments,
+    store,
+    spill_dir,
+    names_writer,
+    names_ledger,
+    search,
+):
+    def exchange(kind, payload):
+        results.put((kind, index, payload))
+        return inbox.get()
+
+    instruments = instruments.for_shard(index)
+    try:
+        stats, names_stats = build_shard(
+            sources,
+            writer,
+            ledger,
+            index,
+            count,
+            exchange,
+            instruments,
+            store,
+            spill_dir,
+            names_writer,
+            names_ledger,
+            search,
+        )
+        search_payload = search.to_payload() if search is not None else None
+        report = instruments.to_dict()
+        results.put(
+            ("done", index, (stats, names_stats, report, romaji.added, search_payload))
+        )
+    except BaseException:
+        results.put(("error", index, traceback.format_exc()))
+
+
+def _gather(results, processes, kind):
+    messages = {}
+    while len(messages) < len(processes):
+        try:
+            message_kind, index, payload = results.get(timeout=1)
+        except queue.Empty:
+            for index, process in enumerate(processes):
+                if process.exitcode not in (None, 0):
+                    raise RuntimeError(
+                        f"Shard {index} exited with code {process.exitcode}"
+                    )
+            continue
+        if message_kind == "error":
+            raise RuntimeError(f"Shard {index} failed:\n{payload}")
+        assert message_kind == kind, (message_kind, kind)
+        messages[index] = payload
+    return [messages[index] for index in range(len(processes))]
+
+
+def build_sharded(
+    sources,
+    writer,
+    ledger,
+    workers,
+    instruments,
+    store=None,
+    spill_dir=None,
+    names_writer=None,
+    names_ledger=None,
+    search=None,
+):
+    """Build the dictionary with one process per shard of the output keys.
+
+    Every worker reads all sources but only processes and writes the keys
+    whose hash falls in its shard. The workers only meet to trade their
+    Japanese-Chinese mapping exports and, when a trained compression
+    dictionary is wanted, their training samples. What they feed their
+    copies of `search` is merged into it at the end.
+    Returns the combined WriteStats of all shards' key files and name files
+    (None without a `names_writer`) and each shard's stage report.
+    """
+    # fork lets the workers share the already loaded datasets copy-on-write
+    # instead of pickling them into every process.
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    results = context.Queue()
+    inboxes = [context.Queue() for _ in range(workers)]
+    processes = [
+        context.Process(
+            target=_shard_worker,
+            args=(
+                sources,
+                writer,
+                ledger,
+                index,
+                workers,
+                results,
+                inboxes[index],
+                instruments,
+                store,
+                spill_dir,
+                names_writer,
+                names_ledger,
+                search,
+            ),
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        merged = merge_mapping_exports(_gather(results, processes, "exports"))
+        for inbox in inboxes:
+            inbox.put(merged)
+        if getattr(writer, "wants_samples", False):
+            samples = [
+                s for shard in _gather(results, processes, "samples") for s in shard
+            ]
+            dictionary = writer.train_dictionary(samples)
+            for inbox in inboxes:
+                inbox.put(dictionary)
+        shard_results = _gather(results, processes, "done")
+    finally:
+        for process in processes:
+            if process.is_alive() and process.exitcode is None:
+                process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+    stats = WriteStats()
+    names_stats = WriteStats() if names_writer is not None else None
+    for shard, names_shard, report, romaji_added, search_payload in shard_results:
+        stats.add(shard)
+        stats.seconds = max(stats.seconds, shard.seconds)
+        if names_stats is not None:
+            names_stats.add(names_shard)
+            names_stats.seconds = max(names_stats.seconds, names_shard.seconds)
+        # Fold the workers' transliteration tables and counts back in so the
+        # table can be saved once.
+        sources["romaji"].update(romaji_added)
+        sources["romaji"].hits += report["counters"]["romaji"]["hits"]
+        sources["romaji"].misses += report["counters"]["romaji"]["misses"]
+        if search is not None:
+            search.merge(search_payload)
+    return stats, names_stats, [report for _, _, report, _, _ in shard_results]
+
+
+def write_manifest(output_dir):
+    # Create a manifest file for Vercel's Build Output API
+    manifest = {
+        "version": 2,
+        "routes": [{"src": "/dictionary/(.*)", "dest": "/dictionary/$1"}],
+        "builds": [{"src": "dictionary/*.json.gz", "use": "@vercel/static"}],
+    }
+    manifest_path = output_dir / "manifest.json"
+    content = jsonio.dumps(manifest, indent=True).decode("utf-8")
+    # Leave an identical manifest alone so its mtime doesn't churn either.
+    if manifest_path.exists() and manifest_path.read_text(encoding="utf-8") == content:
+        return
+    manifest_path.write_text(content, encoding="utf-8")
+
+    print("Created manifest file for Vercel's Build Output API")
+
+
+# vercel.json sits next to package.json and is rewritten by --vercel builds
+# to serve the codecs they wrote.
+VERCEL_CONFIG = Path(__file__).resolve().parent.parent / "vercel.json"
+# The paths served as `.json`, and where their precompressed files are.
+VERCEL_ROUTES = [
+    ("/dictionary/:key.json", "/dictionary/:key.json"),
+    ("/dictionary/:dir(names|search/[^/]+)/:key.json", "/dictionary/:dir/:key.json"),
+]
+# Content negotiation tries these in order; gzip, which every client takes,
+# is served to the ones that accept none of the others.
+NEGOTIATED_CODECS = ("br", "zst", "gzip")
+
+
+def vercel_config(codecs):
+    """The rewrites and headers that serve `/dictionary/{key}.json` as the
+    file of the first of `codecs` the client accepts, gzip otherwise."""
+    served = [CODECS[name] for name in NEGOTIATED_CODECS if name in codecs]
+    json_type = {"key": "Content-Type", "value": "application/json"}
+
+    def accepts(codec):
+        return {
+            "type": "header",
+            "key": "accept-encoding",
+            "value": f"(.*){codec.content_encoding}(.*)",
+        }
+
+    rewrites, headers = [], []
+    for source, destination in VERCEL_ROUTES:
+        declined = []
+        headers.append(
+            {
+                "source": source,
+                "headers": [json_type, {"key": "Vary", "value": "Accept-Encoding"}],
+            }
+        )
+        for codec in served:
+            condition = {}
+            if codec.name != "gzip":
+                condition["has"] = [accepts(codec)]
+            rewrites.append(
+                {
+                    "source": source,
+                    **condition,
+                    "destination": f"{destination}.{codec.extension}",
+                }
+            )
+            if declined:
+                condition["missing"] = declined
+            headers.append(
+                {
+                    "source": source,
+                    **condition,
+                    "headers": [
+                        {"key": "Content-Encoding", "value": codec.content_encoding}
+                    ],
+                }
+            )
+            declined = declined + [accepts(codec)]
+    for name in codecs:
+        codec = CODECS[name]
+        if codec.content_encoding is not None:
+            headers.append(
+                {
+                    "source": f"/dictionary/(.*).json.{codec.extension}",
+                    "headers": [
+                        json_type,
+                        {"key": "Content-Encoding", "value": codec.content_encoding},
+                    ],
+                }
+            )
+    return {"rewrites": rewrites, "headers": headers}
 
 
-print("Processing Chinese character entries...")
-start_time = time.time()
-for index, entry in enumerate(char_dict_data):
-    if index % 1000 == 0:
-        print(f"Processed {index} Chinese character entries")
-    process_chinese_char_entry(entry, index)
-print(
-    f"Processed {len(char_dict_data)} Chinese character entries in {time.time() - start_time:.2f} seconds"
-)
+def write_vercel_config(codecs, path=VERCEL_CONFIG):
+    content = jsonio.dumps(vercel_config(codecs), indent=True).decode("utf-8") + "\n"
+    if path.exists() and path.read_text(encoding="utf-8") == content:
+        return
+    path.write_text(content, encoding="utf-8")
+    print(f"Updated {path.name} to serve {', '.join(codecs)}")
 
-print("Processing Chinese word entries...")
-start_time = time.time()
-for index, entry in enumerate(word_dict_data):
-    if index % 1000 == 0:
-        print(f"Processed {index} Chinese word entries")
-    process_chinese_word_entry(entry, index)
-print(
-    f"Processed {len(word_dict_data)} Chinese word entries in {time.time() - start_time:.2f} seconds"
-)
 
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Process dictionary data with extracted files."
+    )
+    parser.add_argument(
+        "--build", action="store_true", help="Use SvelteKit build output directory"
+    )
+    parser.add_argument(
+        "--vercel", action="store_true", help="Use Vercel build output directory"
+    )
+    parser.add_argument(
+        "--cache-datasets",
+        action="store_true",
+        help="Decompress the dataset archives in parallel up front and keep the "
+        "copies, keyed by archive hash (without it, JMdict and JMnedict are "
+        "decompressed one after the other while they are streamed)",
+    )
+    parser.add_argument(
+        "--no-snapshots",
+        action="store_true",
+        help="Parse every dataset again instead of reading the snapshots of "
+        "unchanged ones",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes to build with, each owning a shard of the output keys",
+    )
+    parser.add_argument(
+        "--write-threads",
+        type=int,
+        default=None,
+        help="Compression/write threads per process (default: cores / workers)",
+    )
+    parser.add_argument(
+        "--packed",
+        type=int,
+        metavar="BUCKETS",
+        default=0,
+        help="Pack the entries into BUCKETS range-readable files with an offset index "
+        "instead of one file per key (must be a multiple of --workers)",
+    )
+    parser.add_argument(
+        "--store",
+        type=int,
+        metavar="BUCKETS",
+        default=0,
+        help="Write every entry listed under more than one key once, into BUCKETS "
+        "range-readable files, and reference it from the key files "
+        "(must be a multiple of --workers)",
+    )
+    parser.add_argument(
+        "--no-names",
+        action="store_true",
+        help=f"Skip JMnedict and leave the {NAMES_DIR}/ folder of proper names alone",
+    )
+    parser.add_argument(
+        "--no-search",
+        action="store_true",
+        help=f"Skip the search indexes and leave the {SEARCH_DIR}/ folder alone",
+    )
+    parser.add_argument(
+        "--spill-entries",
+        nargs="?",
+        type=Path,
+        const=Path(tempfile.gettempdir()),
+        metavar="DIR",
+        help="Collect the entry lists in an SQLite file in DIR (default: the system "
+        "temp folder) instead of in memory, so memory use doesn't grow with the "
+        "sources; keys are then written in sorted order",
+    )
+    parser.add_argument(
+        "--codecs",
+        default="gzip,br",
+        help=f"Comma-separated precompressed variants to write ({', '.join(CODECS)}), "
+        "gzip included; --vercel builds rewrite vercel.json to serve them",
+    )
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Ignore the content-hash ledger and rewrite every file",
+    )
+    parser.add_argument(
+        "--datasets",
+        type=Path,
+        help="Read every dataset from this directory instead of data/datasets/",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Write the dictionary files to this directory",
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        help="Where to write the JSON build report "
+        "(default: .dictionary.report.json next to the output folder)",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record the top allocating lines of every stage with tracemalloc "
+        "(several times slower)",
+    )
+    args = parser.parse_args()
+    if args.packed and args.packed % args.workers:
+        parser.error("--packed must be a multiple of --workers")
+    if args.store and args.store % args.workers:
+        parser.error("--store must be a multiple of --workers")
+    if args.store and args.packed:
+        parser.error("--store and --packed cannot be combined")
+    args.codecs = args.codecs.split(",")
+    for codec in args.codecs:
+        if codec not in CODECS:
+            parser.error(f"Unknown codec {codec!r}")
+    if "gzip" not in args.codecs:
+        parser.error("--codecs must include gzip, for clients that accept nothing else")
+    return args
+
+
+def make_writer(args, output_dir, threads, names=False):
+    """The writer for `output_dir`, or for its NAMES_DIR with `names`.
+
+    Names are all written at the cold levels, and without the trained zstd
+    dictionary, which is trained on the headword files only.
+    """
+    if args.packed:
+        return PackedWriter(output_dir, args.packed, threads=threads)
+    if not names:
+        return DictionaryWriter(
+            output_dir, threads=threads, codecs=args.codecs, is_hot=is_hot_key
+        )
+    output_dir.mkdir(parents=True, exist_ok=True)
+    codecs = [name for name in args.codecs if name != "zstd-dict"]
+    return DictionaryWriter(output_dir, threads=threads, codecs=codecs)
+
+
+def load_ledger(args, path, writer):
+    return Ledger.load(path, writer.output_format, rebuild=args.full_rebuild)
+
+
+def output_counters(stats):
+    return {
+        "keys": stats.keys,
+        "files": stats.files,
+        "raw_bytes": stats.raw_bytes,
+        "written_bytes": stats.written_bytes,
+        "codec_bytes": stats.codec_bytes,
+        "changes": {
+            "added": stats.added,
+            "changed": stats.changed,
+            "unchanged": stats.unchanged,
+            "removed": stats.removed,
+        },
+    }
 
-# Process Kanjidic entries
-print("Processing Kanjidic entries...")
-start_time = time.time()
-for index, entry in enumerate(kanjidic_data["characters"]):
-    if index % 1000 == 0:
-        print(f"Processed {index} Kanjidic entries")
-    process_kanjidic_entry(entry, index)
-print(
-    f"Processed {len(kanjidic_data['characters'])} Kanjidic entries in {time.time() - start_time:.2f} seconds"
-)
 
-# Process JMdict entries
-print("Processing JMdict entries...")
-start_time = time.time()
-for index, entry in enumerate(jmdict_data["words"]):
-    if index % 10000 == 0:
-        print(f"Processed {index} JMdict entries")
-    process_jmdict_entry(entry, index)
-print(
-    f"Processed {len(jmdict_data['words'])} JMdict entries in {time.time() - start_time:.2f} seconds"
-)
+def get_output_dir(args):
+    # Set the output directory based on the arguments
+    if args.output:
+        return args.output.resolve()
+    elif args.vercel:
+        return (
+            Path(__file__).resolve().parent.parent
+            / ".vercel"
+            / "output"
+            / "static"
+            / "dictionary"
+        )
+    elif args.build:
+        return (
+            Path(__file__).resolve().parent.parent
+            / ".svelte-kit"
+            / "output"
+            / "client"
+            / "dictionary"
+        )
+    else:
+        return Path(__file__).resolve().parent.parent / "dictionary"
+
+
+def load_sources(args, instruments):
+    # Datasets are read straight from their archives in datasets/. Files that
+    # were extracted by hand into datasets/extracted/ are still picked up as a
+    # fallback.
+    datasets_dir = DATASETS_DIR
+    extracted_dir = datasets_dir / "extracted"
+    dataset_dirs = [args.datasets] if args.datasets else [datasets_dir, extracted_dir]
+
+    # Load all datasets
+    with instruments.stage("load") as progress:
+        dataset_files = prepare_datasets(
+            DATASET_PATTERNS,
+            dataset_dirs,
+            cache_dir=CACHE_DIR if args.cache_datasets else None,
+        )
+        for name, file_path in dataset_files.items():
+            print(f"Using {file_path.name} for {name}")
+
+        # Unchanged datasets are read back from their snapshots instead of
+        # being decompressed and parsed again.
+        snapshots = SnapshotCache(SNAPSHOT_DIR, enabled=not args.no_snapshots)
+        sources = {
+            # JMdict and JMnedict are streamed entry by entry (as are the
+            # furigana lists below) so their raw parse trees never have to fit
+            # in memory.
+            "jmdict": snapshots.stream("jmdict", dataset_files["jmdict"]),
+            "jmnedict": snapshots.stream("jmnedict", dataset_files["jmnedict"]),
+        }
+        sources.update(
+            snapshots.load_files(
+                {
+                    name: dataset_files[name]
+                    for name in ("kanjidic", "char_dict", "word_dict")
+                }
+            )
+        )
+        progress.advance(
+            len(sources["kanjidic"]["characters"])
+            + len(sources["char_dict"])
+            + len(sources["word_dict"])
+        )
+
+        start = time.perf_counter()
+        variants = VariantIndex(dataset_files["char_dict"], cache_dir=CACHE_DIR).load(
+            sources["char_dict"]
+        )
+        snapshots.record(
+            "japanese_chinese_map", variants.from_cache, time.perf_counter() - start
+        )
+        sources["japanese_chinese_map"] = variants.variants
+        print(
+            f"{'Loaded' if variants.from_cache else 'Found'} {len(variants)} "
+            f"Japanese-Chinese mappings"
+        )
+
+    print("All datasets loaded successfully.")
+
+    # Both furigana indexes are loaded before any shard workers fork, so they
+    # share them; JMnedict's is only needed (and loaded) when names are built.
+    print("Pre-processing furigana data...")
+    with instruments.stage("furigana") as progress:
+        sources["jmdict_furigana"] = FuriganaIndex(
+            dataset_files["jmdict_furigana"],
+            CACHE_DIR,
+            on_load=partial(snapshots.record, "jmdict_furigana"),
+        ).load()
+        progress.advance(len(sources["jmdict_furigana"]))
+    sources["jmnedict_furigana"] = FuriganaIndex(
+        dataset_files["jmnedict_furigana"],
+        CACHE_DIR,
+        on_load=partial(snapshots.record, "jmnedict_furigana"),
+    )
+    if not args.no_names:
+        with instruments.stage("furigana_jmnedict") as progress:
+            progress.advance(len(sources["jmnedict_furigana"].load()))
+    sources["romaji"] = Transliterator().load(ROMAJI_TABLE)
+    sources["tags"] = TagTable.from_headers(
+        sources["jmdict"].read_header(), sources["jmnedict"].read_header()
+    )
+    sources["snapshots"] = snapshots
+    return sources
+
+
+def main():
+    args = parse_args()
+    output_dir = get_output_dir(args)
+    print(f"Output directory: {output_dir}")
+    print(f"Using {jsonio.BACKEND} for JSON")
+
+    report_path = args.report or report_path_for(output_dir)
+    instruments = Instrumentation(
+        trace_memory=args.trace_memory, previous_report=load_report(report_path)
+    )
+    sources = load_sources(args, instruments)
+
+    # Ensure the output directory exists
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    threads = args.write_threads or max(1, (os.cpu_count() or 1) // args.workers)
+    writer = make_writer(args, output_dir, threads)
+    store = EntryStore(output_dir, args.store, threads=threads) if args.store else None
+    ledger = load_ledger(args, Ledger.path_for(output_dir), writer)
+    names_writer = names_ledger = None
+    if not args.no_names:
+        names_writer = make_writer(args, output_dir / NAMES_DIR, threads, names=True)
+        names_ledger = load_ledger(
+            args, Ledger.path_for(output_dir, NAMES_DIR), names_writer
+        )
+    search = None
+    if not args.no_search:
+        search = SearchIndexes(output_dir / SEARCH_DIR, args.codecs, threads)
+    if args.workers > 1:
+        print(f"Building with {args.workers} shard workers...")
+        stats, names_stats, shard_reports = build_sharded(
+            sources,
+            writer,
+            ledger,
+            args.workers,
+            instruments,
+            store,
+            args.spill_entries,
+            names_writer,
+            names_ledger,
+            search,
+        )
+    else:
+        stats, names_stats = build_shard(
+            sources,
+            writer,
+            ledger,
+            instruments=instruments,
+            store=store,
+            spill_dir=args.spill_entries,
+            names_writer=names_writer,
+            names_ledger=names_ledger,
+            search=search,
+        )
+        shard_reports = []
+
+    Ledger(ledger.path, writer.output_format, stats.hashes).save()
+    if args.packed:
+        writer.write_meta()
+    elif writer.wants_samples:
+        writer.publish_dictionary()
+    if names_writer is not None:
+        Ledger(names_ledger.path, names_writer.output_format, names_stats.hashes).save()
+        if args.packed:
+            names_writer.write_meta()
+        instruments.counters["names"] = output_counters(names_stats)
+        print(f"Total name keys: {names_stats.keys}")
+        print(f"Name changes since the last build: {names_stats.changes_summary()}")
+        if names_stats.files:
+            print(f"Compressed name file sizes: {names_stats.codec_summary()}")
+    if search is not None:
+        print("Writing the search indexes...")
+        with instruments.stage("search") as progress:
+            instruments.counters["search"] = search.write(args.full_rebuild)
+            progress.advance(len(search))
+        for name, counters in instruments.counters["search"].items():
+            print(f"Search index {name}: {search_summary(counters)}")
+    if store is not None:
+        store.write_meta()
+        if shard_reports:
+            instruments.counters["store"] = {
+                name: sum(report["counters"]["store"][name] for report in shard_reports)
+                for name in shard_reports[0]["counters"]["store"]
+            }
+            print(f"Entry store: {store_summary(instruments.counters['store'])}")
+    print(f"Total processed entries: {stats.keys}")
+    print(f"Compressed sizes over the files written: {stats.codec_summary()}")
+    print(f"Changes since the last build: {stats.changes_summary()}")
+    print(f"Romaji: {sources['romaji'].summary()}")
+    writer.write_file(LEGEND_FILE, sources["tags"].to_json())
+    print(f"Wrote the legend of {len(sources['tags'])} tag codes")
+    sources["romaji"].save(ROMAJI_TABLE)
+    instruments.counters["romaji"] = sources["romaji"].stats()
+    instruments.counters["snapshots"] = sources["snapshots"].results
+    print(f"Compressed dictionary files have been written to: {output_dir}")
+
+    write_report(
+        report_path,
+        {
+            "args": vars(args),
+            "json_backend": jsonio.BACKEND,
+            **instruments.to_dict(),
+            "shards": shard_reports,
+            "output": output_counters(stats),
+        },
+    )
+    print(f"Build report written to: {report_path}")
+
+    write_manifest(output_dir)
+    if args.vercel:
+        write_vercel_config(args.codecs)
 
-# # Process JMnedict entries
-# print("Processing JMnedict entries...")
-# start_time = time.time()
-# for index, entry in enumerate(jmnedict_data["words"]):
-#     if index % 1000 == 0:
-#         print(f"Processed {index} JMnedict entries")
-#     process_jmnedict_entry(entry, index)
-# print(
-#     f"Processed {len(jmnedict_data['words'])} JMnedict entries in {time.time() - start_time:.2f} seconds"
-# )
-
-# Add this after processing all entries and before writing JSON files
-print("Updating entries with Japanese-Chinese mapping...")
-for jp_char, ch_chars in japanese_chinese_map.items():
-    # Add c_j to traditional and simplified entries
-    if ch_chars["t"] in all_entries:
-        all_entries[ch_chars["t"]]["c_j"] = all_entries[ch_chars["t"]].get(
-            "c_j", []
-        ) + [all_entries[jp_char].get("c_j", [])]
-    if ch_chars["s"] in all_entries and ch_chars["s"] != ch_chars["t"]:
-        all_entries[ch_chars["s"]]["c_j"] = all_entries[ch_chars["s"]].get(
-            "c_j", []
-        ) + [all_entries[jp_char].get("c_j", [])]
-
-    # Add c_c to Japanese entry
-    if jp_char in all_entries and ch_chars["t"] in all_entries:
-        all_entries[jp_char]["c_c"] = all_entries[jp_char].get("c_c", []) + [
-            all_entries[ch_chars["t"]].get("c_c", [])
-        ]
-
-print(f"Updated {len(japanese_chinese_map)} entries with Japanese-Chinese mapping.")
-
-
-# Ensure the output directory exists
-output_dir.mkdir(parents=True, exist_ok=True)
-
-print("Writing compressed JSON files...")
-start_time = time.time()
-total_processed = 0
-
-for key, entries_list in all_entries.items():
-    if total_processed % 1000 == 0:
-        print(f"Wrote {total_processed} compressed JSON files")
-
-    file_path = output_dir / f"{key}.json.gz"
-    with gzip.open(file_path, "wt", encoding="utf-8") as f:
-        json.dump(entries_list, f, ensure_ascii=False, separators=(",", ":"))
-
-    total_processed += 1
-
-print(f"Total processed entries: {total_processed}")
-print(f"Compressed dictionary files have been written to: {output_dir}")
-print(f"Total writing time: {time.time() - start_time:.2f} seconds")
-
-# Create a manifest file for Vercel's Build Output API
-manifest = {
-    "version": 2,
-    "routes": [{"src": "/dictionary/(.*)", "dest": "/dictionary/$1"}],
-    "builds": [{"src": "dictionary/*.json.gz", "use": "@vercel/static"}],
-}
-with open(output_dir / "manifest.json", "w", encoding="utf-8") as f:
-    json.dump(manifest, f, indent=2)
 
-print("Created manifest file for Vercel's Build Output API")
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,3 @@
-import json
 import os
 import gzip
 import sys
@@ -12,16 +11,23 @@ from data.jp.kanjidic import load_kanjidic, Kanjidic2Character
 from data.jp.jmnedict import load_jmnedict, JMnedictWord
 from data.zh.char_dict import load_chinese_char_dict, ChineseCharEntry
 from data.zh.word_dict import load_chinese_word_dict, ChineseWordEntry
-
-# Load j2ch mapping and exceptions
-with open("data/j2ch/j2ch.json", "r", encoding="utf-8") as file:
-    j2ch = json.load(file)
-
-# Load Japanese variants mapping
-with open(
-    "data/zh/char_dict/japanese_variants_mapping.json", "r", encoding="utf-8"
-) as file:
-    japanese_variants_map = json.load(file)
+from data.loaders import find_dataset
+from data.main import CACHE_DIR, DATASETS_DIR
+from data.variants import VariantIndex
+
+# Japanese variant <-> traditional/simplified characters and the j2ch mapping,
+# cached per char dict version, or from japanese_variants_mapping.json without
+# a char dict
+try:
+    char_dict_path = find_dataset(
+        "dictionary_char_*.jsonl",
+        Path(__file__).resolve().parent / "zh" / "char_dict",
+        DATASETS_DIR,
+        DATASETS_DIR / "extracted",
+    )
+    variants = VariantIndex(char_dict_path, cache_dir=CACHE_DIR).load()
+except FileNotFoundError:
+    variants = VariantIndex.from_mapping_file()
 
 j_exceptions = {
     # ... (keep your existing exceptions)
@@ -29,7 +35,7 @@ j_exceptions = {
 
 
 def j2ch_get(j):
-    return j2ch.get(j, j)
+    return variants.j2ch_char(j)
 
 
 def generate_combinations2(key):
@@ -81,18 +87,9 @@ for kanji, entry in kanjidic.characters.items():
         )
         continue
 
-    # Check if the kanji is in the Japanese variants mapping
-    japanese_variant = next(
-        (item for item in japanese_variants_map if kanji in item), None
-    )
-
-    if japanese_variant:
-        # Use the traditional Chinese equivalent
-        zh_char = japanese_variant[kanji]["t"]
-        print(zh_char)
-    else:
-        # If not in the mapping, use the original kanji
-        zh_char = kanji
+    # Use the traditional Chinese equivalent of a Japanese variant, or else
+    # the original kanji
+    zh_char = variants.traditional(kanji)
 
     # Add the entry under "j_c"
     data[kanji]["j_c"].append(entry.to_dict())
@@ -0,0 +1,129 @@
+"""Measure multi-radical kanji search with 1 to 5 radicals.
+
+The queries are made from KRADFILE itself: for every radical count a random
+kanji with at least that many radicals is picked and that many of its
+radicals are searched for, so every query finds something, the way a user
+narrowing down a kanji they are looking at would. Every query is timed on
+the bitsets of RadicalIndex (data/radicals.py) and, as a baseline, as an
+intersection of Python sets of kanji sorted afterwards, both without and
+with a stroke count range around the picked kanji's own count. The export
+the client intersects in is sized too.
+
+    python -m data.radical_benchmark --queries 2000
+"""
+
+import argparse
+import gzip
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from data import jsonio
+from data.jp.kradfile.type import load_kradfile
+from data.jp.radkfile.type import load_radkfile
+from data.loaders import find_dataset, open_dataset
+from data.main import DATASET_PATTERNS, DATASETS_DIR
+from data.radicals import RadicalIndex, Strokes, stroke_counts
+
+Query = Tuple[List[str], Optional[Strokes]]
+
+
+def make_queries(
+    kanji_radicals: Dict[str, List[str]],
+    counts: Dict[str, int],
+    radical_count: int,
+    queries: int,
+    rng: random.Random,
+    with_strokes: bool,
+) -> List[Query]:
+    candidates = sorted(
+        char
+        for char, radicals in kanji_radicals.items()
+        if len(radicals) >= radical_count
+    )
+    made = []
+    for char in rng.choices(candidates, k=queries):
+        radicals = rng.sample(kanji_radicals[char], radical_count)
+        strokes = None
+        if with_strokes and char in counts:
+            strokes = (counts[char] - 1, counts[char] + 1)
+        made.append((radicals, strokes))
+    return made
+
+
+def time_queries(search: Callable[[Query], List[str]], queries: List[Query]):
+    """Microseconds per query (sorted) and the mean number of kanji found."""
+    times = []
+    found = 0
+    for query in queries:
+        start = time.perf_counter()
+        found += len(search(query))
+        times.append((time.perf_counter() - start) * 1e6)
+    return sorted(times), found / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=1000, help="Per radical count")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    kanjidic_path = find_dataset(
+        DATASET_PATTERNS["kanjidic"], DATASETS_DIR, DATASETS_DIR / "extracted"
+    )
+    with open_dataset(kanjidic_path) as f:
+        counts = stroke_counts(jsonio.load(f)["characters"])
+    radkfile, kradfile = load_radkfile(), load_kradfile()
+    start = time.perf_counter()
+    index = RadicalIndex.from_files(radkfile, kradfile, counts)
+    build_ms = (time.perf_counter() - start) * 1000
+    payload = jsonio.dumps(index.to_payload())
+    print(
+        f"{index!r} built in {build_ms:.0f} ms, export {len(payload) / 1024:.1f} KB, "
+        f"{len(gzip.compress(payload, 9)) / 1024:.1f} KB gzipped"
+    )
+
+    sets = {
+        radical: frozenset(index.kanji_of(bits)) for radical, bits in index.bits.items()
+    }
+    empty = frozenset()
+
+    def set_search(query: Query) -> List[str]:
+        radicals, strokes = query
+        found = frozenset.intersection(*(sets.get(r, empty) for r in radicals))
+        if strokes is not None:
+            low, high = strokes
+            found = {char for char in found if low <= counts.get(char, 0) <= high}
+        return sorted(found, key=index.ids.__getitem__)
+
+    def bitset_search(query: Query) -> List[str]:
+        return index.search(*query)
+
+    rng = random.Random(args.seed)
+    print(
+        f"  {'radicals':<10}{'strokes':<9}{'found':>8}"
+        f"{'bitset µs':>12}{'p95':>8}{'sets µs':>12}{'p95':>8}"
+    )
+    for with_strokes in (False, True):
+        for radical_count in range(1, 6):
+            queries = make_queries(
+                kradfile.kanji, counts, radical_count, args.queries, rng, with_strokes
+            )
+            bitset_times, found = time_queries(bitset_search, queries)
+            set_times, _ = time_queries(set_search, queries)
+
+            def mean(times):
+                return sum(times) / len(times)
+
+            def p95(times):
+                return times[int(len(times) * 0.95)]
+
+            print(
+                f"  {radical_count:<10}{'±1' if with_strokes else '-':<9}{found:>8.1f}"
+                f"{mean(bitset_times):>12.1f}{p95(bitset_times):>8.1f}"
+                f"{mean(set_times):>12.1f}{p95(set_times):>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
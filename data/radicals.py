@@ -0,0 +1,187 @@
+"""Multi-radical kanji search over RADKFILE and KRADFILE.
+
+Kanji are numbered in stroke order, so the kanji with a stroke count in a
+range are a run of numbers, and every radical keeps the numbers of its kanji
+as a bitset (a Python int). A query is the AND of the bitsets of its
+radicals and, with a stroke count, of the mask of that run.
+
+    index = RadicalIndex.load(stroke_counts)
+    index.search(["口", "木"], strokes=(7, 9))
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from data.jp.kradfile.type import Kradfile, load_kradfile
+from data.jp.radkfile.type import Radkfile, load_radkfile
+
+RADICALS_DIR = "radicals"
+RADICALS_FILE = "index.json"
+# Sorts the kanji without a Kanjidic stroke count after every other one.
+UNKNOWN_STROKES = 1 << 10
+_LOW_BIT_STEPS = 16
+
+Strokes = Union[int, Tuple[int, int]]
+
+
+class RadicalIndex:
+    """Kanji by the radicals (components) they are written with.
+
+    RADKFILE lists the kanji of every radical and KRADFILE the radicals of
+    every kanji; the two mostly agree, and the index takes the union. Kanji
+    are ordered by their Kanjidic stroke count, then by code point, with the
+    ones Kanjidic doesn't have (JIS X 0212 kanji, mostly) last, where a
+    stroke count never matches them.
+    """
+
+    def __init__(
+        self,
+        radicals: Dict[str, Iterable[str]],
+        stroke_counts: Dict[str, int],
+        radical_strokes: Optional[Dict[str, int]] = None,
+    ):
+        members = {radical: set(kanji) for radical, kanji in radicals.items()}
+        every_kanji = set().union(*members.values()) if members else set()
+        self.kanji: List[str] = sorted(
+            every_kanji,
+            key=lambda char: (stroke_counts.get(char) or UNKNOWN_STROKES, char),
+        )
+        self.ids = {char: i for i, char in enumerate(self.kanji)}
+        # stroke_starts[n] is the number of the first kanji with n or more
+        # strokes; its last entry is where the kanji without one start.
+        known = [stroke_counts[char] for char in self.kanji if stroke_counts.get(char)]
+        self.stroke_starts: List[int] = [
+            bisect_left(known, count) for count in range(max(known, default=0) + 2)
+        ]
+        radical_strokes = radical_strokes or {}
+        self.radical_strokes: Dict[str, int] = {
+            radical: radical_strokes.get(radical) or stroke_counts.get(radical, 0)
+            for radical in members
+        }
+        # In the order a radical picker lists them: by stroke count.
+        self.bits: Dict[str, int] = {}
+        for radical in sorted(members, key=lambda r: (self.radical_strokes[r], r)):
+            bits = 0
+            for char in members[radical]:
+                bits |= 1 << self.ids[char]
+            self.bits[radical] = bits
+
+    @classmethod
+    def from_files(
+        cls, radkfile: Radkfile, kradfile: Kradfile, stroke_counts: Dict[str, int]
+    ) -> "RadicalIndex":
+        radicals = {
+            radical: list(info.kanji) for radical, info in radkfile.radicals.items()
+        }
+        for char, components in kradfile.kanji.items():
+            for radical in components:
+                radicals.setdefault(radical, []).append(char)
+        radical_strokes = {
+            radical: info.stroke_count for radical, info in radkfile.radicals.items()
+        }
+        return cls(radicals, stroke_counts, radical_strokes)
+
+    @classmethod
+    def load(cls, stroke_counts: Dict[str, int]) -> "RadicalIndex":
+        """The index of the RADKFILE and KRADFILE kept in data/jp/."""
+        return cls.from_files(load_radkfile(), load_kradfile(), stroke_counts)
+
+    def __repr__(self):
+        return (
+            f"RadicalIndex(radical_count={len(self.bits)}, "
+            f"kanji_count={len(self.kanji)})"
+        )
+
+    def __len__(self):
+        return len(self.kanji)
+
+    def stroke_mask(self, strokes: Strokes) -> int:
+        """The bits of the kanji with `strokes` strokes, a count or a range."""
+        low, high = (strokes, strokes) if isinstance(strokes, int) else strokes
+        last = len(self.stroke_starts) - 1
+        start = self.stroke_starts[min(max(low, 0), last)]
+        end = self.stroke_starts[min(max(high + 1, 0), last)]
+        return ((1 << end) - 1) ^ ((1 << start) - 1) if end > start else 0
+
+    def matching(self, radicals: Iterable[str], strokes: Optional[Strokes] = None):
+        """The bitset of the kanji with every one of `radicals`."""
+        bits = (1 << len(self.kanji)) - 1
+        for radical in radicals:
+            bits &= self.bits.get(radical, 0)
+            if not bits:
+                return 0
+        if strokes is not None:
+            bits &= self.stroke_mask(strokes)
+        return bits
+
+    def kanji_of(self, bits: int) -> List[str]:
+        """The kanji of a bitset, in stroke order."""
+        return [self.kanji[number] for number in _numbers(bits)]
+
+    def search(
+        self, radicals: Iterable[str], strokes: Optional[Strokes] = None
+    ) -> List[str]:
+        """The kanji written with all of `radicals`, fewest strokes first.
+
+        `strokes` keeps only the kanji with that many strokes, or with a
+        count in an inclusive `(low, high)` range.
+        """
+        return self.kanji_of(self.matching(radicals, strokes))
+
+    def remaining_radicals(
+        self, radicals: Iterable[str], strokes: Optional[Strokes] = None
+    ) -> List[str]:
+        """The radicals that can still be added to a query without emptying it,
+        for a picker to grey out the others."""
+        bits = self.matching(radicals, strokes)
+        return [radical for radical, own in self.bits.items() if own & bits]
+
+    def to_payload(self) -> Dict:
+        """The static export intersected by src/lib/radicals.ts.
+
+        The kanji numbers of every radical are a sorted array stored as the
+        gaps between them (the first number plus one, then the differences),
+        which are small numbers that compress well.
+        """
+        radicals = {}
+        for radical in self.bits:
+            gaps = []
+            previous = -1
+            for number in _numbers(self.bits[radical]):
+                gaps.append(number - previous)
+                previous = number
+            radicals[radical] = [self.radical_strokes[radical], gaps]
+        return {
+            "format": 1,
+            "kanji": "".join(self.kanji),
+            "stroke_starts": self.stroke_starts,
+            "radicals": radicals,
+        }
+
+
+def _numbers(bits: int) -> List[int]:
+    """The positions of the set bits of `bits`, lowest first."""
+    numbers = []
+    # Taking the lowest bit off is cheapest for the few kanji most queries
+    # find, reading bin() for the rest when there are more.
+    while bits and len(numbers) < _LOW_BIT_STEPS:
+        low = bits & -bits
+        numbers.append(low.bit_length() - 1)
+        bits ^= low
+    if not bits:
+        return numbers
+    digits = bin(bits)[:1:-1]
+    number = digits.find("1")
+    while number != -1:
+        numbers.append(number)
+        number = digits.find("1", number + 1)
+    return numbers
+
+
+def stroke_counts(kanjidic_characters: Iterable[Dict]) -> Dict[str, int]:
+    """The first (accepted) stroke count of every Kanjidic character."""
+    return {
+        character["literal"]: character["misc"]["strokeCounts"][0]
+        for character in kanjidic_characters
+        if character["misc"]["strokeCounts"]
+    }
@@ -0,0 +1,140 @@
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import jaconv
+
+from data import jsonio
+
+# Conversions kept in memory; past this the oldest ones are dropped.
+MAX_ENTRIES = 1 << 20
+# A batch is converted as one string with its kana joined by newlines, which
+# none of jaconv's replacements reach across. Only its small tsu looks at the
+# start and end of the text, so kana with one are converted on their own.
+_SEPARATOR = "\n"
+_ALONE = ("っ", "ッ", _SEPARATOR)
+
+
+def default_converter_name() -> str:
+    return f"jaconv {jaconv.__version__} kata2alphabet"
+
+
+class Transliterator:
+    """Memoized kana -> romaji conversion.
+
+    JMdict converts the same few hundred thousand kana strings over and over
+    (once per kanji form and again per reading element), so every result is
+    kept in a bounded table. When full, the oldest conversions are evicted
+    first, which costs nothing on a hit, unlike LRU bookkeeping. The table
+    can be saved and loaded between builds; it is tagged with the converter
+    so a jaconv upgrade starts from scratch.
+
+    `join_batches` says whether `convert` can convert several kana joined by
+    newlines in one call, as jaconv can; `batch` falls back to one call per
+    kana otherwise.
+    """
+
+    def __init__(
+        self,
+        convert: Callable[[str], str] = jaconv.kata2alphabet,
+        converter_name: Optional[str] = None,
+        max_entries: int = MAX_ENTRIES,
+        join_batches: bool = True,
+    ):
+        self.convert = convert
+        self.join_batches = join_batches
+        self.converter_name = converter_name or default_converter_name()
+        self.max_entries = max_entries
+        self.table: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        # Conversions made since the table was loaded, for merging the tables
+        # of shard workers back into one.
+        self.added: Dict[str, str] = {}
+
+    def __call__(self, kana: str) -> str:
+        romaji = self.table.get(kana)
+        if romaji is not None:
+            self.hits += 1
+            return romaji
+        self.misses += 1
+        romaji = self.convert(kana)
+        self._store(kana, romaji)
+        return romaji
+
+    def batch(self, kanas: Iterable[str]) -> Dict[str, str]:
+        """Convert the distinct kana strings of `kanas`, the ones not in the
+        table yet in a single call of the converter."""
+        conversions: Dict[str, str] = {}
+        missing = []
+        for kana in dict.fromkeys(kanas):
+            romaji = self.table.get(kana)
+            if romaji is None:
+                missing.append(kana)
+            else:
+                conversions[kana] = romaji
+        self.hits += len(conversions)
+        self.misses += len(missing)
+        joined = []
+        if self.join_batches and len(missing) > 1:
+            joined = [kana for kana in missing if not any(c in kana for c in _ALONE)]
+        if len(joined) > 1:
+            converted = self.convert(_SEPARATOR.join(joined)).split(_SEPARATOR)
+            if len(converted) == len(joined):
+                conversions.update(zip(joined, converted))
+        for kana in missing:
+            romaji = conversions.get(kana)
+            if romaji is None:
+                romaji = conversions[kana] = self.convert(kana)
+            self._store(kana, romaji)
+        return conversions
+
+    def _store(self, kana: str, romaji: str):
+        if len(self.table) >= self.max_entries:
+            del self.table[next(iter(self.table))]
+        self.table[kana] = romaji
+        self.added[kana] = romaji
+
+    def update(self, conversions: Dict[str, str]):
+        for kana, romaji in conversions.items():
+            if kana not in self.table:
+                self._store(kana, romaji)
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "entries": len(self.table),
+        }
+
+    def summary(self) -> str:
+        return (
+            f"{self.hits + self.misses} conversions, {self.hit_rate:.1%} from the "
+            f"cache ({self.misses} converted, {len(self.table)} cached)"
+        )
+
+    def load(self, path: Path) -> "Transliterator":
+        """Start from a table saved by an earlier build, if it is compatible."""
+        try:
+            with open(path, "rb") as f:
+                saved = jsonio.load(f)
+        except (OSError, ValueError):
+            return self
+        if saved.get("converter") == self.converter_name:
+            self.table.update(saved["table"])
+        return self
+
+    def save(self, path: Path):
+        if not self.added and path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            jsonio.dump({"converter": self.converter_name, "table": self.table}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,714 @@
+import math
+import re
+import time
+import unicodedata
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from data import jsonio
+from data.radicals import RADICALS_DIR, RADICALS_FILE, RadicalIndex
+from data.sharding import shard_of
+from data.stemming import gloss_terms
+from data.writer import (
+    CODECS,
+    DictionaryWriter,
+    Ledger,
+    WriteStats,
+    write_precompressed,
+)
+
+SEARCH_DIR = "search"
+# The rank of keys without any frequency data, after every ranked one.
+UNRANKED = 1 << 30
+# JMdict only flags words as common; that puts them about level with the
+# first ten thousand words of the frequency-ranked sources.
+COMMON_WORD_RANK = 10000
+# The statistics ranks of the Chinese char/word dict, best first.
+STATISTICS_RANKS = (
+    "movieWordRank",
+    "bookWordRank",
+    "movieCharRank",
+    "bookCharRank",
+)
+
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+_VOWELS = "aeiou"
+_REPEATED_VOWELS = re.compile(r"([aeiou])\1+")
+# Serialized bytes per shard of the hash-sharded indexes (romaji, pinyin),
+# which gzip to about 4 KB.
+SHARD_BYTES = 12 * 1024
+# The combining marks of the four pinyin tones, after NFD.
+_TONE_MARKS = {"\u0304": 1, "\u0301": 2, "\u030c": 3, "\u0300": 4}
+_DIAERESIS = "\u0308"
+_PINYIN_TOKEN = re.compile(r"[a-z:\u0300-\u036f]+[0-5]?")
+# Keys kept per gloss term, best first; a query with a term this common
+# is narrowed down by its other terms.
+MAX_POSTINGS = 256
+
+
+def normalize_term(text: str) -> str:
+    """The form terms are indexed in and queries compared in.
+
+    NFKC folds full- and half-width forms, then the text is lowercased, its
+    katakana turned into hiragana (so らーめん finds ラーメン) and everything
+    but letters and digits dropped. src/lib/search.ts normalizes queries the
+    same way.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = text.translate(_KATAKANA_TO_HIRAGANA)
+    return "".join(char for char in text if char.isalnum())
+
+
+def romaji_term(romaji: str) -> str:
+    """normalize_term for the transliterator's romaji, whose katakana
+    long-vowel marks are spelled out as the vowel before them."""
+    if "ー" in romaji:
+        chars = []
+        for char in romaji:
+            if char == "ー":
+                if not chars or chars[-1] not in _VOWELS:
+                    continue
+                char = chars[-1]
+            chars.append(char)
+        romaji = "".join(chars)
+    return normalize_term(romaji)
+
+
+def romaji_key(romaji: str) -> str:
+    """The form romaji is looked up by in the romaji index.
+
+    On top of romaji_term, macrons and circumflexes are dropped and long
+    vowels written any way (ou, oo, aa, ...) become one vowel, so tōkyō,
+    toukyou and tokyo all meet at "tokyo". m before b or p is spelled n,
+    as in shimbun. src/lib/search.ts applies the same to queries.
+    """
+    text = unicodedata.normalize("NFKD", romaji)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = romaji_term(text)
+    text = text.replace("ou", "o").replace("mb", "nb").replace("mp", "np")
+    return _REPEATED_VOWELS.sub(r"\1", text)
+
+
+def pinyin_syllables(pinyin: str) -> List[Tuple[str, int]]:
+    """The toneless syllables of space-separated pinyin, each with its tone.
+
+    Takes tone marks ("zhōng guó") and tone numbers ("zhong1 guo2") alike;
+    ü (or u:) is spelled v, and a syllable without a tone has the neutral
+    tone 5.
+    """
+    syllables = []
+    for token in _PINYIN_TOKEN.findall(unicodedata.normalize("NFD", pinyin.lower())):
+        tone = 5
+        if token[-1].isdigit():
+            tone = int(token[-1]) or 5
+            token = token[:-1]
+        letters = []
+        for char in token:
+            if char in _TONE_MARKS:
+                tone = _TONE_MARKS[char]
+            elif char == _DIAERESIS or char == ":":
+                if letters and letters[-1] == "u":
+                    letters[-1] = "v"
+            elif char.isalpha():
+                letters.append(char)
+        if letters:
+            syllables.append(("".join(letters), tone))
+    return syllables
+
+
+def statistics_rank(statistics: Optional[Dict]) -> int:
+    """The best frequency rank of a Chinese char/word dict entry."""
+    if not statistics:
+        return UNRANKED
+    ranks = [statistics[name] for name in STATISTICS_RANKS if statistics.get(name)]
+    return min(ranks, default=UNRANKED)
+
+
+Record = Tuple[int, int, str, str]
+# The name of the chunk of the empty prefix, which no term can start with.
+ROOT_CHUNK = "_"
+
+
+class PrefixIndex:
+    """Autocomplete over every output key by its own form, its readings and
+    their romaji.
+
+    Keys are ranked by `rank` (lower first, see UNRANKED), then by length.
+    The terms are cut into chunks along a trie of their prefixes, starting
+    from the root chunk ROOT_CHUNK. A chunk is a node or a leaf:
+
+        node:  {"top": [key or [term, key], ...], "children": [char, ...]}
+        leaf:  {"records": [key or [term, key], ...]}
+
+    A node keeps the `top` completions of its prefix, after every term that
+    is the prefix itself, and the characters its child chunks start at: the
+    child chunk of prefix + char covers every term going on with a character
+    from char up to the next one listed. A child with more than `leaf_terms`
+    terms is a node of its own; smaller neighbours are packed into leaves of
+    up to `leaf_terms` terms, listed best first, which a longer query filters
+    locally. A key is listed by itself when the term is its own normalized
+    form.
+    """
+
+    def __init__(self, top: int = 10, leaf_terms: int = 256, max_depth: int = 12):
+        self.top = top
+        self.leaf_terms = leaf_terms
+        self.max_depth = max_depth
+        self.ranks: Dict[str, int] = {}
+        # Terms besides the key's own normalized form.
+        self.terms: Dict[str, Set[str]] = {}
+
+    def __repr__(self):
+        return f"PrefixIndex(keys_count={len(self.ranks)})"
+
+    def add(self, key: str, rank: int = UNRANKED, terms: Iterable[str] = ()):
+        if rank < self.ranks.get(key, UNRANKED + 1):
+            self.ranks[key] = rank
+        extra = {term for term in terms if term}
+        if extra:
+            self.terms.setdefault(key, set()).update(extra)
+
+    def to_payload(self):
+        return self.ranks, self.terms
+
+    def merge(self, payload):
+        ranks, terms = payload
+        for key, rank in ranks.items():
+            self.add(key, rank, terms.get(key, ()))
+
+    def _records(self) -> List[Record]:
+        records = []
+        for key, rank in self.ranks.items():
+            for term in {normalize_term(key), *self.terms.get(key, ())}:
+                if term:
+                    records.append((rank, len(key), key, term))
+        records.sort()
+        return records
+
+    @staticmethod
+    def _listed(records: Iterable[Record]) -> List:
+        return [
+            key if term == normalize_term(key) else [term, key]
+            for _, _, key, term in records
+        ]
+
+    def _top(self, exact: List[Record], records: Iterable[Record]) -> List:
+        top, seen = list(exact), {record[2] for record in exact}
+        for record in records:
+            if len(top) >= self.top:
+                break
+            if record[2] not in seen:
+                seen.add(record[2])
+                top.append(record)
+        return self._listed(top)
+
+    def chunks(self) -> Iterator[Tuple[str, Dict]]:
+        """Every `(name, chunk)` of the index, named by its prefix."""
+        pending: List[Tuple[str, List[Record]]] = [("", self._records())]
+        while pending:
+            prefix, records = pending.pop()
+            depth = len(prefix)
+            exact: List[Record] = []
+            children: Dict[str, List[Record]] = {}
+            for record in records:
+                term = record[3]
+                if len(term) > depth:
+                    children.setdefault(term[depth], []).append(record)
+                else:
+                    exact.append(record)
+            starts: List[str] = []
+            packed: List[Record] = []
+            for char in sorted(children):
+                child = children[char]
+                big = len(child) > self.leaf_terms and depth + 1 < self.max_depth
+                if packed and (big or len(packed) + len(child) > self.leaf_terms):
+                    packed.sort()
+                    yield prefix + starts[-1], {"records": self._listed(packed)}
+                    packed = []
+                if big or not packed:
+                    starts.append(char)
+                if big:
+                    pending.append((prefix + char, child))
+                else:
+                    packed.extend(child)
+            if packed:
+                packed.sort()
+                yield prefix + starts[-1], {"records": self._listed(packed)}
+            top = self._top(exact, records)
+            yield prefix or ROOT_CHUNK, {"top": top, "children": starts}
+
+
+def _ranked(keys: Iterable[str], ranks: Dict[str, int]) -> List[str]:
+    return sorted(keys, key=lambda key: (ranks.get(key, UNRANKED), len(key), key))
+
+
+def _shard_count(records: Iterable, shard_bytes: int) -> int:
+    """How many shards of about `shard_bytes` the serialized records fill."""
+    size = sum(len(jsonio.dumps(record)) for record in records)
+    return max(1, math.ceil(size / shard_bytes))
+
+
+class RomajiIndex:
+    """Exact lookup of JMdict keys by the romaji of their readings.
+
+    Every kana key is filed under the romaji_key of its romaji, in one of
+    `shard_count` shards picked by the crc32 of that romaji (see
+    data/sharding.py), so a lookup is one fetch of a few KB:
+
+        {"romaji": {romaji: [kana, ...]}, "kana": {kana: [key, ...]}}
+
+    The kana keys are headwords already, so they are the lookup's results
+    themselves; "kana" only adds the kanji forms read with them, once per
+    shard however many romaji lead to them, and only for the kana that have
+    any. Both lists are ordered by rank.
+    """
+
+    def __init__(self, shard_bytes: int = SHARD_BYTES):
+        self.shard_bytes = shard_bytes
+        self.readings: Dict[str, Set[str]] = {}
+        self.kanji: Dict[str, Set[str]] = {}
+
+    def __repr__(self):
+        return f"RomajiIndex(romaji_count={len(self.readings)})"
+
+    def add_reading(self, kana: str, romaji: str):
+        romaji = romaji_key(romaji)
+        if romaji:
+            self.readings.setdefault(romaji, set()).add(kana)
+
+    def add_kanji(self, kana: str, key: str):
+        self.kanji.setdefault(kana, set()).add(key)
+
+    def to_payload(self):
+        return self.readings, self.kanji
+
+    def merge(self, payload):
+        readings, kanji = payload
+        for romaji, kana in readings.items():
+            self.readings.setdefault(romaji, set()).update(kana)
+        for kana, keys in kanji.items():
+            self.kanji.setdefault(kana, set()).update(keys)
+
+    def chunks(self, ranks: Dict[str, int]) -> Tuple[int, Iterator[Tuple[str, Dict]]]:
+        """The shard count and every `(shard, chunk)`, ranking keys by `ranks`."""
+
+        records = []
+        for romaji in sorted(self.readings):
+            readings = _ranked(self.readings[romaji], ranks)
+            kanji = {}
+            for kana in readings:
+                keys = _ranked(self.kanji.get(kana, ()), ranks)
+                if keys:
+                    kanji[kana] = keys
+            records.append((romaji, readings, kanji))
+        shard_count = _shard_count(records, self.shard_bytes)
+
+        def shards():
+            chunks: Dict[int, Dict] = {}
+            for romaji, kana, kanji in records:
+                chunk = chunks.setdefault(
+                    shard_of(romaji, shard_count), {"romaji": {}, "kana": {}}
+                )
+                chunk["romaji"][romaji] = kana
+                chunk["kana"].update(kanji)
+            for shard in sorted(chunks):
+                yield str(shard), chunks[shard]
+
+        return shard_count, shards()
+
+
+class PinyinIndex:
+    """Lookup of Chinese words and characters by their pinyin, with or
+    without tones and syllable boundaries.
+
+    Every reading is filed under its toneless syllables run together, so
+    "zhongguo", "zhong guo", "zhōngguó" and "zhong1guo2" all look up
+    "zhongguo", in one of `shard_count` shards picked by its crc32:
+
+        {"pinyin": {toneless: [[key, "zhong1 guo2", ...], ...]}}
+
+    Keys come ranked by the best of their `statistics` ranks, each with its
+    readings in tone numbers, which is what a query's tones are checked
+    against (src/lib/search.ts).
+    """
+
+    def __init__(self, shard_bytes: int = SHARD_BYTES):
+        self.shard_bytes = shard_bytes
+        self.ranks: Dict[str, int] = {}
+        # toneless -> key -> toned readings, in the order they were added.
+        self.readings: Dict[str, Dict[str, Dict[str, None]]] = {}
+
+    def __repr__(self):
+        return f"PinyinIndex(pinyin_count={len(self.readings)})"
+
+    def add(self, key: str, rank: int, readings: Iterable[str]):
+        if rank < self.ranks.get(key, UNRANKED + 1):
+            self.ranks[key] = rank
+        for reading in readings:
+            syllables = pinyin_syllables(reading)
+            if not syllables:
+                continue
+            toneless = "".join(syllable for syllable, _ in syllables)
+            toned = " ".join(f"{syllable}{tone}" for syllable, tone in syllables)
+            self.readings.setdefault(toneless, {}).setdefault(key, {})[toned] = None
+
+    def to_payload(self):
+        return self.ranks, self.readings
+
+    def merge(self, payload):
+        ranks, readings = payload
+        for key, rank in ranks.items():
+            self.add(key, rank, ())
+        for toneless, keys in readings.items():
+            merged = self.readings.setdefault(toneless, {})
+            for key, toned in keys.items():
+                merged.setdefault(key, {}).update(toned)
+
+    def chunks(self) -> Tuple[int, Iterator[Tuple[str, Dict]]]:
+        """The shard count and every `(shard, chunk)`."""
+        records = []
+        for toneless in sorted(self.readings):
+            keys = self.readings[toneless]
+            ranked = [[key, *keys[key]] for key in _ranked(keys, self.ranks)]
+            records.append((toneless, ranked))
+        shard_count = _shard_count(records, self.shard_bytes)
+
+        def shards():
+            chunks: Dict[int, Dict] = {}
+            for toneless, ranked in records:
+                shard = shard_of(toneless, shard_count)
+                chunks.setdefault(shard, {"pinyin": {}})["pinyin"][toneless] = ranked
+            for shard in sorted(chunks):
+                yield str(shard), chunks[shard]
+
+        return shard_count, shards()
+
+
+class GlossIndex:
+    """English search over the glosses of JMdict, JMnedict and the Chinese
+    dicts.
+
+    Every gloss is split into stemmed terms (data/stemming.py), and every
+    term lists the keys whose glosses have it with a score: higher for
+    common words, for earlier senses and for shorter glosses, so "eat" puts
+    食べる before the words that only mention eating in their fifth sense.
+    Words and names are listed separately, since names would drown out the
+    words for any term that is also a name.
+
+    The terms are sorted and cut into shards of about `shard_bytes`, named
+    by their position, and meta.json lists the first term of each so that
+    a query term is one fetch:
+
+        {"words": {term: [[key, score], ...]}, "names": {term: [...]}}
+    """
+
+    NAMESPACES = ("words", "names")
+
+    def __init__(self, shard_bytes: int = SHARD_BYTES):
+        self.shard_bytes = shard_bytes
+        # namespace -> term -> key -> best score.
+        self.postings: Dict[str, Dict[str, Dict[str, int]]] = {
+            namespace: {} for namespace in self.NAMESPACES
+        }
+
+    def __repr__(self):
+        return f"GlossIndex(term_count={len(self.terms())})"
+
+    def add(self, namespace: str, key: str, text: str, sense: int, weight: float):
+        """File `key` under the terms of `text`, its gloss in sense `sense`."""
+        terms = set(gloss_terms(text))
+        if not terms:
+            return
+        score = max(1, round(100 * weight / (1 + sense) / math.sqrt(len(terms))))
+        postings = self.postings[namespace]
+        for term in terms:
+            keys = postings.setdefault(term, {})
+            if score > keys.get(key, 0):
+                keys[key] = score
+
+    def terms(self) -> Set[str]:
+        return {term for postings in self.postings.values() for term in postings}
+
+    def to_payload(self):
+        return self.postings
+
+    def merge(self, payload):
+        for namespace, postings in payload.items():
+            merged = self.postings[namespace]
+            for term, keys in postings.items():
+                scores = merged.setdefault(term, {})
+                for key, score in keys.items():
+                    if score > scores.get(key, 0):
+                        scores[key] = score
+
+    def _listed(self, namespace: str, term: str) -> List:
+        keys = self.postings[namespace].get(term)
+        if not keys:
+            return []
+        ranked = sorted(
+            keys.items(), key=lambda item: (-item[1], len(item[0]), item[0])
+        )
+        return [[key, score] for key, score in ranked[:MAX_POSTINGS]]
+
+    def chunks(self) -> Tuple[List[List[str]], Iterator[Tuple[str, Dict]]]:
+        """The terms of every shard and every `(shard, chunk)`."""
+        shards: List[List[str]] = [[]]
+        size = 0
+        records = {}
+        for term in sorted(self.terms()):
+            record = {
+                namespace: self._listed(namespace, term)
+                for namespace in self.NAMESPACES
+            }
+            records[term] = record
+            record_size = len(jsonio.dumps(record))
+            if shards[-1] and size + record_size > self.shard_bytes:
+                shards.append([])
+                size = 0
+            shards[-1].append(term)
+            size += record_size
+
+        def chunks():
+            for shard, terms in enumerate(shards):
+                chunk: Dict[str, Dict] = {name: {} for name in self.NAMESPACES}
+                for term in terms:
+                    for namespace, listed in records[term].items():
+                        if listed:
+                            chunk[namespace][term] = listed
+                yield str(shard), chunk
+
+        return shards, chunks()
+
+
+class SearchIndexes:
+    """The search indexes built next to the dictionary, in `search_dir`.
+
+    The processing steps feed every entry they list under a key to `add_*`;
+    in a sharded build each worker sends its part to the parent with
+    `to_payload`, which `merge`s them before writing.
+    """
+
+    def __init__(self, search_dir, codecs: Iterable[str] = ("gzip",), threads=None):
+        self.search_dir = search_dir
+        # The trained zstd dictionary only exists for the key files.
+        self.codecs = [name for name in codecs if name != "zstd-dict"]
+        self.threads = threads
+        self.prefix = PrefixIndex()
+        self.romaji = RomajiIndex()
+        self.pinyin = PinyinIndex()
+        self.gloss = GlossIndex()
+        # Kanjidic stroke counts, for the radical search.
+        self.stroke_counts: Dict[str, int] = {}
+
+    def __repr__(self):
+        return f"SearchIndexes(search_dir={self.search_dir})"
+
+    def __len__(self):
+        return len(self.prefix.ranks)
+
+    def add_jmdict_entry(self, keys: List[str], entry: Dict):
+        """A minified JMdict entry listed under `keys` (its forms this shard owns)."""
+        common = any(form["common"] for form in entry["kanji"] + entry["reading"])
+        rank = COMMON_WORD_RANK if common else UNRANKED
+        romaji = {reading["text"]: reading["romaji"] for reading in entry["reading"]}
+        for key in keys:
+            if key not in romaji:
+                # A kanji form, found by the readings that apply to it too.
+                terms = []
+                for reading in entry["reading"]:
+                    applies = reading["applies_to_kanji"]
+                    if not applies or key in applies:
+                        terms.append(normalize_term(reading["text"]))
+                        terms.append(romaji_term(reading["romaji"]))
+                        self.romaji.add_kanji(reading["text"], key)
+            else:
+                terms = [romaji_term(romaji[key])]
+                self.romaji.add_reading(key, romaji[key])
+            self.prefix.add(key, rank, terms)
+        # Glosses are filed under the entry's first form only, which is a key
+        # of exactly one shard.
+        primary = (entry["kanji"] or entry["reading"])[0]["text"]
+        if primary in keys:
+            weight = 2 if common else 1
+            for sense_index, sense in enumerate(entry["sense"]):
+                for gloss in sense["gloss"]:
+                    self.gloss.add("words", primary, gloss["text"], sense_index, weight)
+
+    def add_jmnedict_entry(self, keys: List[str], entry: Dict):
+        """A minified JMnedict entry listed under `keys` (its forms this shard owns)."""
+        primary = (entry["kanji"] or entry["reading"] or [None])[0]
+        if primary is None or primary["text"] not in keys:
+            return
+        for sense_index, translation in enumerate(entry["translation"]):
+            for text in translation["text"]:
+                self.gloss.add("names", primary["text"], text, sense_index, 1)
+
+    def add_kanjidic_entry(self, key: str, entry: Dict):
+        self.prefix.add(key, entry["info"].get("frequency") or UNRANKED)
+        if entry["info"]["stroke_counts"]:
+            self.stroke_counts[key] = entry["info"]["stroke_counts"][0]
+
+    def add_chinese_entry(self, key: str, entry: Dict):
+        """A char or word of the Chinese dicts listed under `key`."""
+        rank = statistics_rank(entry.get("statistics"))
+        self.prefix.add(key, rank)
+        if "items" in entry:
+            readings = [item["pinyin"] for item in entry["items"] if item.get("pinyin")]
+            if not readings:
+                # Its tone-numbered syllables, which it follows with toneless
+                # forms.
+                tokens = (entry.get("pinyinSearchString") or "").split()
+                readings = [" ".join(t for t in tokens if any(c.isdigit() for c in t))]
+        else:
+            frequencies = entry.get("pinyinFrequencies") or []
+            readings = [
+                frequency["pinyin"]
+                for frequency in sorted(frequencies, key=lambda f: -f["count"])
+            ]
+        self.pinyin.add(key, rank, readings)
+        # Words are listed under both their forms, but glossed once under the
+        # simplified one.
+        if entry.get("simp", key) == key:
+            weight = 2 if rank <= COMMON_WORD_RANK else 1
+            glosses = [entry.get("gloss") or ""]
+            for item in entry.get("items") or []:
+                glosses.extend(item.get("definitions") or [])
+            for sense_index, gloss in enumerate(glosses):
+                self.gloss.add("words", key, gloss, sense_index, weight)
+
+    def to_payload(self):
+        return {
+            "prefix": self.prefix.to_payload(),
+            "romaji": self.romaji.to_payload(),
+            "pinyin": self.pinyin.to_payload(),
+            "gloss": self.gloss.to_payload(),
+            "stroke_counts": self.stroke_counts,
+        }
+
+    def merge(self, payload):
+        self.prefix.merge(payload["prefix"])
+        self.romaji.merge(payload["romaji"])
+        self.pinyin.merge(payload["pinyin"])
+        self.gloss.merge(payload["gloss"])
+        self.stroke_counts.update(payload["stroke_counts"])
+
+    def write(self, full_rebuild: bool = False) -> Dict[str, Dict]:
+        """Write every index and return its counters by index name."""
+        counters = {}
+        chunks = self.prefix.chunks()
+        counters["prefix"] = self._write_index("prefix", chunks, full_rebuild)
+        shard_count, chunks = self.romaji.chunks(self.prefix.ranks)
+        meta = {"format": 1, "shards": shard_count, "hash": "crc32"}
+        counters["romaji"] = self._write_index("romaji", chunks, full_rebuild, meta)
+        counters["romaji"]["romaji"] = len(self.romaji.readings)
+        shard_count, chunks = self.pinyin.chunks()
+        meta = {"format": 1, "shards": shard_count, "hash": "crc32"}
+        counters["pinyin"] = self._write_index("pinyin", chunks, full_rebuild, meta)
+        counters["pinyin"]["pinyin"] = len(self.pinyin.readings)
+        shards, chunks = self.gloss.chunks()
+        meta = {"format": 1, "starts": [terms[0] for terms in shards if terms]}
+        counters["gloss"] = self._write_index("gloss", chunks, full_rebuild, meta)
+        counters["gloss"]["terms"] = sum(len(terms) for terms in shards)
+        counters["gloss"].update(self._query_bytes("gloss", shards))
+        counters["radicals"] = self._write_radicals()
+        return counters
+
+    def _write_radicals(self) -> Dict:
+        """Write the radical search export, one file the client intersects in."""
+        start_time = time.time()
+        radicals = RadicalIndex.load(self.stroke_counts)
+        radicals_dir = self.search_dir / RADICALS_DIR
+        radicals_dir.mkdir(parents=True, exist_ok=True)
+        codecs = [CODECS[name] for name in self.codecs]
+        path = radicals_dir / RADICALS_FILE
+        write_precompressed(path, jsonio.dumps(radicals.to_payload()), codecs)
+        written = path.with_name(f"{path.name}.{codecs[0].extension}")
+        return {
+            "radicals": len(radicals.bits),
+            "kanji": len(radicals),
+            "bytes": written.stat().st_size,
+            "seconds": round(time.time() - start_time, 3),
+        }
+
+    def _query_bytes(self, name: str, shards: List[List[str]]) -> Dict[str, int]:
+        """What a one-term query of a term-sharded index fetches: meta.json once,
+        then the shard of the term, over every term."""
+        index_dir = self.search_dir / name
+        extension = CODECS[self.codecs[0]].extension
+        meta_bytes = (index_dir / f"meta.json.{extension}").stat().st_size
+        sizes = sorted(
+            (index_dir / f"{shard}.json.{extension}").stat().st_size
+            for shard, terms in enumerate(shards)
+            for _ in terms
+        )
+        return {
+            "meta_bytes": meta_bytes,
+            "mean_query_bytes": round(sum(sizes) / len(sizes)) if sizes else 0,
+            "p95_query_bytes": sizes[int(len(sizes) * 0.95)] if sizes else 0,
+        }
+
+    def _write_index(self, name, chunks, full_rebuild, meta=None) -> Dict:
+        """Write `(name, payload)` chunks to `{search_dir}/{name}/` like key files.
+
+        Chunks get their own ledger, so unchanged ones are left alone and the
+        ones no longer produced are deleted. A `meta` dict is written to the
+        folder's meta.json, precompressed like the chunks.
+        """
+        start_time = time.time()
+        index_dir = self.search_dir / name
+        index_dir.mkdir(parents=True, exist_ok=True)
+        writer = DictionaryWriter(
+            index_dir,
+            threads=self.threads,
+            codecs=self.codecs,
+            # Every chunk is on the path of a whole range of queries.
+            is_hot=lambda prefix, chunk: True,
+        )
+        ledger_path = Ledger.path_for(self.search_dir.parent, f"{SEARCH_DIR}.{name}")
+        ledger = Ledger.load(ledger_path, writer.output_format, rebuild=full_rebuild)
+        stats: WriteStats = writer.write(chunks, ledger)
+        Ledger(ledger_path, writer.output_format, stats.hashes).save()
+        if meta is not None:
+            writer.write_file("meta.json", jsonio.dumps(meta))
+        # What a query costs is the size of the chunks it fetches, in the
+        # first (the most widely supported) codec.
+        extension = writer.codecs[0].extension
+        sizes = sorted(
+            (index_dir / f"{prefix}.json.{extension}").stat().st_size
+            for prefix in stats.hashes
+        )
+        return {
+            "chunks": stats.keys,
+            "bytes": sum(sizes),
+            "mean_chunk_bytes": round(sum(sizes) / len(sizes)) if sizes else 0,
+            "p95_chunk_bytes": sizes[int(len(sizes) * 0.95)] if sizes else 0,
+            "max_chunk_bytes": sizes[-1] if sizes else 0,
+            "changes": {
+                "added": stats.added,
+                "changed": stats.changed,
+                "unchanged": stats.unchanged,
+                "removed": stats.removed,
+            },
+            "seconds": round(time.time() - start_time, 3),
+        }
+
+
+def summary(counters: Dict) -> str:
+    if "kanji" in counters:
+        return (
+            f"{counters['kanji']} kanji under {counters['radicals']} radicals, "
+            f"{counters['bytes'] / 1024:.1f} KB in {counters['seconds']:.2f} seconds"
+        )
+    text = (
+        f"{counters['chunks']} chunks, {counters['bytes'] / 1e6:.2f} MB "
+        f"(mean {counters['mean_chunk_bytes'] / 1024:.1f} KB, "
+        f"p95 {counters['p95_chunk_bytes'] / 1024:.1f} KB, max "
+        f"{counters['max_chunk_bytes'] / 1024:.1f} KB per chunk) in "
+        f"{counters['seconds']:.2f} seconds"
+    )
+    if "p95_query_bytes" in counters:
+        text += (
+            f", a query term fetches {counters['mean_query_bytes'] / 1024:.1f} KB "
+            f"on average, p95 {counters['p95_query_bytes'] / 1024:.1f} KB, after "
+            f"a {counters['meta_bytes'] / 1024:.1f} KB meta.json"
+        )
+    return text
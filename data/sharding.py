@@ -0,0 +1,10 @@
+import zlib
+
+
+def shard_of(key: str, shard_count: int) -> int:
+    """Return the shard a dictionary key belongs to.
+
+    Uses crc32 rather than hash() so the assignment is identical in every
+    worker process and across runs, regardless of PYTHONHASHSEED.
+    """
+    return zlib.crc32(key.encode("utf-8")) % shard_count
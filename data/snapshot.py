@@ -0,0 +1,227 @@
+import gc
+import marshal
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from data.loaders import JSONArrayStream, file_digest, load_file
+
+# Bump when what is stored for a dataset changes. The interpreter's cache tag
+# is part of every key too, because marshal's format is only guaranteed to
+# be stable within one Python version.
+SNAPSHOT_VERSION = 1
+CODE_VERSION = f"v{SNAPSHOT_VERSION}-{sys.implementation.cache_tag}"
+# Records per marshalled chunk of a streamed snapshot. Small chunks read just
+# as fast, and larger ones slowed the processing that follows them down by
+# allocating a thousand records at once.
+CHUNK_RECORDS = 16
+_LENGTH = struct.Struct("<Q")
+
+
+@contextmanager
+def _gc_paused():
+    # Decoding allocates nothing but containers that stay alive, so the
+    # collector only rescans them over and over while they are being built.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _write_block(f, value: Any):
+    data = marshal.dumps(value)
+    f.write(_LENGTH.pack(len(data)))
+    f.write(data)
+
+
+def _read_block(f) -> Any:
+    # marshal.load() on a file reads it a few bytes at a time, which is
+    # several times slower than decoding the whole block from bytes.
+    (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+    with _gc_paused():
+        return marshal.loads(f.read(length))
+
+
+class SnapshotStream:
+    """A JSONArrayStream read back from a snapshot.
+
+    The file holds the marshalled header, then the records in chunks of
+    CHUNK_RECORDS and a None at the end, each prefixed with its length. A
+    pass over it keeps only one chunk in memory, like the JSON stream it
+    replaces.
+    """
+
+    def __init__(self, file_path: Path, source: Path):
+        self.file_path = file_path
+        self.source = source
+        self.header: Dict[str, Any] = {}
+        self.count = 0
+
+    def __repr__(self):
+        return f"SnapshotStream(file_path={self.file_path}, source={self.source})"
+
+    def read_header(self) -> Dict[str, Any]:
+        if not self.header:
+            with open(self.file_path, "rb") as f:
+                self.header = _read_block(f)
+        return self.header
+
+    def __iter__(self) -> Iterator[Any]:
+        self.count = 0
+        with open(self.file_path, "rb") as f:
+            self.header = _read_block(f)
+            while True:
+                chunk = _read_block(f)
+                if chunk is None:
+                    return
+                for record in chunk:
+                    yield record
+                    self.count += 1
+
+    @staticmethod
+    def write(path: Path, stream: JSONArrayStream) -> int:
+        """Write a pass over `stream` to `path` and return the record count."""
+        body_path = path.with_name(path.name + ".body")
+        with open(body_path, "wb") as body:
+            chunk: List[Any] = []
+            for record in stream:
+                chunk.append(record)
+                if len(chunk) == CHUNK_RECORDS:
+                    _write_block(body, chunk)
+                    chunk = []
+            if chunk:
+                _write_block(body, chunk)
+            _write_block(body, None)
+        # The header is only complete once the pass is over, but goes first.
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f, open(body_path, "rb") as body:
+            _write_block(f, stream.header)
+            while True:
+                block = body.read(1 << 20)
+                if not block:
+                    break
+                f.write(block)
+        os.replace(tmp_path, path)
+        body_path.unlink()
+        return stream.count
+
+
+class SnapshotCache:
+    """Parsed datasets kept in `cache_dir` as marshal files.
+
+    A snapshot is keyed by the name of the dataset, the hash of its source
+    file (the archive, for compressed datasets) and CODE_VERSION, so an
+    unchanged input is read back without being decompressed or parsed, and a
+    changed one is parsed again and replaces the older snapshot. Every hit
+    or miss is printed with its load time and kept in `results`.
+    """
+
+    def __init__(self, cache_dir, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._paths: Dict[str, Path] = {}
+
+    def __repr__(self):
+        return f"SnapshotCache(cache_dir={self.cache_dir}, enabled={self.enabled})"
+
+    def path_for(self, name: str, source: Path) -> Path:
+        if name not in self._paths:
+            digest = file_digest(source)[:16]
+            file_name = f"{name}-{CODE_VERSION}-{digest}.snapshot"
+            self._paths[name] = self.cache_dir / file_name
+        return self._paths[name]
+
+    def _replace_older(self, name: str, path: Path):
+        for old in self.cache_dir.glob(f"{name}-*.snapshot"):
+            if old != path:
+                old.unlink(missing_ok=True)
+
+    def record(self, name: str, hit: bool, seconds: float, detail: str = ""):
+        """Log a hit or miss, including those of caches kept elsewhere."""
+        self.results[name] = {"hit": hit, "seconds": round(seconds, 3)}
+        state = "hit" if hit else "miss"
+        print(f"Snapshot {state} for {name}: {seconds:.2f} s{detail}")
+
+    def load_files(
+        self, files: Dict[str, Path], load: Callable[[Path], Any] = load_file
+    ) -> Dict[str, Any]:
+        """Load whole datasets, parsing the ones without a snapshot concurrently."""
+        values: Dict[str, Any] = {}
+        missing: Dict[str, Path] = {}
+        for name, source in files.items():
+            if not self.enabled:
+                missing[name] = source
+                continue
+            path = self.path_for(name, source)
+            start = time.perf_counter()
+            try:
+                with open(path, "rb") as f:
+                    values[name] = _read_block(f)
+            except (OSError, EOFError, ValueError, TypeError, struct.error):
+                missing[name] = source
+                continue
+            self.record(name, True, time.perf_counter() - start)
+
+        def parse(item):
+            name, source = item
+            start = time.perf_counter()
+            value = load(source)
+            return name, value, time.perf_counter() - start
+
+        with ThreadPoolExecutor() as pool:
+            for name, value, seconds in pool.map(parse, missing.items()):
+                values[name] = value
+                if self.enabled:
+                    self._save(name, files[name], value)
+                self.record(name, False, seconds, f" to parse {files[name].name}")
+        return {name: values[name] for name in files}
+
+    def _save(self, name: str, source: Path, value: Any):
+        path = self.path_for(name, source)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            _write_block(f, value)
+        os.replace(tmp_path, path)
+        self._replace_older(name, path)
+
+    def stream(self, name: str, source: Path, array_key: Optional[str] = "words"):
+        """A stream over the `array_key` records of `source`.
+
+        Without a snapshot, the source is streamed once now to write one.
+        """
+        if not self.enabled:
+            return JSONArrayStream(source, array_key)
+        path = self.path_for(name, source)
+        start = time.perf_counter()
+        stream = SnapshotStream(path, source)
+        try:
+            stream.read_header()
+        except (OSError, EOFError, ValueError, TypeError, struct.error):
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            count = SnapshotStream.write(path, JSONArrayStream(source, array_key))
+            self._replace_older(name, path)
+            stream.read_header()
+            self.record(
+                name,
+                False,
+                time.perf_counter() - start,
+                f" to stream {count:,} records of {source.name} into a snapshot",
+            )
+            return stream
+        self.record(
+            name,
+            True,
+            time.perf_counter() - start,
+            f" ({path.stat().st_size / 1e6:.1f} MB, read while processing)",
+        )
+        return stream
@@ -0,0 +1,108 @@
+import re
+import unicodedata
+from typing import List
+
+# Words that say nothing about what a gloss means, including the sth/sb of
+# CC-CEDICT and the "to" JMdict starts every verb gloss with.
+STOP_WORDS = frozenset(
+    """
+    a an and are as at be by etc for from has have he her his in is it its of on
+    one or one's oneself she sb sth so some someone something that the their
+    them they this to was were with
+    """.split()
+)
+# Bracketed pinyin and classifier lists, as in "CL:個|个[ge4]".
+_CEDICT_NOISE = re.compile(r"\[[^\]]*\]|\bCL:\S*")
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def _is_consonant(word: str, i: int) -> bool:
+    char = word[i]
+    if char in "aeiou":
+        return False
+    if char == "y":
+        return i == 0 or not _is_consonant(word, i - 1)
+    return True
+
+
+def _measure(stem: str) -> int:
+    """Porter's m: the number of vowel-consonant sequences in `stem`."""
+    pattern = "".join("c" if _is_consonant(stem, i) else "v" for i in range(len(stem)))
+    return re.sub(r"(.)\1+", r"\1", pattern).count("vc")
+
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _is_consonant(stem, i) for i in range(len(stem)))
+
+
+def _ends_cvc(stem: str) -> bool:
+    n = len(stem)
+    return (
+        n >= 3
+        and _is_consonant(stem, n - 3)
+        and not _is_consonant(stem, n - 2)
+        and _is_consonant(stem, n - 1)
+        and stem[-1] not in "wxy"
+    )
+
+
+def stem(word: str) -> str:
+    """Steps 1 and 5a of the Porter stemmer: plurals, -ed, -ing, a final y
+    and a final e.
+
+    That is what glosses differ in most ("eats", "eating", "to eat"), and
+    unlike the other steps it keeps words recognizable. src/lib/search.ts
+    stems queries with the same rules.
+    """
+    if len(word) <= 2:
+        return word
+    if word.endswith("sses") or word.endswith("ies"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    trimmed = False
+    if word.endswith("eed"):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    elif word.endswith("ed") and _has_vowel(word[:-2]):
+        word, trimmed = word[:-2], True
+    elif word.endswith("ing") and _has_vowel(word[:-3]):
+        word, trimmed = word[:-3], True
+    if trimmed:
+        if word.endswith(("at", "bl", "iz")):
+            word += "e"
+        elif (
+            len(word) >= 2
+            and word[-1] == word[-2]
+            and _is_consonant(word, len(word) - 1)
+            and word[-1] not in "lsz"
+        ):
+            word = word[:-1]
+        elif _measure(word) == 1 and _ends_cvc(word):
+            word += "e"
+    if word.endswith("y") and _has_vowel(word[:-1]):
+        word = word[:-1] + "i"
+    if word.endswith("e"):
+        measure = _measure(word[:-1])
+        if measure > 1 or (measure == 1 and not _ends_cvc(word[:-1])):
+            word = word[:-1]
+    return word
+
+
+def gloss_terms(text: str) -> List[str]:
+    """The stemmed words of an English gloss or query, without stop words.
+
+    Accents are dropped and words mixing letters and digits (pinyin like
+    ge4, mostly) are skipped.
+    """
+    text = _CEDICT_NOISE.sub(" ", text)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    terms = []
+    for word in _WORD.findall(text):
+        if word in STOP_WORDS or len(word) < 2:
+            continue
+        if not word.isdigit() and any(char.isdigit() for char in word):
+            continue
+        terms.append(stem(word.split("'")[0]))
+    return terms
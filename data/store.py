@@ -0,0 +1,334 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from data import jsonio
+from data.sharding import shard_of
+from data.writer import WriteStats, gzip_bytes, serialize_entries
+
+STORE_FORMAT = 1
+# The entry lists whose entries can be listed under several keys: JMdict and
+# JMnedict entries under each of their kanji and kana forms, and Chinese
+# words under both their traditional and simplified forms.
+STORED_FIELDS = ("w_j", "n_j", "c_tw", "c_sw")
+# The lists the Japanese-Chinese mapping copies under other keys: the Kanjidic
+# entries (c_j) of a Japanese variant and the char dict entries (c_c) of its
+# traditional character. See `EntryStore.list_reference`.
+MAPPED_FIELDS = ("c_j", "c_c")
+SUMMARY_GLOSS_LENGTH = 48
+
+
+def home_key(field: str, entry) -> str:
+    """The key whose shard writes the stored copy of `entry`.
+
+    Any key the entry is listed under can work it out from the entry alone,
+    and the shard that owns it always builds the entry.
+    """
+    if field in ("c_tw", "c_sw"):
+        return entry["trad"]
+    return (entry["kanji"] or entry["reading"])[0]["text"]
+
+
+def _shorten(text: str) -> str:
+    if len(text) <= SUMMARY_GLOSS_LENGTH:
+        return text
+    return text[: SUMMARY_GLOSS_LENGTH - 1] + "…"
+
+
+def summarize(field: str, entry) -> Dict:
+    """What a key file keeps of a stored entry: enough to list it before it loads."""
+    if field in ("c_tw", "c_sw"):
+        summary = {"text": entry["trad" if field == "c_tw" else "simp"]}
+        items = entry.get("items") or []
+        if items and items[0].get("pinyin"):
+            summary["reading"] = items[0]["pinyin"]
+        if entry.get("gloss"):
+            summary["gloss"] = _shorten(entry["gloss"])
+        hsk_level = (entry.get("statistics") or {}).get("hskLevel")
+        if hsk_level:
+            summary["hsk"] = hsk_level
+        return summary
+
+    kanji, reading = entry["kanji"], entry["reading"]
+    summary = {"text": (kanji or reading)[0]["text"]}
+    if kanji and reading:
+        summary["reading"] = reading[0]["text"]
+    if field == "w_j":
+        if any(form["common"] for form in kanji + reading):
+            summary["common"] = True
+        glosses = (
+            gloss["text"] for sense in entry["sense"] for gloss in sense["gloss"]
+        )
+    else:
+        glosses = (text for item in entry["translation"] for text in item["text"])
+    gloss = next(glosses, None)
+    if gloss:
+        summary["gloss"] = _shorten(gloss)
+    return summary
+
+
+class _SpilledRecords:
+    """The payloads of an EntryStore kept in an SQLite file instead of in memory.
+
+    Rows are keyed by bucket and digest, so the same entry is only kept once
+    and the buckets come back in order with their digests sorted.
+    """
+
+    def __init__(self, directory=None, batch_size: int = 10000):
+        directory = Path(directory or tempfile.gettempdir())
+        directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        handle = tempfile.NamedTemporaryFile(
+            prefix="store-", suffix=".sqlite", dir=directory, delete=False
+        )
+        handle.close()
+        self.path = Path(handle.name)
+        # Like SpilledEntryLists, nothing in here outlives the build.
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            PRAGMA temp_store = FILE;
+            CREATE TABLE records (
+                bucket INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                PRIMARY KEY (bucket, digest)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._pending: List[Tuple[int, str, bytes]] = []
+
+    def __repr__(self):
+        return f"_SpilledRecords(path={self.path})"
+
+    def _flush(self):
+        if self._pending:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO records VALUES (?, ?, ?)", self._pending
+            )
+            self._pending = []
+
+    def add(self, bucket: int, digest: str, payload: bytes):
+        self._pending.append((bucket, digest, payload))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+
+    def buckets(self) -> Iterator[Tuple[int, Dict[str, bytes]]]:
+        self._flush()
+        rows = self._db.execute(
+            "SELECT bucket, digest, payload FROM records ORDER BY bucket, digest"
+        )
+        for bucket, records in groupby(rows, key=lambda row: row[0]):
+            yield bucket, {digest: payload for _, digest, payload in records}
+
+    def close(self):
+        self._pending = []
+        self._db.close()
+        self.path.unlink(missing_ok=True)
+
+
+class EntryStore:
+    """Stores every entry that is listed under several keys once, by content hash.
+
+    Key files list such an entry as `{"ref": "{bucket}/{hash}", ...summary}`
+    instead of repeating it. The entry itself is serialized, gzipped into its
+    own member and appended to `store/{bucket}.bin`, with
+    `store/{bucket}.idx.json` mapping each hash to `[offset, length]`, the
+    same layout as the packed output. An entry's bucket is the crc32 of its
+    home key (see `home_key`), so every shard agrees on where it lives and
+    only the shard owning that bucket writes it. src/lib/store.ts fetches all
+    the refs of a key that share a bucket with one range request.
+
+    Buckets whose bytes are unchanged are not rewritten, and a ref stays the
+    same as long as the entry does, so incremental builds keep working.
+
+    The entries are kept in memory until `write`, or after `spill` in a
+    database file, like the entry lists of a build with --spill-entries.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        buckets: int = 1024,
+        threads: Optional[int] = None,
+        level: int = 9,
+    ):
+        self.store_dir = output_dir / "store"
+        self.buckets = buckets
+        self.threads = threads or os.cpu_count() or 1
+        self.level = level
+        self.shard_index = 0
+        self.shard_count = 1
+        self.references = 0
+        self.inline = 0
+        self._records: Dict[int, Dict[str, bytes]] = {}
+        self._spilled: Optional[_SpilledRecords] = None
+
+    def __repr__(self):
+        return f"EntryStore(store_dir={self.store_dir}, buckets={self.buckets})"
+
+    def for_shard(self, index: int, count: int):
+        if self.buckets % count:
+            raise ValueError(
+                f"{self.buckets} buckets cannot be split evenly across {count} shards"
+            )
+        self.shard_index, self.shard_count = index, count
+
+    def spill(self, directory):
+        """Keep the entries added from now on in a database file in `directory`."""
+        self._spilled = _SpilledRecords(directory)
+        for bucket, records in self._records.items():
+            for digest, payload in records.items():
+                self._spilled.add(bucket, digest, payload)
+        self._records = {}
+
+    def _paths(self, bucket: int):
+        return (
+            self.store_dir / f"{bucket}.bin",
+            self.store_dir / f"{bucket}.idx.json",
+        )
+
+    def _add(self, home: str, value: Any) -> str:
+        """The ref of `value`, which is kept if this shard writes `home`'s bucket."""
+        payload = serialize_entries(value)
+        digest = hashlib.blake2b(payload, digest_size=8).hexdigest()
+        bucket = shard_of(home, self.buckets)
+        if bucket % self.shard_count == self.shard_index:
+            if self._spilled is not None:
+                self._spilled.add(bucket, digest, payload)
+            else:
+                self._records.setdefault(bucket, {})[digest] = payload
+        return f"{bucket}/{digest}"
+
+    def reference(self, field: str, entry) -> Dict:
+        """The ref that replaces `entry`, keeping the entry if this shard writes it."""
+        ref = self._add(home_key(field, entry), entry)
+        return {"ref": ref, **summarize(field, entry)}
+
+    def list_reference(self, field: str, key: str, entries: List) -> Dict:
+        """The ref that stands in for the `field` list of `key` (one of
+        MAPPED_FIELDS) where the Japanese-Chinese mapping lists it under
+        other keys.
+
+        Every shard asks for the refs of all the mapped lists, so the one
+        writing `key`'s bucket keeps the list whichever keys it lists it under.
+        """
+        return {"ref": self._add(key, entries), "text": key}
+
+    def _buckets(self) -> Iterator[Tuple[int, Dict[str, bytes]]]:
+        if self._spilled is not None:
+            yield from self._spilled.buckets()
+        while self._records:
+            bucket = min(self._records)
+            yield bucket, self._records.pop(bucket)
+
+    def listing(self, field: str, entry, shared: bool, keys: int = 1):
+        """What to list under each of `keys` keys for `entry`.
+
+        Shared entries are swapped for their ref as they are added, rather
+        than when the keys are written, so the lists never have to keep
+        track of which entries are the same object.
+        """
+        if not shared:
+            self.inline += keys
+            return entry
+        self.references += keys
+        return self.reference(field, entry)
+
+    def write(self) -> WriteStats:
+        """Write this shard's buckets and delete the ones it no longer fills.
+
+        `stats.keys` counts the stored entries.
+        """
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        stats = WriteStats()
+        start_time = time.time()
+        compress = partial(gzip_bytes, level=self.level)
+        written = set()
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for bucket, records in self._buckets():
+                digests = sorted(records)
+                payloads = [records[digest] for digest in digests]
+                index: Dict[str, List[int]] = {}
+                chunks = []
+                size = 0
+                for digest, record in zip(digests, pool.map(compress, payloads)):
+                    index[digest] = [size, len(record)]
+                    chunks.append(record)
+                    size += len(record)
+                stats.keys += len(digests)
+                stats.raw_bytes += sum(len(payload) for payload in payloads)
+                stats.codec_bytes["gzip"] = stats.codec_bytes.get("gzip", 0) + size
+                written.add(bucket)
+                self._write_bucket(bucket, b"".join(chunks), index, stats)
+        if self._spilled is not None:
+            self._spilled.close()
+            self._spilled = None
+
+        for bucket in range(self.shard_index, self.buckets, self.shard_count):
+            bin_path, idx_path = self._paths(bucket)
+            if bucket not in written and bin_path.exists():
+                bin_path.unlink()
+                idx_path.unlink(missing_ok=True)
+                stats.removed += 1
+        stats.seconds = time.time() - start_time
+        return stats
+
+    def _write_bucket(self, bucket: int, data: bytes, index: Dict, stats: WriteStats):
+        bin_path, idx_path = self._paths(bucket)
+        if bin_path.exists():
+            if idx_path.exists() and bin_path.read_bytes() == data:
+                stats.unchanged += 1
+                return
+            stats.changed += 1
+        else:
+            stats.added += 1
+        tmp_path = bin_path.with_name(bin_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, bin_path)
+        with open(idx_path, "wb") as f:
+            jsonio.dump(index, f)
+        stats.files += 1
+        stats.written_bytes += len(data)
+
+    def stats(self, written: WriteStats) -> Dict[str, int]:
+        return {
+            "references": self.references,
+            "inline": self.inline,
+            "stored": written.keys,
+            "raw_bytes": written.raw_bytes,
+            "gzip_bytes": written.codec_bytes.get("gzip", 0),
+            "files": written.files,
+        }
+
+    def write_meta(self):
+        """Write meta.json and drop buckets left over from a larger bucket count."""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.store_dir / "meta.json", "wb") as f:
+            jsonio.dump(
+                {"format": STORE_FORMAT, "buckets": self.buckets, "hash": "crc32"}, f
+            )
+        for path in self.store_dir.glob("*.bin"):
+            bucket = int(path.name.split(".")[0])
+            if bucket >= self.buckets:
+                for stale in self._paths(bucket):
+                    stale.unlink(missing_ok=True)
+
+
+def summary(counters: Dict[str, int]) -> str:
+    total = max(counters["references"] + counters["inline"], 1)
+    return (
+        f"{counters['stored']} entries stored once for {counters['references']} "
+        f"references ({counters['references'] / total:.1%} of the listed entries), "
+        f"{counters['raw_bytes'] / 1e6:.1f} MB -> {counters['gzip_bytes'] / 1e6:.1f} MB"
+    )
@@ -0,0 +1,435 @@
+"""Generate synthetic datasets with the shapes of the real ones, at any scale.
+
+The files follow jmdict-simplified (JMdict, JMnedict, Kanjidic2),
+JmdictFurigana and the dong-chinese char/word dumps closely enough for
+data.main to run on them unchanged, so the build can be benchmarked without
+the real datasets and at sizes they haven't reached yet:
+
+    python -m data.synthetic --scale 5 --output data/datasets/synthetic/5x
+    python -m data.main --datasets data/datasets/synthetic/5x --output /tmp/dictionary
+"""
+
+import argparse
+import json
+import random
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Entry counts at scale 1, roughly those of the real datasets in 2024.
+BASE_COUNTS = {
+    "jmdict": 212000,
+    "jmnedict": 745000,
+    "kanjidic": 13108,
+    "char_dict": 13000,
+    "word_dict": 120000,
+}
+
+FILE_NAMES = {
+    "jmdict": "jmdict-eng-3.5.0.json",
+    "jmnedict": "jmnedict-all-3.5.0.json",
+    "kanjidic": "kanjidic2-en-3.5.0.json",
+    "char_dict": "dictionary_char_synthetic.jsonl",
+    "word_dict": "dictionary_word_synthetic.jsonl",
+    "jmdict_furigana": "JmdictFurigana.json",
+    "jmnedict_furigana": "JmnedictFurigana.json",
+}
+
+# CJK Unified Ideographs, then Extension A and B for scales past the first block
+KANJI_RANGES = [(0x4E00, 0x9FFF), (0x3400, 0x4DBF), (0x20000, 0x2A6DF)]
+HIRAGANA = [chr(c) for c in range(0x3042, 0x3094)]
+PARTS_OF_SPEECH = ["n", "v1", "v5r", "adj-i", "adj-na", "adv", "vs", "exp", "pn"]
+MISC_TAGS = ["uk", "col", "hon", "hum", "pol", "arch", "abbr", "on-mim"]
+NAME_TYPES = ["surname", "place", "given", "person", "company", "station"]
+TONE_VOWELS = {"a": "āáǎà", "e": "ēéěè", "i": "īíǐì", "o": "ōóǒò", "u": "ūúǔù"}
+SYLLABLES = ["zhong", "guo", "ai", "ren", "xue", "sheng", "da", "xiao", "shan", "shui"]
+WORDS = ["person", "water", "mountain", "to go", "large", "small", "study", "love"]
+# Char dict records whose first top word is a "Japanese variant of" gloss (168
+# of about 13000), and of those, the ones naming a single character for both
+# traditional and simplified (37 of the 168).
+JAPANESE_VARIANT_SHARE = 168 / 13000
+SAME_FORM_SHARE = 37 / 168
+
+
+def kanji_pool(size: int) -> List[str]:
+    pool = []
+    for start, end in KANJI_RANGES:
+        pool.extend(
+            chr(c) for c in range(start, min(end + 1, start + size - len(pool)))
+        )
+        if len(pool) >= size:
+            break
+    return pool
+
+
+class Generator:
+    """Draws keys so that a few characters are very common, as in real text.
+
+    Characters are picked with Zipf weights over the Kanjidic literals, so
+    JMdict words, Chinese words and characters keep colliding on the same
+    keys the way they do in the real data.
+    """
+
+    def __init__(self, scale: float = 1.0, seed: int = 0):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.counts = {
+            name: max(1, round(count * scale)) for name, count in BASE_COUNTS.items()
+        }
+        self.kanji = kanji_pool(self.counts["kanjidic"])
+        self.kanji_weights = list(
+            accumulate(1 / (rank + 1) for rank in range(len(self.kanji)))
+        )
+
+    def kanji_text(self, length: int) -> str:
+        return "".join(
+            self.rng.choices(self.kanji, cum_weights=self.kanji_weights, k=length)
+        )
+
+    def kana_text(self, length: int) -> str:
+        return "".join(self.rng.choices(HIRAGANA, k=length))
+
+    def gloss(self) -> str:
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(1, 3)))
+
+    def japanese_variant_gloss(self) -> str:
+        """A CC-CEDICT "Japanese variant of 兒|儿[ér]" gloss."""
+        forms = self.kanji_text(1)
+        if self.rng.random() >= SAME_FORM_SHARE:
+            forms += "|" + self.kanji_text(1)
+        return f"Japanese variant of {forms}[{self.pinyin(1)}]"
+
+    def pinyin(self, syllables: int, marks: bool = True) -> str:
+        parts = []
+        for _ in range(syllables):
+            syllable = self.rng.choice(SYLLABLES)
+            tone = self.rng.randint(1, 5)
+            if marks and tone < 5:
+                vowel = next(v for v in syllable if v in TONE_VOWELS)
+                syllable = syllable.replace(vowel, TONE_VOWELS[vowel][tone - 1], 1)
+            elif not marks:
+                syllable += str(tone)
+            parts.append(syllable)
+        return " ".join(parts)
+
+    def jmdict_word(self, index: int) -> Dict:
+        rng = self.rng
+        kanji = [
+            {
+                "common": rng.random() < 0.1,
+                "text": self.kanji_text(rng.randint(1, 4)),
+                "tags": ["ateji"] if rng.random() < 0.02 else [],
+            }
+            for _ in range(rng.choices([0, 1, 2, 3], [20, 60, 15, 5])[0])
+        ]
+        kana = [
+            {
+                "common": rng.random() < 0.1,
+                "text": self.kana_text(rng.randint(2, 7)),
+                "tags": ["ik"] if rng.random() < 0.02 else [],
+                "appliesToKanji": ["*"],
+            }
+            for _ in range(rng.choices([1, 2, 3], [80, 15, 5])[0])
+        ]
+        sense = [
+            {
+                "partOfSpeech": rng.sample(PARTS_OF_SPEECH, rng.randint(1, 2)),
+                "appliesToKanji": ["*"],
+                "appliesToKana": ["*"],
+                "related": [],
+                "antonym": [],
+                "field": [],
+                "dialect": [],
+                "misc": rng.sample(MISC_TAGS, rng.randint(0, 1)),
+                "info": [],
+                "languageSource": [],
+                "gloss": [
+                    {"lang": "eng", "gender": None, "type": None, "text": self.gloss()}
+                    for _ in range(rng.randint(1, 4))
+                ],
+            }
+            for _ in range(rng.choices([1, 2, 3, 5], [60, 25, 10, 5])[0])
+        ]
+        return {
+            "id": str(1000000 + index),
+            "kanji": kanji,
+            "kana": kana,
+            "sense": sense,
+        }
+
+    def jmnedict_word(self, index: int) -> Dict:
+        rng = self.rng
+        kanji = (
+            [{"text": self.kanji_text(rng.randint(1, 3)), "tags": []}]
+            if rng.random() < 0.9
+            else []
+        )
+        return {
+            "id": str(5000000 + index),
+            "kanji": kanji,
+            "kana": [
+                {
+                    "text": self.kana_text(rng.randint(2, 6)),
+                    "tags": [],
+                    "appliesToKanji": ["*"],
+                }
+            ],
+            "translation": [
+                {
+                    "type": [rng.choice(NAME_TYPES)],
+                    "related": [],
+                    "translation": [{"lang": "eng", "text": f"Name{index}"}],
+                }
+            ],
+        }
+
+    def furigana(self, word: Dict) -> List[Dict]:
+        """JmdictFurigana records for the kanji forms of one word."""
+        reading = word["kana"][0]["text"]
+        records = []
+        for kanji in word["kanji"]:
+            text = kanji["text"]
+            # Split the reading over the characters as evenly as it goes.
+            step = max(1, len(reading) // len(text))
+            furigana = [
+                {"ruby": char, "rt": reading[i * step : (i + 1) * step] or reading[-1]}
+                for i, char in enumerate(text)
+            ]
+            records.append({"text": text, "reading": reading, "furigana": furigana})
+        return records
+
+    def kanjidic_character(self, index: int) -> Dict:
+        rng = self.rng
+        return {
+            "literal": self.kanji[index % len(self.kanji)],
+            "codepoints": [
+                {
+                    "type": "ucs",
+                    "value": f"{ord(self.kanji[index % len(self.kanji)]):x}",
+                }
+            ],
+            "radicals": [{"type": "classical", "value": rng.randint(1, 214)}],
+            "misc": {
+                "grade": rng.choice([None, 1, 2, 3, 4, 5, 6, 8]),
+                "strokeCounts": [rng.randint(1, 30)],
+                "variants": [],
+                "frequency": index + 1 if index < 2500 else None,
+                "radicalNames": [],
+                "jlptLevel": rng.choice([None, 1, 2, 3, 4]),
+            },
+            "dictionaryReferences": [
+                {"type": "nelson_c", "morohashi": None, "value": str(index + 1)}
+            ],
+            "queryCodes": [
+                {
+                    "type": "skip",
+                    "skipMisclassification": None,
+                    "value": f"{rng.randint(1, 4)}-{rng.randint(1, 9)}-{rng.randint(1, 9)}",
+                }
+            ],
+            "readingMeaning": {
+                "groups": [
+                    {
+                        "readings": [
+                            {
+                                "type": "ja_on",
+                                "onType": None,
+                                "status": None,
+                                "value": self.kana_text(2),
+                            },
+                            {
+                                "type": "ja_kun",
+                                "onType": None,
+                                "status": None,
+                                "value": self.kana_text(3),
+                            },
+                            {
+                                "type": "pinyin",
+                                "onType": None,
+                                "status": None,
+                                "value": self.pinyin(1, marks=False),
+                            },
+                        ],
+                        "meanings": [
+                            {"lang": "en", "value": self.gloss()}
+                            for _ in range(rng.randint(1, 4))
+                        ],
+                    }
+                ],
+                "nanori": [self.kana_text(2)] if rng.random() < 0.3 else [],
+            },
+        }
+
+    def chinese_char(self, index: int) -> Dict:
+        rng = self.rng
+        char = self.kanji[index % len(self.kanji)]
+        if rng.random() < JAPANESE_VARIANT_SHARE:
+            top_word = {
+                "word": char,
+                "share": 0.5,
+                "trad": char,
+                "gloss": self.japanese_variant_gloss(),
+            }
+        else:
+            top_word = {
+                "word": char + self.kanji_text(1),
+                "share": round(rng.random(), 3),
+                "trad": char,
+                "gloss": self.gloss(),
+            }
+        return {
+            "_id": f"c{index}",
+            "char": char,
+            "codepoint": f"U+{ord(char):X}",
+            "strokeCount": rng.randint(1, 30),
+            "sources": ["unicode"],
+            "gloss": self.gloss(),
+            "statistics": {
+                "hskLevel": rng.randint(1, 7),
+                "topWords": [top_word],
+                "movieCharCount": rng.randint(1, 100000),
+                "movieCharRank": index + 1,
+                "bookCharCount": rng.randint(1, 100000),
+                "bookCharRank": index + 1,
+                "pinyinFrequency": rng.randint(1, 5),
+            },
+            "pinyinFrequencies": [
+                {"pinyin": self.pinyin(1), "count": rng.randint(1, 99)}
+            ],
+        }
+
+    def chinese_word(self, index: int) -> Dict:
+        rng = self.rng
+        trad = self.kanji_text(rng.choices([2, 3, 4], [70, 20, 10])[0])
+        simp = trad if rng.random() < 0.7 else self.kanji_text(1) + trad[1:]
+        syllables = len(trad)
+        return {
+            "_id": f"w{index}",
+            "simp": simp,
+            "trad": trad,
+            "items": [
+                {
+                    "source": "cedict",
+                    "pinyin": self.pinyin(syllables),
+                    "simpTrad": "both" if simp == trad else "trad",
+                    "definitions": [self.gloss() for _ in range(rng.randint(1, 3))],
+                }
+            ],
+            "gloss": self.gloss(),
+            "pinyinSearchString": self.pinyin(syllables, marks=False),
+            "statistics": {
+                "hskLevel": rng.randint(1, 7),
+                "movieWordCount": rng.randint(1, 10000),
+                "movieWordRank": index + 1,
+                "bookWordCount": rng.randint(1, 10000),
+                "bookWordRank": index + 1,
+            },
+        }
+
+
+class _ArrayWriter:
+    """Streams a jmdict-simplified style document (or a bare array) to disk."""
+
+    def __init__(self, path: Path, header: Dict, array_key: Optional[str] = "words"):
+        self.file = open(path, "w", encoding="utf-8")
+        self.array_key = array_key
+        self.count = 0
+        if array_key is None:
+            self.file.write("[\n")
+        else:
+            opening = json.dumps(header, ensure_ascii=False)[:-1]
+            separator = ", " if header else ""
+            self.file.write(f'{opening}{separator}"{array_key}": [\n')
+
+    def append(self, item):
+        if self.count:
+            self.file.write(",\n")
+        self.file.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+        self.count += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.file.write("\n]" if self.array_key is None else "\n]}")
+        self.file.close()
+
+
+def _write_array(path: Path, header: Dict, items: Iterable, array_key="words"):
+    with _ArrayWriter(path, header, array_key) as writer:
+        for item in items:
+            writer.append(item)
+
+
+def _write_lines(path: Path, items: Iterable):
+    with open(path, "w", encoding="utf-8") as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+
+def generate(output_dir, scale: float = 1.0, seed: int = 0) -> Dict[str, Path]:
+    """Write every dataset at `scale` into `output_dir` and return the paths."""
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    generator = Generator(scale, seed)
+    counts = generator.counts
+    paths = {name: output_dir / file_name for name, file_name in FILE_NAMES.items()}
+    jmdict_header = {
+        "version": "3.5.0",
+        "languages": ["eng"],
+        "commonOnly": False,
+        "dictDate": "2024-09-02",
+        "dictRevisions": [],
+        "tags": {tag: tag for tag in PARTS_OF_SPEECH + MISC_TAGS + ["ateji", "ik"]},
+    }
+
+    # The furigana files are written alongside the words they belong to.
+    jmnedict_header = {**jmdict_header, "tags": {t: t for t in NAME_TYPES}}
+    for name, make, header in (
+        ("jmdict", generator.jmdict_word, jmdict_header),
+        ("jmnedict", generator.jmnedict_word, jmnedict_header),
+    ):
+        with (
+            _ArrayWriter(paths[name], header) as words,
+            _ArrayWriter(paths[f"{name}_furigana"], {}, None) as furigana,
+        ):
+            for index in range(counts[name]):
+                word = make(index)
+                words.append(word)
+                for record in generator.furigana(word):
+                    furigana.append(record)
+    _write_array(
+        paths["kanjidic"],
+        {
+            "version": "3.5.0",
+            "languages": ["en"],
+            "dictDate": "2024-09-02",
+            "fileVersion": 4,
+            "databaseVersion": "2024-246",
+        },
+        (generator.kanjidic_character(i) for i in range(counts["kanjidic"])),
+        "characters",
+    )
+    _write_lines(
+        paths["char_dict"],
+        (generator.chinese_char(i) for i in range(counts["char_dict"])),
+    )
+    _write_lines(
+        paths["word_dict"],
+        (generator.chinese_word(i) for i in range(counts["word_dict"])),
+    )
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+    for name, path in generate(args.output, args.scale, args.seed).items():
+        print(f"Wrote {name} to {path} ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import sys
+from typing import Dict, Iterable, List, Tuple, Union
+
+from data import jsonio
+
+LEGEND_FILE = "tags.json"
+LEGEND_FORMAT = 1
+
+# The fields of w_j/n_j entries that hold tags. src/lib/tags.ts expands the
+# same ones on the client.
+TAG_FIELDS = ("tags", "part_of_speech", "misc", "field", "dialect", "type")
+
+Tag = Union[int, str]
+
+
+class TagTable:
+    """Integer codes for the JMdict/JMnedict tag vocabulary.
+
+    A tag's code is its position in the legend, which is published once as
+    tags.json instead of every entry repeating the strings. The codes are
+    assigned from the sorted tags of the dataset headers, so every shard and
+    every build over the same data agrees on them without coordinating.
+    Tags missing from the headers stay strings in the output.
+    """
+
+    def __init__(self, descriptions: Dict[str, str]):
+        self.tags: List[str] = sorted(descriptions)
+        self.descriptions = [descriptions[tag] for tag in self.tags]
+        # Each code is one shared int object, so the entries that hold it
+        # don't each carry their own copy.
+        self.codes: Dict[str, int] = {tag: code for code, tag in enumerate(self.tags)}
+
+    @classmethod
+    def from_headers(cls, *headers: Dict) -> "TagTable":
+        descriptions = {}
+        for header in headers:
+            descriptions.update(header.get("tags", {}))
+        return cls(descriptions)
+
+    def __len__(self):
+        return len(self.tags)
+
+    def encode(self, tags: Iterable[str]) -> Tuple[Tag, ...]:
+        codes = self.codes
+        return tuple(codes[tag] if tag in codes else sys.intern(tag) for tag in tags)
+
+    def decode(self, codes: Iterable[Tag]) -> List[str]:
+        return [self.tags[code] if isinstance(code, int) else code for code in codes]
+
+    def to_dict(self):
+        return {
+            "format": LEGEND_FORMAT,
+            "tags": self.tags,
+            "descriptions": self.descriptions,
+        }
+
+    def to_json(self) -> bytes:
+        return jsonio.dumps(self.to_dict())
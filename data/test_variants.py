@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+
+from data.variants import MAPPING_PATH, VariantIndex, extract_variant
+
+# The char dict records find_japanese_variants.py found the variants in, as
+# the to_dict() of their entries, so with snake_case keys.
+VARIANT_RECORDS = (
+    Path(__file__).resolve().parent / "zh" / "char_dict" / "japanese_variants.json"
+)
+
+
+def _dataset_record(entry):
+    """A japanese_variants.json entry spelled the way the char dict is."""
+    return {
+        "char": entry["char"],
+        "statistics": {"topWords": entry["statistics"]["top_words"]},
+    }
+
+
+def test_extract_variant():
+    gloss = {"gloss": "Japanese variant of 兒|儿[er2]"}
+    assert extract_variant({"statistics": {"topWords": [gloss]}}) == ("兒", "儿")
+    # Only the first top word counts, as in find_japanese_variants.py.
+    other = {"gloss": "child"}
+    assert extract_variant({"statistics": {"topWords": [gloss, other]}}) == ("兒", "儿")
+    assert extract_variant({"statistics": {"topWords": [other, gloss]}}) is None
+    assert extract_variant({"statistics": {}}) is None
+    assert extract_variant({}) is None
+
+
+def test_index_reproduces_mapping():
+    with open(VARIANT_RECORDS, encoding="utf-8") as f:
+        records = [_dataset_record(entry) for entry in json.load(f)]
+    with open(MAPPING_PATH, encoding="utf-8") as f:
+        mapping = json.load(f)
+
+    index = VariantIndex.from_records(records)
+    assert len(index) == len(mapping) == 168
+    assert [{char: chinese} for char, chinese in index.variants.items()] == mapping
+    assert VariantIndex.from_mapping_file(j2ch=None).variants == index.variants
+
+
+if __name__ == "__main__":
+    test_extract_variant()
+    test_index_reproduces_mapping()
+    print("ok")
@@ -0,0 +1,175 @@
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from data import jsonio
+from data.loaders import file_digest, load_jsonl
+
+# Bump when the way variants are extracted or the cache layout changes.
+CACHE_VERSION = 2
+DATA_DIR = Path(__file__).resolve().parent
+J2CH_PATH = DATA_DIR / "j2ch" / "j2ch.json"
+# The variants find_japanese_variants.py extracted from the char dict.
+MAPPING_PATH = DATA_DIR / "zh" / "char_dict" / "japanese_variants_mapping.json"
+
+_VARIANT_OF = re.compile(r"of\s+([^\[]+)(?:\[|$)")
+
+
+def extract_variant(char_entry: Dict) -> Optional[Tuple[str, str]]:
+    """The (traditional, simplified) characters a char dict entry is the
+    Japanese variant of, or None if it isn't one.
+
+    Like find_japanese_variants.py, only the first top word is looked at.
+    """
+    top_words = (char_entry.get("statistics") or {}).get("topWords")
+    if not top_words:
+        return None
+    gloss = top_words[0].get("gloss", "")
+    if not gloss.startswith("Japanese variant of"):
+        return None
+    match = _VARIANT_OF.search(gloss)
+    if not match:
+        return None
+    chars = match.group(1).split("|")
+    if len(chars) == 2:
+        return chars[0], chars[1]
+    if len(chars) == 1:
+        return chars[0], chars[0]
+    return None
+
+
+class VariantIndex:
+    """Japanese variant <-> traditional <-> simplified character index.
+
+    Combines the "Japanese variant of" glosses of the Chinese char dict with
+    the hand-made kanji -> hanzi table in j2ch/j2ch.json, and answers both
+    directions with dict lookups. Only the forward maps are persisted (as
+    JSON in `cache_dir`, keyed by the hashes of both sources), and the
+    reverse maps are rebuilt on load, which takes a few milliseconds.
+    """
+
+    def __init__(self, char_dict=None, j2ch=J2CH_PATH, cache_dir=None):
+        self.char_dict = Path(char_dict) if char_dict is not None else None
+        self.j2ch_path = Path(j2ch) if j2ch is not None else None
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.from_cache = False
+        # Japanese variant -> {"t": traditional, "s": simplified}, in char
+        # dict order.
+        self.variants: Dict[str, Dict[str, str]] = {}
+        self.j2ch: Dict[str, str] = {}
+        self._by_chinese: Dict[str, List[str]] = {}
+        self._by_j2ch: Dict[str, List[str]] = {}
+
+    def __repr__(self):
+        return (
+            f"VariantIndex(char_dict={self.char_dict}, variants={len(self.variants)}, "
+            f"j2ch={len(self.j2ch)})"
+        )
+
+    def __len__(self):
+        return len(self.variants)
+
+    def __contains__(self, char: str) -> bool:
+        return char in self.variants
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[Dict], j2ch: Optional[Dict[str, str]] = None
+    ) -> "VariantIndex":
+        index = cls(j2ch=None)
+        index._build(records, j2ch or {})
+        return index
+
+    @classmethod
+    def from_mapping_file(
+        cls, path: Path = MAPPING_PATH, j2ch: Optional[Path] = J2CH_PATH
+    ) -> "VariantIndex":
+        """The index of japanese_variants_mapping.json, for when the char dict
+        itself isn't at hand."""
+        index = cls(j2ch=j2ch)
+        with open(path, "rb") as f:
+            mapping = jsonio.load(f)
+        variants = {char: chinese for item in mapping for char, chinese in item.items()}
+        index._set(variants, index._read_j2ch())
+        return index
+
+    def load(self, records: Optional[Iterable[Dict]] = None) -> "VariantIndex":
+        """Read the index from the cache, or build it and write the cache.
+
+        `records` are the already parsed char dict entries, if the caller has
+        them; otherwise the char dict is read when the cache misses.
+        """
+        cache_path = self._cache_path()
+        if cache_path is not None and cache_path.exists():
+            try:
+                with open(cache_path, "rb") as f:
+                    cached = jsonio.load(f)
+                self._set(cached["variants"], cached["j2ch"])
+                self.from_cache = True
+                return self
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring variant cache {cache_path.name}: {e}")
+        if records is None:
+            records = load_jsonl(self.char_dict)
+        self._build(records, self._read_j2ch())
+        if cache_path is not None:
+            self._write_cache(cache_path)
+        return self
+
+    def _read_j2ch(self) -> Dict[str, str]:
+        if self.j2ch_path is None:
+            return {}
+        with open(self.j2ch_path, "rb") as f:
+            return jsonio.load(f)
+
+    def _build(self, records: Iterable[Dict], j2ch: Dict[str, str]):
+        variants = {}
+        for char_entry in records:
+            variant = extract_variant(char_entry)
+            if variant is not None:
+                variants[char_entry["char"]] = {"t": variant[0], "s": variant[1]}
+        self._set(variants, j2ch)
+
+    def _set(self, variants: Dict[str, Dict[str, str]], j2ch: Dict[str, str]):
+        self.variants, self.j2ch = variants, j2ch
+        self._by_chinese, self._by_j2ch = {}, {}
+        for jp_char, chinese in variants.items():
+            for char in dict.fromkeys((chinese["t"], chinese["s"])):
+                self._by_chinese.setdefault(char, []).append(jp_char)
+        for jp_char, char in j2ch.items():
+            self._by_j2ch.setdefault(char, []).append(jp_char)
+
+    def chinese(self, jp_char: str) -> Optional[Dict[str, str]]:
+        """`{"t": traditional, "s": simplified}` of a Japanese variant, or None."""
+        return self.variants.get(jp_char)
+
+    def traditional(self, jp_char: str) -> str:
+        """The traditional character for a kanji, or the kanji itself."""
+        chinese = self.variants.get(jp_char)
+        return chinese["t"] if chinese else jp_char
+
+    def j2ch_char(self, jp_char: str) -> str:
+        """The j2ch.json counterpart of a kanji, or the kanji itself."""
+        return self.j2ch.get(jp_char, jp_char)
+
+    def japanese(self, char: str) -> List[str]:
+        """The Japanese variants of a traditional or simplified character,
+        from both the char dict and j2ch.json."""
+        found = self._by_chinese.get(char, []) + self._by_j2ch.get(char, [])
+        return list(dict.fromkeys(found))
+
+    def _cache_path(self) -> Optional[Path]:
+        if self.cache_dir is None or self.char_dict is None:
+            return None
+        digest = file_digest(self.char_dict)[:16]
+        if self.j2ch_path is not None:
+            digest += "-" + file_digest(self.j2ch_path)[:8]
+        return self.cache_dir / f"variants-v{CACHE_VERSION}-{digest}.json"
+
+    def _write_cache(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            jsonio.dump({"variants": self.variants, "j2ch": self.j2ch}, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,129 @@
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class Field:
+    """A record field of a View, decoded when the view is first read.
+
+    The raw value is looked up under `key` in the record and passed through
+    `view` (a View class, an Enum or any callable), or each of its items with
+    `many`. A missing key reads as `default()` (or None), and raises KeyError
+    like indexing the record if the field is `required`. With
+    `empty_is_none`, falsy values read as None. The result is kept in the
+    slot `_{name}` of the view, which the class has to list in `__slots__`.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        view: Optional[Callable[[Any], Any]] = None,
+        many: bool = False,
+        required: bool = False,
+        default: Optional[Callable[[], Any]] = None,
+        empty_is_none: bool = False,
+    ):
+        self.key = key
+        self.view = view
+        self.many = many
+        self.required = required
+        self.default = default
+        self.empty_is_none = empty_is_none
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = "_" + name
+        # Slots named like `__id` are stored under their mangled name.
+        if self.slot.startswith("__"):
+            self.slot = f"_{owner.__name__.lstrip('_')}{self.slot}"
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            return getattr(obj, self.slot)
+        except AttributeError:
+            obj._decode()
+            return getattr(obj, self.slot)
+
+    def __set__(self, obj, value):
+        if obj._record is not None:
+            obj._decode()
+        setattr(obj, self.slot, value)
+
+    def decode(self, data: Dict[str, Any]) -> Any:
+        if self.required or self.key in data:
+            raw = data[self.key]
+        else:
+            raw = self.default() if self.default is not None else None
+        if raw is None or (self.empty_is_none and not raw):
+            return None
+        if self.view is None:
+            return raw
+        if self.many:
+            return [self.view(item) for item in raw]
+        return self.view(raw)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, View):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class View:
+    """Base of the dataset record classes: a thin wrapper over the parsed record.
+
+    Nothing is decoded up front. The first field read decodes the fields of
+    this view and drops its record, so a value is never held both raw and
+    decoded; nested records are handed to their own views undecoded, and
+    records that are never touched never become objects. The fields live in
+    `__slots__` instead of a per-object `__dict__`.
+    """
+
+    __slots__ = ("_record",)
+    _fields: Tuple[str, ...] = ()
+    _field_objects: Tuple[Field, ...] = ()
+
+    def __init__(self, data: Dict[str, Any]):
+        self._record = data
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = tuple(
+            name for name, value in vars(cls).items() if isinstance(value, Field)
+        )
+        slots = set(vars(cls).get("__slots__", ()))
+        for name in fields:
+            if name == "record":
+                raise TypeError(f"{cls.__name__}.record would overwrite the record")
+            if getattr(cls, name).slot not in slots and f"_{name}" not in slots:
+                raise TypeError(f"{cls.__name__}.__slots__ is missing _{name}")
+        cls._fields = cls._fields + fields
+        cls._field_objects = cls._field_objects + tuple(
+            getattr(cls, name) for name in fields
+        )
+
+    def _decode(self):
+        record = self._record
+        for field in self._field_objects:
+            setattr(self, field.slot, field.decode(record))
+        self._record = None
+
+    @property
+    def raw(self) -> Optional[Dict[str, Any]]:
+        """The parsed record this view reads from, or None once it has been
+        decoded."""
+        return self._record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Every field that isn't None, with nested views and enums made plain."""
+        d = {}
+        for name in self._fields:
+            value = getattr(self, name)
+            if value is not None:
+                d[name] = _plain(value)
+        return d
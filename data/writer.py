@@ -0,0 +1,664 @@
+import hashlib
+import itertools
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from data import jsonio
+from data.sharding import shard_of
+
+
+def serialize_entries(entries) -> bytes:
+    return jsonio.dumps(entries)
+
+
+def gzip_bytes(payload: bytes, level: int = 9) -> bytes:
+    """Compress `payload` into a gzip member with a fixed header.
+
+    zlib writes the gzip wrapper itself when wbits=31, with mtime=0 and no
+    file name, so the output is byte-for-byte reproducible between builds.
+    (zlib.compress only takes wbits from Python 3.11 on.)
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(payload) + compressor.flush()
+
+
+def _brotli_compress(payload: bytes, level: int) -> bytes:
+    try:
+        import brotli
+    except ImportError:
+        try:
+            import brotlicffi as brotli
+        except ImportError as e:
+            raise ImportError("Writing .br files requires the brotli package") from e
+    return brotli.compress(payload, quality=level)
+
+
+_zstd_local = threading.local()
+
+
+def _zstd_compress(payload: bytes, level: int) -> bytes:
+    # ZstdCompressor objects are reusable but not thread-safe, so keep one per
+    # thread and level.
+    compressors = getattr(_zstd_local, "compressors", None)
+    if compressors is None:
+        compressors = _zstd_local.compressors = {}
+    if level not in compressors:
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "Writing .zst files requires the zstandard package"
+            ) from e
+        compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressors[level].compress(payload)
+
+
+class Codec:
+    """A precompressed output variant and the levels it is written at.
+
+    Hot keys (common words, frequent characters) get `hot_level`, the slow
+    maximum-effort setting; the long tail gets the much faster `cold_level`.
+    `content_encoding` is what browsers that decode the files themselves
+    accept them as, if they do.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        extension: str,
+        compress: Callable[[bytes, int], bytes],
+        hot_level: int,
+        cold_level: int,
+        content_encoding: Optional[str] = None,
+    ):
+        self.name = name
+        self.extension = extension
+        self.compress = compress
+        self.hot_level = hot_level
+        self.cold_level = cold_level
+        self.content_encoding = content_encoding
+
+    def __repr__(self):
+        return f"Codec(name={self.name}, extension={self.extension})"
+
+
+class TrainedZstdCodec(Codec):
+    """zstd against a dictionary trained on a sample of this build's payloads.
+
+    Most payloads are a few hundred bytes of the same field names and tag
+    strings, which a per-file compressor never gets to see twice; a shared
+    dictionary lets every file reference them instead. Browsers cannot
+    decode these through Content-Encoding, so the client fetches the
+    published dictionary once and decompresses the files itself.
+    """
+
+    def __init__(self, name, extension, hot_level, cold_level, dictionary_size):
+        super().__init__(name, extension, self._compress, hot_level, cold_level)
+        self.dictionary_size = dictionary_size
+        self.dictionary: Optional[bytes] = None
+        self._local = threading.local()
+
+    def dictionary_id(self) -> str:
+        return payload_digest(self.dictionary or b"")
+
+    def use_dictionary(self, dictionary: bytes):
+        self.dictionary = dictionary
+        self._local = threading.local()
+
+    def train(self, samples: List[bytes]) -> bytes:
+        import zstandard
+
+        # Fixed parameters and a single thread keep the dictionary (and so
+        # every file compressed with it) identical between builds.
+        trained = zstandard.train_dictionary(
+            self.dictionary_size, samples, k=1024, d=8, threads=0
+        )
+        return trained.as_bytes()
+
+    def _compress(self, payload: bytes, level: int) -> bytes:
+        compressors = getattr(self._local, "compressors", None)
+        if compressors is None:
+            compressors = self._local.compressors = {}
+        if level not in compressors:
+            import zstandard
+
+            compressors[level] = zstandard.ZstdCompressor(
+                level=level,
+                dict_data=zstandard.ZstdCompressionDict(self.dictionary),
+            )
+        return compressors[level].compress(payload)
+
+
+CODECS = {
+    "gzip": Codec("gzip", "gz", gzip_bytes, 9, 6, "gzip"),
+    "br": Codec("br", "br", _brotli_compress, 11, 5, "br"),
+    "zst": Codec("zst", "zst", _zstd_compress, 19, 3, "zstd"),
+    "zstd-dict": TrainedZstdCodec("zstd-dict", "zdict", 19, 3, 64 * 1024),
+}
+
+
+def write_precompressed(path: Path, payload: bytes, codecs: Iterable[Codec]):
+    """Write `{path}.{extension}` for every codec, leaving identical files alone.
+
+    For small files fetched through the same `.json` rewrites as the entries,
+    which is why no uncompressed copy is written.
+    """
+    codecs = list(codecs)
+    for codec in codecs:
+        data = codec.compress(payload, codec.hot_level)
+        codec_path = path.with_name(f"{path.name}.{codec.extension}")
+        if codec_path.exists() and codec_path.read_bytes() == data:
+            continue
+        with open(codec_path, "wb") as f:
+            f.write(data)
+    # Variants of codecs an earlier build used and this one doesn't.
+    for codec in CODECS.values():
+        if codec not in codecs:
+            path.with_name(f"{path.name}.{codec.extension}").unlink(missing_ok=True)
+
+
+# One in this many keys (by crc32, so the choice doesn't depend on the shard
+# count) is sampled for dictionary training.
+DICTIONARY_SAMPLE_STRIDE = 8
+
+
+def payload_digest(payload: bytes) -> str:
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+class Ledger:
+    """Content hashes of the files in an output directory, keyed by dictionary key.
+
+    Persisted next to the output directory (not inside it, so it is never
+    deployed) and used to skip rewriting files whose payload has not changed
+    and to delete files whose key has disappeared.
+    """
+
+    def __init__(
+        self, path: Path, output_format: str, hashes: Optional[Dict[str, str]] = None
+    ):
+        self.path = path
+        # The writer's format tag; a ledger written for another format (or
+        # another version of it) is ignored so everything gets rewritten.
+        self.output_format = output_format
+        self.hashes: Dict[str, str] = hashes or {}
+        # The keys and format of a ledger that was ignored, which still say
+        # what files are left over from the previous build.
+        self.stale_keys: List[str] = []
+        self.stale_format: Optional[str] = None
+
+    def __repr__(self):
+        return f"Ledger(path={self.path}, keys_count={len(self.hashes)})"
+
+    @staticmethod
+    def path_for(output_dir: Path, namespace: str = "") -> Path:
+        """The ledger of `output_dir`, or of one of its namespaces (like "names")."""
+        suffix = f".{namespace}" if namespace else ""
+        return output_dir.parent / f".{output_dir.name}{suffix}.ledger.json"
+
+    @classmethod
+    def load(cls, path: Path, output_format: str, rebuild: bool = False) -> "Ledger":
+        """Load a ledger, or return an empty one if it is missing or stale.
+
+        With `rebuild`, or for a ledger of another format, the hashes are
+        dropped and only the keys are kept, as `stale_keys`.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = jsonio.load(f)
+        except (FileNotFoundError, ValueError):
+            return cls(path, output_format)
+        if data.get("format") == output_format and not rebuild:
+            return cls(path, output_format, data["files"])
+        ledger = cls(path, output_format)
+        ledger.stale_keys = list(data.get("files", {}))
+        ledger.stale_format = data.get("format")
+        return ledger
+
+    def save(self):
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            jsonio.dump({"format": self.output_format, "files": self.hashes}, f)
+        os.replace(tmp_path, self.path)
+
+
+class WriteStats:
+    def __init__(self):
+        self.keys = 0
+        self.files = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+        self.seconds = 0.0
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.hashes: Dict[str, str] = {}
+        self.codec_bytes: Dict[str, int] = {}
+
+    def add(self, other: "WriteStats"):
+        self.keys += other.keys
+        self.files += other.files
+        self.raw_bytes += other.raw_bytes
+        self.written_bytes += other.written_bytes
+        self.added += other.added
+        self.changed += other.changed
+        self.unchanged += other.unchanged
+        self.removed += other.removed
+        self.hashes.update(other.hashes)
+        for name, size in other.codec_bytes.items():
+            self.codec_bytes[name] = self.codec_bytes.get(name, 0) + size
+
+    def summary(self) -> str:
+        seconds = max(self.seconds, 1e-9)
+        return (
+            f"{self.files} files in {self.seconds:.2f} seconds "
+            f"({self.files / seconds:.0f} files/sec, "
+            f"{self.raw_bytes / seconds / 1e6:.1f} MB/sec serialized, "
+            f"{self.written_bytes / seconds / 1e6:.1f} MB/sec written; "
+            f"{self.raw_bytes / 1e6:.1f} MB -> {self.written_bytes / 1e6:.1f} MB)"
+        )
+
+    def codec_summary(self) -> str:
+        """Compare the codecs over every payload written in this run."""
+        raw = max(self.raw_bytes, 1)
+        return ", ".join(
+            f"{name} {size / 1e6:.2f} MB ({size / raw:.1%} of raw)"
+            for name, size in sorted(self.codec_bytes.items(), key=lambda i: i[1])
+        )
+
+    def changes_summary(self) -> str:
+        return (
+            f"{self.added} added, {self.changed} changed, "
+            f"{self.removed} removed, {self.unchanged} unchanged"
+        )
+
+
+class DictionaryWriter:
+    """Writes one precompressed `{key}.json.{ext}` file per key and codec.
+
+    Entries are serialized to bytes on the calling thread (json holds the GIL
+    anyway) and handed over a batch at a time; the compressors and file I/O
+    release the GIL, so compression and writing overlap across the pool
+    threads. `is_hot(key, entries)` picks the keys that get each codec's
+    maximum-effort level.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        threads: Optional[int] = None,
+        batch_size: int = 512,
+        codecs: Iterable[str] = ("gzip",),
+        is_hot: Optional[Callable[[str, object], bool]] = None,
+    ):
+        self.output_dir = output_dir
+        self.threads = threads or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.codecs = [CODECS[name] for name in codecs]
+        self.is_hot = is_hot
+        # Bump the version when the bytes written for an unchanged payload
+        # change, so the next build doesn't trust the old ledger.
+        self.output_format = "json/2/" + "+".join(c.name for c in self.codecs)
+        self.trained_codecs = [
+            c for c in self.codecs if isinstance(c, TrainedZstdCodec)
+        ]
+
+    @property
+    def wants_samples(self) -> bool:
+        return bool(self.trained_codecs)
+
+    def sample_payloads(self, items) -> List[Tuple[str, bytes]]:
+        return [
+            (key, serialize_entries(entries))
+            for key, entries in items
+            if shard_of(key, DICTIONARY_SAMPLE_STRIDE) == 0
+        ]
+
+    def train_dictionary(self, samples: List[Tuple[str, bytes]]) -> bytes:
+        """Train the shared dictionary on `samples` and report what it buys."""
+        import zstandard
+
+        payloads = [payload for _, payload in sorted(samples)]
+        codec = self.trained_codecs[0]
+        start_time = time.time()
+        dictionary = codec.train(payloads)
+        self.use_dictionary(dictionary)
+
+        plain = zstandard.ZstdCompressor(level=codec.cold_level)
+        raw_size = sum(len(p) for p in payloads)
+        plain_size = sum(len(plain.compress(p)) for p in payloads)
+        dict_size = sum(len(codec.compress(p, codec.cold_level)) for p in payloads)
+        print(
+            f"Trained a {len(dictionary) / 1024:.0f} KB zstd dictionary on "
+            f"{len(payloads)} payloads in {time.time() - start_time:.2f} seconds: "
+            f"{raw_size / 1e6:.2f} MB -> {plain_size / 1e6:.2f} MB without "
+            f"({plain_size / max(raw_size, 1):.1%}), {dict_size / 1e6:.2f} MB with "
+            f"the dictionary ({dict_size / max(raw_size, 1):.1%})"
+        )
+        return dictionary
+
+    def use_dictionary(self, dictionary: bytes):
+        for codec in self.trained_codecs:
+            codec.use_dictionary(dictionary)
+
+    def write_file(self, name: str, payload: bytes):
+        """Write a shared file (like the tag legend) with the entries' codecs."""
+        write_precompressed(
+            self.output_dir / name,
+            payload,
+            [c for c in self.codecs if c not in self.trained_codecs],
+        )
+
+    def publish_dictionary(self):
+        """Write the trained dictionary next to the files that need it."""
+        codec = self.trained_codecs[0]
+        with open(self.output_dir / f"{codec.name}.dict", "wb") as f:
+            f.write(codec.dictionary)
+        with open(self.output_dir / f"{codec.name}.json", "wb") as f:
+            jsonio.dump(
+                {
+                    "id": codec.dictionary_id(),
+                    "size": len(codec.dictionary),
+                    "extension": codec.extension,
+                },
+                f,
+            )
+
+    def _file_paths(self, key: str, codecs: Optional[List[Codec]] = None) -> List[Path]:
+        codecs = self.codecs if codecs is None else codecs
+        return [self.output_dir / f"{key}.json.{c.extension}" for c in codecs]
+
+    def dropped_codecs(self, ledger: Optional[Ledger]) -> List[Codec]:
+        """The codecs a stale ledger's files were written with that this
+        writer no longer writes."""
+        if ledger is None or not (ledger.stale_format or "").startswith("json/"):
+            return []
+        names = ledger.stale_format.rsplit("/", 1)[-1].split("+")
+        return [
+            CODECS[name]
+            for name in names
+            if name in CODECS and CODECS[name] not in self.codecs
+        ]
+
+    def _write_batch(self, batch: List[Tuple[str, bytes, bool]]) -> WriteStats:
+        stats = WriteStats()
+        for key, payload, hot in batch:
+            for codec in self.codecs:
+                data = codec.compress(
+                    payload, codec.hot_level if hot else codec.cold_level
+                )
+                with open(self.output_dir / f"{key}.json.{codec.extension}", "wb") as f:
+                    f.write(data)
+                stats.written_bytes += len(data)
+                stats.codec_bytes[codec.name] = stats.codec_bytes.get(
+                    codec.name, 0
+                ) + len(data)
+            stats.files += 1
+            stats.raw_bytes += len(payload)
+        return stats
+
+    def write(
+        self,
+        items: Iterable[Tuple[str, object]],
+        ledger: Optional[Ledger] = None,
+        shard_index: int = 0,
+        shard_count: int = 1,
+    ) -> WriteStats:
+        """Serialize and write every `(key, entries)` pair and return the totals.
+
+        With a `ledger` from the previous build, files whose payload hash is
+        unchanged (and that still exist) are left untouched, and files for
+        ledger keys that are no longer produced are deleted. In a sharded
+        build only the keys of this process's shard are considered for
+        deletion. The new hashes are returned in `stats.hashes`.
+        """
+        previous = ledger.hashes if ledger else {}
+        # Files compressed against a trained dictionary change whenever the
+        # dictionary does, even if their payload doesn't.
+        salt = "".join(c.dictionary_id() for c in self.trained_codecs).encode()
+        stats = WriteStats()
+        start_time = time.time()
+        pending = []
+        batch = []
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for key, entries in items:
+                payload = serialize_entries(entries)
+                digest = payload_digest(salt + payload)
+                stats.keys += 1
+                stats.hashes[key] = digest
+                old_digest = previous.get(key)
+                if old_digest is None:
+                    stats.added += 1
+                elif old_digest != digest or not all(
+                    path.exists() for path in self._file_paths(key)
+                ):
+                    stats.changed += 1
+                else:
+                    stats.unchanged += 1
+                    continue
+
+                hot = self.is_hot is not None and self.is_hot(key, entries)
+                batch.append((key, payload, hot))
+                if len(batch) < self.batch_size:
+                    continue
+                pending.append(pool.submit(self._write_batch, batch))
+                batch = []
+                # Cap the batches in flight so serialized bytes don't pile up.
+                if len(pending) >= self.threads * 2:
+                    stats.add(pending.pop(0).result())
+            if batch:
+                pending.append(pool.submit(self._write_batch, batch))
+            for future in pending:
+                stats.add(future.result())
+
+        # Keys no longer produced lose all their files, and after a change
+        # of codecs the others lose the files of the codecs dropped.
+        dropped = self.dropped_codecs(ledger)
+        stale_keys = ledger.stale_keys if ledger else []
+        for key in itertools.chain(previous, stale_keys):
+            if shard_of(key, shard_count) != shard_index:
+                continue
+            if key in stats.hashes:
+                paths = self._file_paths(key, dropped)
+            else:
+                paths = self._file_paths(key) + self._file_paths(key, dropped)
+                stats.removed += 1
+            for path in paths:
+                path.unlink(missing_ok=True)
+        stats.seconds = time.time() - start_time
+        return stats
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+# A bucket appends its buffered records to its file past this many bytes,
+# and every bucket does once all of them buffer more than the second limit.
+BUCKET_FLUSH_BYTES = 256 * 1024
+PENDING_FLUSH_BYTES = 32 * 1024 * 1024
+
+
+class _Bucket:
+    """A bucket being packed. Records are buffered and appended to the
+    temporary file in `flush`, which opens and closes it again, so writing
+    thousands of buckets never holds more than one file open."""
+
+    def __init__(self, bin_path: Path):
+        self.bin_path = bin_path
+        self.tmp_path = bin_path.with_name(bin_path.name + ".tmp")
+        self.size = 0
+        self.index: Dict[str, List[int]] = {}
+        self.digest = hashlib.blake2b(digest_size=16)
+        self.pending: List[bytes] = []
+        self.pending_bytes = 0
+        self.started = False
+
+    def append(self, key: str, record: bytes):
+        self.index[key] = [self.size, len(record)]
+        self.pending.append(record)
+        self.pending_bytes += len(record)
+        self.size += len(record)
+        self.digest.update(key.encode("utf-8") + b"\0" + record)
+
+    def flush(self):
+        # The first flush truncates whatever an interrupted build left behind.
+        with open(self.tmp_path, "ab" if self.started else "wb") as f:
+            f.writelines(self.pending)
+        self.started = True
+        self.pending = []
+        self.pending_bytes = 0
+
+    def discard(self):
+        if self.started:
+            self.tmp_path.unlink(missing_ok=True)
+
+
+class PackedWriter:
+    """Packs the entries into `buckets` files instead of one file per key.
+
+    Each key's entry list is compressed into its own gzip member and appended
+    to `packed/{bucket}.bin`, so one record can be fetched with an HTTP range
+    request and gunzipped on its own. `packed/{bucket}.idx.json` maps every
+    key of the bucket to `[offset, length]` and `packed/meta.json` records
+    the bucket count. A key lives in bucket `crc32(utf-8 key) % buckets`,
+    the same hash the sharded build uses, so with a bucket count that is a
+    multiple of the worker count every bucket is written by a single worker.
+
+    The ledger holds one hash per bucket; buckets whose content is unchanged
+    are not rewritten. Records are always gzip: they are decompressed by the
+    client (DecompressionStream) rather than through HTTP content encoding.
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        buckets: int = 256,
+        threads: Optional[int] = None,
+        batch_size: int = 512,
+        level: int = 9,
+    ):
+        self.output_dir = output_dir
+        self.packed_dir = output_dir / "packed"
+        self.buckets = buckets
+        self.threads = threads or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.level = level
+        self.output_format = f"packed/1/{buckets}"
+
+    def _paths(self, bucket: int) -> Tuple[Path, Path]:
+        return (
+            self.packed_dir / f"{bucket}.bin",
+            self.packed_dir / f"{bucket}.idx.json",
+        )
+
+    def _finish_bucket(self, bucket: int, state: _Bucket, previous, stats):
+        state.flush()
+        bin_path, idx_path = self._paths(bucket)
+        digest = state.digest.hexdigest()
+        stats.hashes[str(bucket)] = digest
+        old_digest = previous.get(str(bucket))
+        if old_digest == digest and bin_path.exists() and idx_path.exists():
+            os.remove(state.tmp_path)
+            stats.unchanged += 1
+            return
+        if old_digest is None:
+            stats.added += 1
+        else:
+            stats.changed += 1
+        os.replace(state.tmp_path, bin_path)
+        with open(idx_path, "wb") as f:
+            jsonio.dump(state.index, f)
+        stats.files += 1
+        stats.written_bytes += state.size
+
+    def write(
+        self,
+        items: Iterable[Tuple[str, object]],
+        ledger: Optional[Ledger] = None,
+        shard_index: int = 0,
+        shard_count: int = 1,
+    ) -> WriteStats:
+        """Pack every `(key, entries)` pair into its bucket and return the totals."""
+        if self.buckets % shard_count:
+            raise ValueError(
+                f"{self.buckets} buckets cannot be split evenly across {shard_count} shards"
+            )
+        self.packed_dir.mkdir(parents=True, exist_ok=True)
+        previous = ledger.hashes if ledger else {}
+        stats = WriteStats()
+        start_time = time.time()
+        open_buckets: Dict[int, _Bucket] = {}
+        # Records buffered across all buckets, flushed together past a limit.
+        pending_bytes = 0
+        compress = partial(gzip_bytes, level=self.level)
+        try:
+            with ThreadPoolExecutor(max_workers=self.threads) as pool:
+                for batch in _batched(items, self.batch_size):
+                    payloads = [serialize_entries(entries) for _, entries in batch]
+                    records = pool.map(compress, payloads)
+                    for (key, _), payload, record in zip(batch, payloads, records):
+                        bucket = shard_of(key, self.buckets)
+                        if bucket not in open_buckets:
+                            open_buckets[bucket] = _Bucket(self._paths(bucket)[0])
+                        state = open_buckets[bucket]
+                        state.append(key, record)
+                        pending_bytes += len(record)
+                        if state.pending_bytes >= BUCKET_FLUSH_BYTES:
+                            pending_bytes -= state.pending_bytes
+                            state.flush()
+                        stats.keys += 1
+                        stats.raw_bytes += len(payload)
+                        stats.codec_bytes["gzip"] = stats.codec_bytes.get(
+                            "gzip", 0
+                        ) + len(record)
+                    if pending_bytes >= PENDING_FLUSH_BYTES:
+                        for state in open_buckets.values():
+                            if state.pending:
+                                state.flush()
+                        pending_bytes = 0
+            for bucket in sorted(open_buckets):
+                self._finish_bucket(bucket, open_buckets.pop(bucket), previous, stats)
+        finally:
+            for state in open_buckets.values():
+                state.discard()
+
+        # Buckets of this shard that ended up empty
+        for bucket in range(shard_index, self.buckets, shard_count):
+            if str(bucket) not in stats.hashes and str(bucket) in previous:
+                for path in self._paths(bucket):
+                    path.unlink(missing_ok=True)
+                stats.removed += 1
+        stats.seconds = time.time() - start_time
+        return stats
+
+    def write_file(self, name: str, payload: bytes):
+        """Write a shared file (like the tag legend) next to the packed folder.
+
+        Records are gzip regardless, but shared files go through the same
+        gzip/brotli negotiation in vercel.json as unpacked entries would.
+        """
+        write_precompressed(
+            self.output_dir / name, payload, [CODECS["gzip"], CODECS["br"]]
+        )
+
+    def write_meta(self):
+        """Write meta.json and drop buckets left over from a larger bucket count."""
+        with open(self.packed_dir / "meta.json", "wb") as f:
+            jsonio.dump({"format": 1, "buckets": self.buckets, "hash": "crc32"}, f)
+        for path in self.packed_dir.glob("*.bin"):
+            if int(path.name.split(".")[0]) >= self.buckets:
+                for stale in self._paths(int(path.name.split(".")[0])):
+                    stale.unlink(missing_ok=True)
@@ -2,6 +2,9 @@ from pathlib import Path
 from typing import List, Optional, Dict, Any, Union
 from enum import Enum
 
+from data import jsonio
+from data.views import Field, View
+
 
 class TypeElement(str, Enum):
     DELETED = "deleted"
@@ -22,228 +25,228 @@ class ImageType(str, Enum):
     SEAL = "Seal"
 
 
-class Comment:
-    def __init__(self, data: Dict[str, Any]):
-        self.source: str = data["source"]
-        self.text: str = data["text"]
-
-    def to_dict(self):
-        return self.__dict__
-
-
-class Component:
-    def __init__(self, data: Dict[str, Any]):
-        self.type: List[TypeElement] = [TypeElement(t) for t in data["type"]]
-        self.character: str = data["character"]
-        self.hint: Optional[str] = data.get("hint")
-        self.is_old_pronunciation: Optional[bool] = data.get("isOldPronunciation")
-        self.is_glyph_changed: Optional[bool] = data.get("isGlyphChanged")
-        self.is_from_original_meaning: Optional[bool] = data.get(
-            "isFromOriginalMeaning"
-        )
-
-    def to_dict(self):
-        return {
-            k: v if not isinstance(v, Enum) else v.value
-            for k, v in self.__dict__.items()
-            if v is not None
-        }
-
-
-class CharData:
-    def __init__(self, data: Dict[str, Any]):
-        self.strokes: List[str] = data["strokes"]
-        self.medians: List[List[List[int]]] = data["medians"]
-        self.character: Optional[str] = data.get("character")
-
-    def to_dict(self):
-        return {k: v for k, v in self.__dict__.items() if v is not None}
-
-
-class ImageData:
-    def __init__(self, data: Dict[str, Any]):
-        self.strokes: List[str] = data["strokes"]
-        self.medians: List[List[List[int]]] = data["medians"]
-
-    def to_dict(self):
-        return self.__dict__
-
-
-class Image:
-    def __init__(self, data: Dict[str, Any]):
-        self.url: Optional[str] = data.get("url")
-        self.source: str = data["source"]
-        self.description: str = data["description"]
-        self.type: ImageType = ImageType(data["type"])
-        self.era: str = data["era"]
-        self.data: Optional[ImageData] = (
-            ImageData(data["data"]) if data.get("data") else None
-        )
-        self.fragments: Optional[List[List[int]]] = data.get("fragments")
-
-    def to_dict(self):
-        d = {
-            k: v if not isinstance(v, Enum) else v.value
-            for k, v in self.__dict__.items()
-            if v is not None
-        }
-        if self.data:
-            d["data"] = self.data.to_dict()
-        return d
-
-
-class OldPronunciation:
-    def __init__(self, data: Dict[str, Any]):
-        self.pinyin: Optional[str] = data.get("pinyin")
-        self.MC: str = data["MC"]
-        self.OC: Optional[str] = data.get("OC")
-        self.gloss: Optional[str] = data.get("gloss")
-        self.source: Optional[str] = data.get("source")
-
-    def to_dict(self):
-        return {k: v for k, v in self.__dict__.items() if v is not None}
-
+class Comment(View):
+    __slots__ = ("_source", "_text")
 
-class PinyinFrequency:
-    def __init__(self, data: Dict[str, Any]):
-        self.pinyin: str = data["pinyin"]
-        self.count: int = data["count"]
-
-    def to_dict(self):
-        return self.__dict__
-
-
-class TopWord:
-    def __init__(self, data: Dict[str, Any]):
-        self.word: str = data["word"]
-        self.share: float = data["share"]
-        self.trad: str = data["trad"]
-        self.gloss: str = data["gloss"]
-
-    def to_dict(self):
-        return self.__dict__
-
-
-class Statistics:
-    def __init__(self, data: Dict[str, Any]):
-        self.hsk_level: int = data["hskLevel"]
-        self.movie_word_count: Optional[int] = data.get("movieWordCount")
-        self.movie_word_count_percent: Optional[float] = data.get(
-            "movieWordCountPercent"
-        )
-        self.movie_word_rank: Optional[int] = data.get("movieWordRank")
-        self.movie_word_contexts: Optional[int] = data.get("movieWordContexts")
-        self.movie_word_contexts_percent: Optional[float] = data.get(
-            "movieWordContextsPercent"
-        )
-        self.book_word_count: Optional[int] = data.get("bookWordCount")
-        self.book_word_count_percent: Optional[float] = data.get("bookWordCountPercent")
-        self.book_word_rank: Optional[int] = data.get("bookWordRank")
-        self.movie_char_count: Optional[int] = data.get("movieCharCount")
-        self.movie_char_count_percent: Optional[float] = data.get(
-            "movieCharCountPercent"
-        )
-        self.movie_char_rank: Optional[int] = data.get("movieCharRank")
-        self.movie_char_contexts: Optional[int] = data.get("movieCharContexts")
-        self.movie_char_contexts_percent: Optional[float] = data.get(
-            "movieCharContextsPercent"
-        )
-        self.book_char_count: Optional[int] = data.get("bookCharCount")
-        self.book_char_count_percent: Optional[float] = data.get("bookCharCountPercent")
-        self.book_char_rank: Optional[int] = data.get("bookCharRank")
-        self.top_words: Optional[List[TopWord]] = (
-            [TopWord(w) for w in data["topWords"]] if data.get("topWords") else None
-        )
-        self.pinyin_frequency: Optional[float] = data.get("pinyinFrequency")
-
-    def to_dict(self):
-        d = {k: v for k, v in self.__dict__.items() if v is not None}
-        if self.top_words:
-            d["top_words"] = [w.to_dict() for w in self.top_words]
-        return d
-
-
-class Variant:
-    def __init__(self, data: Dict[str, Any]):
-        self.char: Optional[str] = data.get("char")
-        self.parts: Optional[str] = data.get("parts")
-        self.source: str = data["source"]
-
-    def to_dict(self):
-        return {k: v for k, v in self.__dict__.items() if v is not None}
-
-
-class ChineseCharEntry:
-    def __init__(self, data: Dict[str, Any]):
-        self._id: str = data["_id"]
-        self.char: str = data["char"]
-        self.codepoint: Optional[str] = data.get("codepoint")
-        self.stroke_count: Optional[Union[int, str]] = data.get("strokeCount")
-        self.sources: Optional[List[str]] = data.get("sources")
-        self.images: Optional[List[Image]] = (
-            [Image(i) for i in data["images"]] if data.get("images") else None
-        )
-        self.shuowen: Optional[str] = data.get("shuowen")
-        self.variants: Optional[List[Variant]] = (
-            [Variant(v) for v in data["variants"]] if data.get("variants") else None
-        )
-        self.gloss: Optional[str] = data.get("gloss")
-        self.statistics: Optional[Statistics] = (
-            Statistics(data["statistics"]) if data.get("statistics") else None
-        )
-        self.hint: Optional[str] = data.get("hint")
-        self.is_verified: Optional[bool] = data.get("isVerified")
-        self.variant_of: Optional[str] = data.get("variantOf")
-        self.simp_variants: Optional[List[str]] = data.get("simpVariants")
-        self.comments: Optional[List[Comment]] = (
-            [Comment(c) for c in data["comments"]] if data.get("comments") else None
-        )
-        self.custom_sources: Optional[List[str]] = data.get("customSources")
-        self.components: Optional[List[Component]] = (
-            [Component(c) for c in data["components"]]
-            if data.get("components")
-            else None
-        )
-        self.data: Optional[CharData] = (
-            CharData(data["data"]) if data.get("data") else None
-        )
-        self.fragments: Optional[List[List[int]]] = data.get("fragments")
-        self.old_pronunciations: Optional[List[OldPronunciation]] = (
-            [OldPronunciation(op) for op in data["oldPronunciations"]]
-            if data.get("oldPronunciations")
-            else None
-        )
-        self.original_meaning: Optional[str] = data.get("originalMeaning")
-        self.trad_variants: Optional[List[str]] = data.get("tradVariants")
-        self.pinyin_frequencies: Optional[List[PinyinFrequency]] = (
-            [PinyinFrequency(pf) for pf in data["pinyinFrequencies"]]
-            if data.get("pinyinFrequencies")
-            else None
-        )
+    source: str = Field("source", required=True)
+    text: str = Field("text", required=True)
+
+
+class Component(View):
+    __slots__ = (
+        "_type",
+        "_character",
+        "_hint",
+        "_is_old_pronunciation",
+        "_is_glyph_changed",
+        "_is_from_original_meaning",
+    )
+
+    type: List[TypeElement] = Field("type", TypeElement, many=True, required=True)
+    character: str = Field("character", required=True)
+    hint: Optional[str] = Field("hint")
+    is_old_pronunciation: Optional[bool] = Field("isOldPronunciation")
+    is_glyph_changed: Optional[bool] = Field("isGlyphChanged")
+    is_from_original_meaning: Optional[bool] = Field("isFromOriginalMeaning")
+
+
+class CharData(View):
+    __slots__ = ("_strokes", "_medians", "_character")
+
+    strokes: List[str] = Field("strokes", required=True)
+    medians: List[List[List[int]]] = Field("medians", required=True)
+    character: Optional[str] = Field("character")
+
+
+class ImageData(View):
+    __slots__ = ("_strokes", "_medians")
+
+    strokes: List[str] = Field("strokes", required=True)
+    medians: List[List[List[int]]] = Field("medians", required=True)
+
+
+class Image(View):
+    __slots__ = (
+        "_url",
+        "_source",
+        "_description",
+        "_type",
+        "_era",
+        "_data",
+        "_fragments",
+    )
+
+    url: Optional[str] = Field("url")
+    source: str = Field("source", required=True)
+    description: str = Field("description", required=True)
+    type: ImageType = Field("type", ImageType, required=True)
+    era: str = Field("era", required=True)
+    data: Optional[ImageData] = Field("data", ImageData, empty_is_none=True)
+    fragments: Optional[List[List[int]]] = Field("fragments")
+
+
+class OldPronunciation(View):
+    __slots__ = ("_pinyin", "_MC", "_OC", "_gloss", "_source")
+
+    pinyin: Optional[str] = Field("pinyin")
+    MC: str = Field("MC", required=True)
+    OC: Optional[str] = Field("OC")
+    gloss: Optional[str] = Field("gloss")
+    source: Optional[str] = Field("source")
+
+
+class PinyinFrequency(View):
+    __slots__ = ("_pinyin", "_count")
+
+    pinyin: str = Field("pinyin", required=True)
+    count: int = Field("count", required=True)
+
+
+class TopWord(View):
+    __slots__ = ("_word", "_share", "_trad", "_gloss")
+
+    word: str = Field("word", required=True)
+    share: float = Field("share", required=True)
+    trad: str = Field("trad", required=True)
+    gloss: str = Field("gloss", required=True)
+
+
+class Statistics(View):
+    __slots__ = (
+        "_hsk_level",
+        "_movie_word_count",
+        "_movie_word_count_percent",
+        "_movie_word_rank",
+        "_movie_word_contexts",
+        "_movie_word_contexts_percent",
+        "_book_word_count",
+        "_book_word_count_percent",
+        "_book_word_rank",
+        "_movie_char_count",
+        "_movie_char_count_percent",
+        "_movie_char_rank",
+        "_movie_char_contexts",
+        "_movie_char_contexts_percent",
+        "_book_char_count",
+        "_book_char_count_percent",
+        "_book_char_rank",
+        "_top_words",
+        "_pinyin_frequency",
+    )
+
+    hsk_level: int = Field("hskLevel", required=True)
+    movie_word_count: Optional[int] = Field("movieWordCount")
+    movie_word_count_percent: Optional[float] = Field("movieWordCountPercent")
+    movie_word_rank: Optional[int] = Field("movieWordRank")
+    movie_word_contexts: Optional[int] = Field("movieWordContexts")
+    movie_word_contexts_percent: Optional[float] = Field("movieWordContextsPercent")
+    book_word_count: Optional[int] = Field("bookWordCount")
+    book_word_count_percent: Optional[float] = Field("bookWordCountPercent")
+    book_word_rank: Optional[int] = Field("bookWordRank")
+    movie_char_count: Optional[int] = Field("movieCharCount")
+    movie_char_count_percent: Optional[float] = Field("movieCharCountPercent")
+    movie_char_rank: Optional[int] = Field("movieCharRank")
+    movie_char_contexts: Optional[int] = Field("movieCharContexts")
+    movie_char_contexts_percent: Optional[float] = Field("movieCharContextsPercent")
+    book_char_count: Optional[int] = Field("bookCharCount")
+    book_char_count_percent: Optional[float] = Field("bookCharCountPercent")
+    book_char_rank: Optional[int] = Field("bookCharRank")
+    top_words: Optional[List[TopWord]] = Field(
+        "topWords", TopWord, many=True, empty_is_none=True
+    )
+    pinyin_frequency: Optional[float] = Field("pinyinFrequency")
+
+
+class Variant(View):
+    __slots__ = ("_char", "_parts", "_source")
+
+    char: Optional[str] = Field("char")
+    parts: Optional[str] = Field("parts")
+    source: str = Field("source", required=True)
+
+
+class ChineseCharEntry(View):
+    """One char dict record. Its nested records are decoded when first read."""
+
+    __slots__ = (
+        "__id",
+        "_char",
+        "_codepoint",
+        "_stroke_count",
+        "_sources",
+        "_images",
+        "_shuowen",
+        "_variants",
+        "_gloss",
+        "_statistics",
+        "_hint",
+        "_is_verified",
+        "_variant_of",
+        "_simp_variants",
+        "_comments",
+        "_custom_sources",
+        "_components",
+        "_data",
+        "_fragments",
+        "_old_pronunciations",
+        "_original_meaning",
+        "_trad_variants",
+        "_pinyin_frequencies",
+    )
+
+    _id: str = Field("_id", required=True)
+    char: str = Field("char", required=True)
+    codepoint: Optional[str] = Field("codepoint")
+    stroke_count: Optional[Union[int, str]] = Field("strokeCount")
+    sources: Optional[List[str]] = Field("sources")
+    images: Optional[List[Image]] = Field("images", Image, many=True, empty_is_none=True)
+    shuowen: Optional[str] = Field("shuowen")
+    variants: Optional[List[Variant]] = Field(
+        "variants", Variant, many=True, empty_is_none=True
+    )
+    gloss: Optional[str] = Field("gloss")
+    statistics: Optional[Statistics] = Field(
+        "statistics", Statistics, empty_is_none=True
+    )
+    hint: Optional[str] = Field("hint")
+    is_verified: Optional[bool] = Field("isVerified")
+    variant_of: Optional[str] = Field("variantOf")
+    simp_variants: Optional[List[str]] = Field("simpVariants")
+    comments: Optional[List[Comment]] = Field(
+        "comments", Comment, many=True, empty_is_none=True
+    )
+    custom_sources: Optional[List[str]] = Field("customSources")
+    components: Optional[List[Component]] = Field(
+        "components", Component, many=True, empty_is_none=True
+    )
+    data: Optional[CharData] = Field("data", CharData, empty_is_none=True)
+    fragments: Optional[List[List[int]]] = Field("fragments")
+    old_pronunciations: Optional[List[OldPronunciation]] = Field(
+        "oldPronunciations", OldPronunciation, many=True, empty_is_none=True
+    )
+    original_meaning: Optional[str] = Field("originalMeaning")
+    trad_variants: Optional[List[str]] = Field("tradVariants")
+    pinyin_frequencies: Optional[List[PinyinFrequency]] = Field(
+        "pinyinFrequencies", PinyinFrequency, many=True, empty_is_none=True
+    )
 
     def __repr__(self):
         return f"ChineseCharEntry(id={self._id}, char={self.char})"
 
     def to_dict(self):
-        d = {k: v for k, v in self.__dict__.items() if v is not None}
-        d["images"] = [i.to_dict() for i in self.images] if self.images else None
-        d["variants"] = [v.to_dict() for v in self.variants] if self.variants else None
-        d["statistics"] = self.statistics.to_dict() if self.statistics else None
-        d["comments"] = [c.to_dict() for c in self.comments] if self.comments else None
-        d["components"] = (
-            [c.to_dict() for c in self.components] if self.components else None
-        )
-        d["data"] = self.data.to_dict() if self.data else None
-        d["old_pronunciations"] = (
-            [op.to_dict() for op in self.old_pronunciations]
-            if self.old_pronunciations
-            else None
-        )
-        d["pinyin_frequencies"] = (
-            [pf.to_dict() for pf in self.pinyin_frequencies]
-            if self.pinyin_frequencies
-            else None
-        )
+        d = super().to_dict()
+        # The nested records are always present, as None when missing.
+        for name in (
+            "images",
+            "variants",
+            "statistics",
+            "comments",
+            "components",
+            "data",
+            "old_pronunciations",
+            "pinyin_frequencies",
+        ):
+            d[name] = d.get(name)
         return d
 
 
@@ -259,12 +262,10 @@ class ChineseCharDict:
 
     @classmethod
     def from_jsonl(cls, file_path: str):
-        import json
-
         chinese_dict = cls()
         with open(file_path, "r", encoding="utf-8") as f:
             for line in f:
-                char_data = json.loads(line)
+                char_data = jsonio.loads(line)
                 chinese_dict.add_char(char_data)
         return chinese_dict
 
@@ -2,6 +2,9 @@ from pathlib import Path
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
+from data import jsonio
+from data.views import Field, View
+
 
 class SimpTrad(str, Enum):
     BOTH = "both"
@@ -15,109 +18,106 @@ class Source(str, Enum):
     UNICODE = "unicode"
 
 
-class TopWord:
-    def __init__(self, data: Dict[str, Any]):
-        self.word: str = data["word"]
-        self.share: float = data["share"]
-        self.trad: str = data["trad"]
-        self.gloss: str = data["gloss"]
+class TopWord(View):
+    __slots__ = ("_word", "_share", "_trad", "_gloss")
+
+    word: str = Field("word", required=True)
+    share: float = Field("share", required=True)
+    trad: str = Field("trad", required=True)
+    gloss: str = Field("gloss", required=True)
 
     def __repr__(self):
         return f"TopWord(word={self.word}, share={self.share}, trad={self.trad}, gloss={self.gloss})"
 
-    def to_dict(self):
-        return {k: v for k, v in self.__dict__.items() if v is not None}
 
-
-class Statistics:
-    def __init__(self, data: Dict[str, Any]):
-        self.hsk_level: int = data["hskLevel"]
-        self.top_words: Optional[List[TopWord]] = (
-            [TopWord(w) for w in data.get("topWords", [])]
-            if data.get("topWords")
-            else None
-        )
-        self.movie_word_count: Optional[int] = data.get("movieWordCount")
-        self.movie_word_count_percent: Optional[float] = data.get(
-            "movieWordCountPercent"
-        )
-        self.movie_word_rank: Optional[int] = data.get("movieWordRank")
-        self.movie_word_contexts: Optional[int] = data.get("movieWordContexts")
-        self.movie_word_contexts_percent: Optional[float] = data.get(
-            "movieWordContextsPercent"
-        )
-        self.book_word_count: Optional[int] = data.get("bookWordCount")
-        self.book_word_count_percent: Optional[float] = data.get("bookWordCountPercent")
-        self.book_word_rank: Optional[int] = data.get("bookWordRank")
-        self.movie_char_count: Optional[int] = data.get("movieCharCount")
-        self.movie_char_count_percent: Optional[float] = data.get(
-            "movieCharCountPercent"
-        )
-        self.movie_char_rank: Optional[int] = data.get("movieCharRank")
-        self.movie_char_contexts: Optional[int] = data.get("movieCharContexts")
-        self.movie_char_contexts_percent: Optional[float] = data.get(
-            "movieCharContextsPercent"
-        )
-        self.book_char_count: Optional[int] = data.get("bookCharCount")
-        self.book_char_count_percent: Optional[float] = data.get("bookCharCountPercent")
-        self.book_char_rank: Optional[int] = data.get("bookCharRank")
-        self.pinyin_frequency: Optional[float] = data.get("pinyinFrequency")
+class Statistics(View):
+    __slots__ = (
+        "_hsk_level",
+        "_top_words",
+        "_movie_word_count",
+        "_movie_word_count_percent",
+        "_movie_word_rank",
+        "_movie_word_contexts",
+        "_movie_word_contexts_percent",
+        "_book_word_count",
+        "_book_word_count_percent",
+        "_book_word_rank",
+        "_movie_char_count",
+        "_movie_char_count_percent",
+        "_movie_char_rank",
+        "_movie_char_contexts",
+        "_movie_char_contexts_percent",
+        "_book_char_count",
+        "_book_char_count_percent",
+        "_book_char_rank",
+        "_pinyin_frequency",
+    )
+
+    hsk_level: int = Field("hskLevel", required=True)
+    top_words: Optional[List[TopWord]] = Field(
+        "topWords", TopWord, many=True, empty_is_none=True
+    )
+    movie_word_count: Optional[int] = Field("movieWordCount")
+    movie_word_count_percent: Optional[float] = Field("movieWordCountPercent")
+    movie_word_rank: Optional[int] = Field("movieWordRank")
+    movie_word_contexts: Optional[int] = Field("movieWordContexts")
+    movie_word_contexts_percent: Optional[float] = Field("movieWordContextsPercent")
+    book_word_count: Optional[int] = Field("bookWordCount")
+    book_word_count_percent: Optional[float] = Field("bookWordCountPercent")
+    book_word_rank: Optional[int] = Field("bookWordRank")
+    movie_char_count: Optional[int] = Field("movieCharCount")
+    movie_char_count_percent: Optional[float] = Field("movieCharCountPercent")
+    movie_char_rank: Optional[int] = Field("movieCharRank")
+    movie_char_contexts: Optional[int] = Field("movieCharContexts")
+    movie_char_contexts_percent: Optional[float] = Field("movieCharContextsPercent")
+    book_char_count: Optional[int] = Field("bookCharCount")
+    book_char_count_percent: Optional[float] = Field("bookCharCountPercent")
+    book_char_rank: Optional[int] = Field("bookCharRank")
+    pinyin_frequency: Optional[float] = Field("pinyinFrequency")
 
     def __repr__(self):
         return f"Statistics(hsk_level={self.hsk_level}, top_words_count={len(self.top_words) if self.top_words else 0})"
 
-    def to_dict(self):
-        d = {k: v for k, v in self.__dict__.items() if v is not None}
-        if self.top_words:
-            d["top_words"] = [w.to_dict() for w in self.top_words]
-        return d
 
+class Item(View):
+    __slots__ = ("_source", "_pinyin", "_simp_trad", "_definitions", "_tang")
 
-class Item:
-    def __init__(self, data: Dict[str, Any]):
-        self.source: Optional[Source] = (
-            Source(data["source"]) if data.get("source") else None
-        )
-        self.pinyin: Optional[str] = data.get("pinyin")
-        self.simp_trad: Optional[SimpTrad] = (
-            SimpTrad(data["simpTrad"]) if data.get("simpTrad") else None
-        )
-        self.definitions: Optional[List[str]] = data.get("definitions")
-        self.tang: Optional[List[str]] = data.get("tang")
+    source: Optional[Source] = Field("source", Source, empty_is_none=True)
+    pinyin: Optional[str] = Field("pinyin")
+    simp_trad: Optional[SimpTrad] = Field("simpTrad", SimpTrad, empty_is_none=True)
+    definitions: Optional[List[str]] = Field("definitions")
+    tang: Optional[List[str]] = Field("tang")
 
     def __repr__(self):
         return f"Item(source={self.source}, pinyin={self.pinyin}, simp_trad={self.simp_trad})"
 
-    def to_dict(self):
-        return {
-            k: v if not isinstance(v, Enum) else v.value
-            for k, v in self.__dict__.items()
-            if v is not None
-        }
-
-
-class ChineseWordEntry:
-    def __init__(self, data: Dict[str, Any]):
-        self._id: str = data["_id"]
-        self.simp: str = data["simp"]
-        self.trad: str = data["trad"]
-        self.items: List[Item] = [Item(item) for item in data["items"]]
-        self.gloss: Optional[str] = data.get("gloss")
-        self.pinyin_search_string: str = data["pinyinSearchString"]
-        self.statistics: Optional[Statistics] = (
-            Statistics(data["statistics"]) if data.get("statistics") else None
-        )
+
+class ChineseWordEntry(View):
+    """One word dict record. Its items and statistics are decoded when first read."""
+
+    __slots__ = (
+        "__id",
+        "_simp",
+        "_trad",
+        "_items",
+        "_gloss",
+        "_pinyin_search_string",
+        "_statistics",
+    )
+
+    _id: str = Field("_id", required=True)
+    simp: str = Field("simp", required=True)
+    trad: str = Field("trad", required=True)
+    items: List[Item] = Field("items", Item, many=True, required=True)
+    gloss: Optional[str] = Field("gloss")
+    pinyin_search_string: str = Field("pinyinSearchString", required=True)
+    statistics: Optional[Statistics] = Field(
+        "statistics", Statistics, empty_is_none=True
+    )
 
     def __repr__(self):
         return f"ChineseWordEntry(id={self._id}, simp={self.simp}, trad={self.trad}, items_count={len(self.items)})"
 
-    def to_dict(self):
-        d = {k: v for k, v in self.__dict__.items() if v is not None}
-        d["items"] = [item.to_dict() for item in self.items]
-        if self.statistics:
-            d["statistics"] = self.statistics.to_dict()
-        return d
-
 
 class ChineseWordDict:
     def __init__(self):
@@ -131,12 +131,10 @@ class ChineseWordDict:
 
     @classmethod
     def from_jsonl(cls, file_path: str):
-        import json
-
         chinese_dict = cls()
         with open(file_path, "r", encoding="utf-8") as f:
             for line in f:
-                word_data = json.loads(line)
+                word_data = jsonio.loads(line)
                 chinese_dict.add_word(word_data)
         return chinese_dict
 
@@ -0,0 +1,27 @@
+// Loads the proper names (JMnedict's `n_j` entries) of a key. data/main.py writes them to their
+// own folder, dictionary/names/, laid out like the headword files (or under names/packed/ with
+// --packed), so a page only pays for them when it asks for them.
+
+import { loadPackedEntries, loadPackedMeta } from './packed';
+import { resolveEntryRefs } from './store';
+
+type Fetch = typeof fetch;
+
+export type NameEntries = { n_j: unknown[] };
+
+/** Returns the names listed under `key`, or null when there are none. */
+export async function loadNames(
+	fetch: Fetch,
+	key: string,
+	base = '/dictionary/names'
+): Promise<NameEntries | null> {
+	const packedMeta = await loadPackedMeta(fetch, `${base}/packed`);
+	if (packedMeta) {
+		return await loadPackedEntries<NameEntries>(fetch, packedMeta, key, `${base}/packed`);
+	}
+	const response = await fetch(`${base}/${key}.json`);
+	if (!response.ok) {
+		return null;
+	}
+	return await resolveEntryRefs(fetch, (await response.json()) as NameEntries);
+}
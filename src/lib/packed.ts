@@ -0,0 +1,108 @@
+// Reader for the packed dictionary output written by `python -m data.main --packed N`.
+// See PackedWriter in data/writer.py for the layout. The entry store (store.ts) uses the same
+// bucket layout, keyed by entry hash instead of by word.
+
+type Fetch = typeof fetch;
+
+type PackedMeta = { format: number; buckets: number; hash: 'crc32' };
+type BucketIndex = Record<string, [number, number]>;
+
+const CRC32_TABLE = (() => {
+	const table = new Uint32Array(256);
+	for (let n = 0; n < 256; n++) {
+		let c = n;
+		for (let k = 0; k < 8; k++) {
+			c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+		}
+		table[n] = c >>> 0;
+	}
+	return table;
+})();
+
+export function crc32(bytes: Uint8Array): number {
+	let crc = 0xffffffff;
+	for (const byte of bytes) {
+		crc = CRC32_TABLE[(crc ^ byte) & 0xff] ^ (crc >>> 8);
+	}
+	return (crc ^ 0xffffffff) >>> 0;
+}
+
+export function bucketOf(key: string, buckets: number): number {
+	return crc32(new TextEncoder().encode(key)) % buckets;
+}
+
+async function gunzip(bytes: ArrayBuffer): Promise<string> {
+	const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+	return await new Response(stream).text();
+}
+
+const metaCache = new Map<string, Promise<PackedMeta | null>>();
+const indexCache = new Map<string, Promise<BucketIndex | null>>();
+
+async function fetchJson<T>(fetch: Fetch, url: string): Promise<T | null> {
+	const response = await fetch(url);
+	return response.ok ? ((await response.json()) as T) : null;
+}
+
+/** Returns the packed layout's metadata, or null when the site was built without --packed. */
+export function loadPackedMeta(fetch: Fetch, base = '/dictionary/packed'): Promise<PackedMeta | null> {
+	let meta = metaCache.get(base);
+	if (!meta) {
+		meta = fetchJson<PackedMeta>(fetch, `${base}/meta.json`).catch(() => null);
+		metaCache.set(base, meta);
+	}
+	return meta;
+}
+
+/**
+ * Fetches the records of `keys` from one bucket: the bucket's index (cached) plus a single
+ * range request over the span the records cover. Keys missing from the index are left out.
+ */
+export async function loadBucketRecords<T = unknown>(
+	fetch: Fetch,
+	base: string,
+	bucket: number,
+	keys: string[]
+): Promise<Map<string, T>> {
+	const url = `${base}/${bucket}`;
+	let index = indexCache.get(url);
+	if (!index) {
+		index = fetchJson<BucketIndex>(fetch, `${url}.idx.json`);
+		indexCache.set(url, index);
+	}
+	const bucketIndex = await index;
+	const records = new Map<string, T>();
+	const found = keys.filter((key) => bucketIndex?.[key]);
+	if (!bucketIndex || found.length === 0) {
+		return records;
+	}
+
+	const start = Math.min(...found.map((key) => bucketIndex[key][0]));
+	const end = Math.max(...found.map((key) => bucketIndex[key][0] + bucketIndex[key][1]));
+	const response = await fetch(`${url}.bin`, {
+		headers: { Range: `bytes=${start}-${end - 1}` }
+	});
+	if (!response.ok) {
+		return records;
+	}
+	const span = await response.arrayBuffer();
+	// A server that ignores Range sends the whole bucket back with a 200.
+	const spanStart = response.status === 200 ? 0 : start;
+	for (const key of found) {
+		const [offset, length] = bucketIndex[key];
+		const record = span.slice(offset - spanStart, offset - spanStart + length);
+		records.set(key, JSON.parse(await gunzip(record)) as T);
+	}
+	return records;
+}
+
+/** Looks up one key: one small index fetch (cached per bucket) plus one range request. */
+export async function loadPackedEntries<T = unknown>(
+	fetch: Fetch,
+	meta: PackedMeta,
+	key: string,
+	base = '/dictionary/packed'
+): Promise<T | null> {
+	const records = await loadBucketRecords<T>(fetch, base, bucketOf(key, meta.buckets), [key]);
+	return records.get(key) ?? null;
+}
@@ -0,0 +1,121 @@
+// Multi-radical kanji search on the export of RadicalIndex in data/radicals.py, fetched once as
+// dictionary/search/radicals/index.json. Kanji are numbered in stroke order and every radical
+// lists the numbers of its kanji, which are turned into bitsets here, so a query is an AND of a
+// few hundred 32-bit words per radical, and a stroke count range one more.
+
+type Fetch = typeof fetch;
+
+type RadicalsExport = {
+	format: number;
+	kanji: string;
+	// stroke_starts[n] is the number of the first kanji with n or more strokes.
+	stroke_starts: number[];
+	// A radical's stroke count and the gaps between its kanji numbers.
+	radicals: Record<string, [number, number[]]>;
+};
+
+export type Strokes = number | [number, number];
+
+export type RadicalIndex = {
+	kanji: string[];
+	strokeStarts: number[];
+	// Radicals with their stroke counts, in the order a picker shows them.
+	radicals: [string, number][];
+	bits: Map<string, Uint32Array>;
+};
+
+let loaded: Promise<RadicalIndex | null> | null = null;
+
+/** Loads the radical index, once. */
+export function loadRadicals(
+	fetch: Fetch,
+	base = '/dictionary/search/radicals'
+): Promise<RadicalIndex | null> {
+	loaded ??= fetch(`${base}/index.json`).then(async (response) => {
+		if (!response.ok) {
+			return null;
+		}
+		const data = (await response.json()) as RadicalsExport;
+		const kanji = Array.from(data.kanji);
+		const bits = new Map<string, Uint32Array>();
+		for (const [radical, [, gaps]] of Object.entries(data.radicals)) {
+			const words = new Uint32Array((kanji.length + 31) >> 5);
+			let number = -1;
+			for (const gap of gaps) {
+				number += gap;
+				words[number >> 5] |= 1 << (number & 31);
+			}
+			bits.set(radical, words);
+		}
+		const radicals = Object.entries(data.radicals).map(
+			([radical, [strokes]]): [string, number] => [radical, strokes]
+		);
+		return { kanji, strokeStarts: data.stroke_starts, radicals, bits };
+	});
+	return loaded;
+}
+
+function strokeRange(index: RadicalIndex, strokes: Strokes): [number, number] {
+	const [low, high] = typeof strokes === 'number' ? [strokes, strokes] : strokes;
+	const last = index.strokeStarts.length - 1;
+	const clamp = (count: number) => index.strokeStarts[Math.min(Math.max(count, 0), last)];
+	return [clamp(low), clamp(high + 1)];
+}
+
+function matching(index: RadicalIndex, radicals: string[], strokes?: Strokes): Uint32Array {
+	const words = new Uint32Array((index.kanji.length + 31) >> 5).fill(0xffffffff);
+	for (const radical of radicals) {
+		const own = index.bits.get(radical);
+		if (!own) {
+			return words.fill(0);
+		}
+		for (let i = 0; i < words.length; i++) {
+			words[i] &= own[i];
+		}
+	}
+	// Kanji outside the stroke range, and the padding after the last kanji, are cleared.
+	const [start, end] =
+		strokes === undefined ? [0, index.kanji.length] : strokeRange(index, strokes);
+	for (let i = 0; i < words.length; i++) {
+		const from = Math.min(Math.max(start - i * 32, 0), 32);
+		const to = Math.min(Math.max(end - i * 32, 0), 32);
+		words[i] &= to <= from ? 0 : to - from === 32 ? 0xffffffff : ((1 << (to - from)) - 1) << from;
+	}
+	return words;
+}
+
+/**
+ * Returns the kanji written with all of `radicals`, fewest strokes first. `strokes` keeps only
+ * the ones with that many strokes, or with a count in an inclusive [low, high] range.
+ */
+export function searchRadicals(
+	index: RadicalIndex,
+	radicals: string[],
+	strokes?: Strokes
+): string[] {
+	const words = matching(index, radicals, strokes);
+	const kanji: string[] = [];
+	words.forEach((word, i) => {
+		while (word) {
+			const low = word & -word;
+			kanji.push(index.kanji[i * 32 + 31 - Math.clz32(low)]);
+			word ^= low;
+		}
+	});
+	return kanji;
+}
+
+/** Returns the radicals that can still be added to a query without emptying it. */
+export function remainingRadicals(
+	index: RadicalIndex,
+	radicals: string[],
+	strokes?: Strokes
+): string[] {
+	const words = matching(index, radicals, strokes);
+	return index.radicals
+		.map(([radical]) => radical)
+		.filter((radical) => {
+			const own = index.bits.get(radical) as Uint32Array;
+			return words.some((word, i) => (word & own[i]) !== 0);
+		});
+}
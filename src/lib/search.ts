@@ -0,0 +1,338 @@
+// Lookups in the static search indexes written by data/search.py to dictionary/search/:
+// autocomplete over the prefix index (PrefixIndex), where typing a query fetches at most one new
+// chunk per keystroke, romaji (RomajiIndex) and pinyin (PinyinIndex) lookups, one shard fetch per
+// query, and English search (GlossIndex), one shard fetch per query term. Chunks are fetched once
+// and cached.
+
+import { bucketOf } from './packed';
+
+type Fetch = typeof fetch;
+
+// A key, or [term, key] when the term it was found by isn't its own normalized form.
+type PrefixRecord = string | [string, string];
+type PrefixChunk = { top: PrefixRecord[]; children: string[] } | { records: PrefixRecord[] };
+
+const ROOT_CHUNK = '_';
+
+type ShardedMeta = { format: number; shards: number; hash: 'crc32' };
+type RomajiChunk = { romaji: Record<string, string[]>; kana: Record<string, string[]> };
+// A key and its readings, like "zhong1 guo2".
+type PinyinChunk = { pinyin: Record<string, [string, ...string[]][]> };
+type GlossMeta = { format: number; starts: string[] };
+type Postings = Record<string, [string, number][]>;
+type GlossChunk = { words: Postings; names: Postings };
+// A tone the query gave at an offset into its toneless letters: a tone mark on the letter there,
+// or a tone number after the syllable ending there.
+type ToneConstraint = { offset: number; tone: number; marked: boolean };
+
+const TONE_MARKS: Record<string, number> = {
+	'\u0304': 1,
+	'\u0301': 2,
+	'\u030c': 3,
+	'\u0300': 4
+};
+
+// STOP_WORDS in data/stemming.py.
+const STOP_WORDS = new Set(
+	(
+		'a an and are as at be by etc for from has have he her his in is it its of on one or ' +
+		"one's oneself she sb sth so some someone something that the their them they this to was " +
+		'were with'
+	).split(' ')
+);
+
+const chunkCache = new Map<string, Promise<unknown>>();
+
+/** normalize_term in data/search.py: NFKC, lowercase, hiragana, letters and digits only. */
+export function normalizeTerm(text: string): string {
+	return Array.from(text.normalize('NFKC').toLowerCase())
+		.map((char) => {
+			const code = char.codePointAt(0) as number;
+			return code >= 0x30a1 && code <= 0x30f6 ? String.fromCodePoint(code - 0x60) : char;
+		})
+		.filter((char) => /[\p{L}\p{N}]/u.test(char))
+		.join('');
+}
+
+/** romaji_key in data/search.py: no diacritics, one vowel per long vowel, n for m before b/p. */
+export function romajiKey(text: string): string {
+	return normalizeTerm(text.normalize('NFKD').replace(/\p{M}/gu, ''))
+		.replace(/ou/g, 'o')
+		.replace(/m(?=[bp])/g, 'n')
+		.replace(/([aeiou])\1+/g, '$1');
+}
+
+function loadChunk<T>(fetch: Fetch, base: string, name: string): Promise<T | null> {
+	const url = `${base}/${encodeURIComponent(name)}.json`;
+	let chunk = chunkCache.get(url);
+	if (!chunk) {
+		chunk = fetch(url).then((response) => (response.ok ? response.json() : null));
+		chunkCache.set(url, chunk);
+	}
+	return chunk as Promise<T | null>;
+}
+
+function termAndKey(record: PrefixRecord): [string, string] {
+	return typeof record === 'string' ? [normalizeTerm(record), record] : record;
+}
+
+/** Returns up to `limit` keys completing `query`, most common first. */
+export async function complete(
+	fetch: Fetch,
+	query: string,
+	limit = 10,
+	base = '/dictionary/search/prefix'
+): Promise<string[]> {
+	const chars = Array.from(normalizeTerm(query));
+	if (!chars.length) {
+		return [];
+	}
+	const wanted = chars.join('');
+	let prefix: string[] = [];
+	let chunk = await loadChunk<PrefixChunk>(fetch, base, ROOT_CHUNK);
+	while (chunk) {
+		if ('records' in chunk) {
+			const keys = new Set<string>();
+			for (const record of chunk.records) {
+				const [term, key] = termAndKey(record);
+				if (term.startsWith(wanted)) {
+					keys.add(key);
+					if (keys.size === limit) {
+						break;
+					}
+				}
+			}
+			return [...keys];
+		}
+		if (prefix.length === chars.length) {
+			return chunk.top.slice(0, limit).map((record) => termAndKey(record)[1]);
+		}
+		// The child chunk covering the next character starts at the last one not past it.
+		const next = chars[prefix.length].codePointAt(0) as number;
+		const start = chunk.children.filter((char) => (char.codePointAt(0) as number) <= next).pop();
+		if (start === undefined) {
+			return [];
+		}
+		const name = [...prefix, start].join('');
+		chunk = await loadChunk<PrefixChunk>(fetch, base, name);
+		if (chunk && 'top' in chunk) {
+			// Node chunks only ever cover their own character.
+			if (start !== chars[prefix.length]) {
+				return [];
+			}
+			prefix = [...prefix, start];
+		}
+	}
+	return [];
+}
+
+/** Returns the JMdict keys read as `romaji`, kanji forms before their kana, most common first. */
+export async function lookupRomaji(
+	fetch: Fetch,
+	romaji: string,
+	base = '/dictionary/search/romaji'
+): Promise<string[]> {
+	const key = romajiKey(romaji);
+	const meta = key ? await loadChunk<ShardedMeta>(fetch, base, 'meta') : null;
+	if (!meta) {
+		return [];
+	}
+	const chunk = await loadChunk<RomajiChunk>(fetch, base, `${bucketOf(key, meta.shards)}`);
+	const keys = new Set<string>();
+	for (const kana of chunk?.romaji[key] ?? []) {
+		for (const kanji of chunk?.kana[kana] ?? []) {
+			keys.add(kanji);
+		}
+		keys.add(kana);
+	}
+	return [...keys];
+}
+
+/** Splits a pinyin query into its toneless letters (ü as v) and the tones it gives. */
+export function parsePinyin(query: string): { toneless: string; tones: ToneConstraint[] } {
+	let toneless = '';
+	const tones: ToneConstraint[] = [];
+	for (const char of query.normalize('NFD').toLowerCase()) {
+		if (char in TONE_MARKS && toneless) {
+			tones.push({ offset: toneless.length - 1, tone: TONE_MARKS[char], marked: true });
+		} else if ((char === '\u0308' || char === ':') && toneless.endsWith('u')) {
+			toneless = toneless.slice(0, -1) + 'v';
+		} else if (/[0-5]/.test(char) && toneless) {
+			tones.push({ offset: toneless.length, tone: Number(char) || 5, marked: false });
+		} else if (/[a-z]/.test(char)) {
+			toneless += char;
+		}
+	}
+	return { toneless, tones };
+}
+
+function matchesTones(reading: string, tones: ToneConstraint[]): boolean {
+	let start = 0;
+	const syllables = reading.split(' ').map((syllable) => {
+		const end = start + syllable.length - 1;
+		const span = { start, end, tone: Number(syllable.slice(-1)) };
+		start = end;
+		return span;
+	});
+	return tones.every(({ offset, tone, marked }) =>
+		syllables.some((syllable) =>
+			marked
+				? syllable.start <= offset && offset < syllable.end && syllable.tone === tone
+				: syllable.end === offset && syllable.tone === tone
+		)
+	);
+}
+
+/**
+ * Returns the Chinese words and characters read as `query`, most frequent first. Tones are
+ * optional, as tone marks or numbers, and so are spaces between syllables.
+ */
+export async function lookupPinyin(
+	fetch: Fetch,
+	query: string,
+	base = '/dictionary/search/pinyin'
+): Promise<string[]> {
+	const { toneless, tones } = parsePinyin(query);
+	const meta = toneless ? await loadChunk<ShardedMeta>(fetch, base, 'meta') : null;
+	if (!meta) {
+		return [];
+	}
+	const chunk = await loadChunk<PinyinChunk>(fetch, base, `${bucketOf(toneless, meta.shards)}`);
+	return (chunk?.pinyin[toneless] ?? [])
+		.filter(([, ...readings]) => readings.some((reading) => matchesTones(reading, tones)))
+		.map(([key]) => key);
+}
+
+function isConsonant(word: string, i: number): boolean {
+	const char = word[i];
+	if ('aeiou'.includes(char)) {
+		return false;
+	}
+	return char === 'y' ? i === 0 || !isConsonant(word, i - 1) : true;
+}
+
+function measure(stem: string): number {
+	const pattern = Array.from(stem, (_, i) => (isConsonant(stem, i) ? 'c' : 'v')).join('');
+	return (pattern.replace(/(.)\1+/g, '$1').match(/vc/g) ?? []).length;
+}
+
+function hasVowel(stem: string): boolean {
+	return Array.from(stem).some((_, i) => !isConsonant(stem, i));
+}
+
+function endsCvc(stem: string): boolean {
+	const n = stem.length;
+	return (
+		n >= 3 &&
+		isConsonant(stem, n - 3) &&
+		!isConsonant(stem, n - 2) &&
+		isConsonant(stem, n - 1) &&
+		!'wxy'.includes(stem[n - 1])
+	);
+}
+
+/** stem in data/stemming.py: steps 1 and 5a of the Porter stemmer. */
+export function stem(word: string): string {
+	if (word.length <= 2) {
+		return word;
+	}
+	if (word.endsWith('sses') || word.endsWith('ies')) {
+		word = word.slice(0, -2);
+	} else if (word.endsWith('s') && !word.endsWith('ss')) {
+		word = word.slice(0, -1);
+	}
+	let trimmed = false;
+	if (word.endsWith('eed')) {
+		if (measure(word.slice(0, -3)) > 0) {
+			word = word.slice(0, -1);
+		}
+	} else if (word.endsWith('ed') && hasVowel(word.slice(0, -2))) {
+		[word, trimmed] = [word.slice(0, -2), true];
+	} else if (word.endsWith('ing') && hasVowel(word.slice(0, -3))) {
+		[word, trimmed] = [word.slice(0, -3), true];
+	}
+	if (trimmed) {
+		const last = word[word.length - 1];
+		if (/(at|bl|iz)$/.test(word)) {
+			word += 'e';
+		} else if (
+			word.length >= 2 &&
+			last === word[word.length - 2] &&
+			isConsonant(word, word.length - 1) &&
+			!'lsz'.includes(last)
+		) {
+			word = word.slice(0, -1);
+		} else if (measure(word) === 1 && endsCvc(word)) {
+			word += 'e';
+		}
+	}
+	if (word.endsWith('y') && hasVowel(word.slice(0, -1))) {
+		word = word.slice(0, -1) + 'i';
+	}
+	if (word.endsWith('e')) {
+		const m = measure(word.slice(0, -1));
+		if (m > 1 || (m === 1 && !endsCvc(word.slice(0, -1)))) {
+			word = word.slice(0, -1);
+		}
+	}
+	return word;
+}
+
+/** gloss_terms in data/stemming.py: the stemmed words of a query, without stop words. */
+export function glossTerms(text: string): string[] {
+	const words =
+		text
+			.replace(/\[[^\]]*\]|\bCL:\S*/g, ' ')
+			.normalize('NFKD')
+			.replace(/\p{M}/gu, '')
+			.toLowerCase()
+			.match(/[a-z0-9]+(?:'[a-z]+)?/g) ?? [];
+	return words
+		.filter((word) => !STOP_WORDS.has(word) && word.length >= 2)
+		.filter((word) => /^\d+$/.test(word) || !/\d/.test(word))
+		.map((word) => stem(word.split("'")[0]));
+}
+
+/**
+ * Returns the words and names whose English glosses have the words of `query`, the ones with
+ * the most of them first and then by their summed scores (common words and first senses score
+ * higher). Every query word fetches the one shard its term is in.
+ */
+export async function searchGlosses(
+	fetch: Fetch,
+	query: string,
+	limit = 20,
+	base = '/dictionary/search/gloss'
+): Promise<{ words: string[]; names: string[] }> {
+	const terms = [...new Set(glossTerms(query))];
+	const meta = terms.length ? await loadChunk<GlossMeta>(fetch, base, 'meta') : null;
+	if (!meta) {
+		return { words: [], names: [] };
+	}
+	const chunks = await Promise.all(
+		terms.map((term) => {
+			// The shard of a term starts at the last start not after it.
+			let low = 0;
+			let high = meta.starts.length;
+			while (high - low > 1) {
+				const middle = (low + high) >> 1;
+				[low, high] = meta.starts[middle] <= term ? [middle, high] : [low, middle];
+			}
+			return loadChunk<GlossChunk>(fetch, base, `${low}`);
+		})
+	);
+	const ranked = (namespace: keyof GlossChunk) => {
+		const matches = new Map<string, { terms: number; score: number }>();
+		terms.forEach((term, i) => {
+			for (const [key, score] of chunks[i]?.[namespace][term] ?? []) {
+				const match = matches.get(key) ?? { terms: 0, score: 0 };
+				matches.set(key, { terms: match.terms + 1, score: match.score + score });
+			}
+		});
+		return [...matches]
+			.sort(([a, x], [b, y]) => y.terms - x.terms || y.score - x.score || (a < b ? -1 : 1))
+			.slice(0, limit)
+			.map(([key]) => key);
+	};
+	return { words: ranked('words'), names: ranked('names') };
+}
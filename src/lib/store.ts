@@ -0,0 +1,71 @@
+// Resolves the entry refs in key files written by `python -m data.main --store N`.
+// See EntryStore in data/store.py for the layout.
+
+import { loadBucketRecords } from './packed';
+
+type Fetch = typeof fetch;
+
+/** A stored entry as listed in a key file: `{bucket}/{hash}` plus a short summary. */
+export type EntryRef = {
+	ref: string;
+	text: string;
+	reading?: string;
+	gloss?: string;
+	common?: boolean;
+	hsk?: number;
+};
+
+// Must match STORED_FIELDS and MAPPED_FIELDS in data/store.py. A ref in c_j/c_c stands for a whole
+// list the Japanese-Chinese mapping copied from another key, which takes the ref's place.
+const STORED_FIELDS = ['w_j', 'n_j', 'c_tw', 'c_sw', 'c_j', 'c_c'];
+
+export function isEntryRef(entry: unknown): entry is EntryRef {
+	return !!entry && typeof entry === 'object' && typeof (entry as EntryRef).ref === 'string';
+}
+
+/**
+ * Replaces the refs among a key's entries with the stored entries, in place. All the refs
+ * that share a bucket are fetched with one range request; refs that can't be loaded keep
+ * their summary.
+ */
+export async function resolveEntryRefs<T extends Record<string, unknown>>(
+	fetch: Fetch,
+	entries: T,
+	base = '/dictionary/store'
+): Promise<T> {
+	const buckets = new Map<number, string[]>();
+	for (const field of STORED_FIELDS) {
+		const listed = entries[field];
+		if (!Array.isArray(listed)) {
+			continue;
+		}
+		for (const entry of listed) {
+			if (isEntryRef(entry)) {
+				const [bucket, hash] = entry.ref.split('/');
+				buckets.set(Number(bucket), [...(buckets.get(Number(bucket)) ?? []), hash]);
+			}
+		}
+	}
+	if (buckets.size === 0) {
+		return entries;
+	}
+
+	const loaded = new Map<string, unknown>();
+	await Promise.all(
+		[...buckets].map(async ([bucket, hashes]) => {
+			const records = await loadBucketRecords(fetch, base, bucket, [...new Set(hashes)]);
+			for (const [hash, record] of records) {
+				loaded.set(`${bucket}/${hash}`, record);
+			}
+		})
+	);
+	for (const field of STORED_FIELDS) {
+		const listed = entries[field];
+		if (Array.isArray(listed)) {
+			(entries as Record<string, unknown>)[field] = listed.map((entry) =>
+				isEntryRef(entry) ? loaded.get(entry.ref) ?? entry : entry
+			);
+		}
+	}
+	return entries;
+}
@@ -0,0 +1,47 @@
+// Expands the integer tag codes in dictionary entries back into JMdict tag names.
+// The legend is written by TagTable in data/tags.py; a tag's code is its index in `tags`.
+
+type Fetch = typeof fetch;
+
+export type TagLegend = { format: number; tags: string[]; descriptions: string[] };
+
+// Must match TAG_FIELDS in data/tags.py
+const TAG_FIELDS = new Set(['tags', 'part_of_speech', 'misc', 'field', 'dialect', 'type']);
+// Only the JMdict/JMnedict entries are encoded; the Chinese and Kanjidic ones keep their strings.
+const ENCODED_KINDS = ['w_j', 'n_j'];
+
+let legendPromise: Promise<TagLegend | null> | null = null;
+
+/** Fetches tags.json once, or resolves to null for builds without one. */
+export function loadTagLegend(fetch: Fetch, base = '/dictionary'): Promise<TagLegend | null> {
+	legendPromise ??= fetch(`${base}/tags.json`)
+		.then((response) => (response.ok ? (response.json() as Promise<TagLegend>) : null))
+		.catch(() => null);
+	return legendPromise;
+}
+
+function expand(value: unknown, legend: TagLegend): unknown {
+	if (Array.isArray(value)) {
+		return value.map((item) => expand(item, legend));
+	}
+	if (value && typeof value === 'object') {
+		const object = value as Record<string, unknown>;
+		for (const [key, field] of Object.entries(object)) {
+			object[key] =
+				TAG_FIELDS.has(key) && Array.isArray(field)
+					? field.map((code) => (typeof code === 'number' ? legend.tags[code] ?? code : code))
+					: expand(field, legend);
+		}
+	}
+	return value;
+}
+
+/** Replaces the tag codes of a key's entries with tag names, in place. */
+export function expandTags<T extends Record<string, unknown>>(entries: T, legend: TagLegend): T {
+	for (const kind of ENCODED_KINDS) {
+		if (kind in entries) {
+			expand(entries[kind], legend);
+		}
+	}
+	return entries;
+}
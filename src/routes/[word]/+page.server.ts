@@ -1,18 +1,62 @@
 import { error } from '@sveltejs/kit';
+import { loadNames } from '$lib/names';
+import { loadPackedEntries, loadPackedMeta } from '$lib/packed';
+import { resolveEntryRefs } from '$lib/store';
+import { expandTags, loadTagLegend } from '$lib/tags';
 
 export async function load({ params, fetch }) {
 	const { word } = params;
-	const filename = word.endsWith('.json') ? word : `${word}.json`;
+	const key = word.replace(/\.json$/, '');
+
+	const [packedMeta, legend] = await Promise.all([loadPackedMeta(fetch), loadTagLegend(fetch)]);
+	const decode = <T extends Record<string, unknown>>(entries: T) =>
+		legend ? expandTags(entries, legend) : entries;
+	// Names live apart from the headword files; the page gets them as a promise of their own so
+	// the headword entries don't wait on them.
+	const names = loadNames(fetch, key)
+		.then((entries) => (entries ? decode(entries) : null))
+		.catch((err) => {
+			console.error(`Error fetching the names for ${word}:`, err);
+			return null;
+		});
+	// A name with no dictionary entry of its own still gets a page.
+	const namesOnly = async () => {
+		if (!(await names)) {
+			throw error(404, `Entry for ${word} not found`);
+		}
+		return { entries: {}, names };
+	};
+
+	if (packedMeta) {
+		console.log(`Looking up ${word} in the packed dictionary`);
+		try {
+			const entries = await loadPackedEntries(fetch, packedMeta, key);
+			if (entries) {
+				return { entries: decode(entries as Record<string, unknown>), names };
+			}
+		} catch (err) {
+			console.error(`Error reading packed entry for ${word}:`, err);
+		}
+		return await namesOnly();
+	}
+
+	const filename = `${key}.json`;
 	console.log(`Attempting to fetch /dictionary/${filename}`);
+	let response: Response;
 	try {
-		const response = await fetch(`/dictionary/${filename}`);
+		response = await fetch(`/dictionary/${filename}`);
 		console.log(`Response status: ${response.status}`);
-		if (!response.ok) {
-			throw error(404, `Entry for ${word} not found`);
-		}
-		const entries = await response.json();
+	} catch (err) {
+		console.error(`Error fetching ${filename}:`, err);
+		throw error(404, `Entry for ${word} not found`);
+	}
+	if (!response.ok) {
+		return await namesOnly();
+	}
+	try {
+		const entries = decode(await resolveEntryRefs(fetch, await response.json()));
 		console.log(`Entries: ${JSON.stringify(entries).slice(0, 100)}...`);
-		return { entries };
+		return { entries, names };
 	} catch (err) {
 		console.error(`Error fetching ${filename}:`, err);
 		throw error(404, `Entry for ${word} not found`);